@@ -0,0 +1,153 @@
+from database_model import Base, Advertisement, AdvertisementDetails, ADVERTISEMENT_DETAIL_COLUMNS
+from database_session import get_engine
+from migrate_advertisement_details import migrate_advertisement_details, legacy_columns
+from create_fields.create_vehicle_ad import NOT_PROVIDED
+from marketplace_generator import generate_marketplace
+
+import argparse
+import statistics
+import time
+from typing import Dict, Tuple
+from sqlalchemy import select, text, Engine
+
+# Filter queries of the searches and listings, they read the advertisements table only
+FILTER_QUERIES = {
+    'filtered scan': """
+        SELECT count(*), avg(price) FROM advertisements
+        WHERE discontinued = false AND fuel = 'Diesel' AND gearbox = 'Manual'
+          AND mileage BETWEEN 50000 AND 150000
+    """,
+    'price range page': """
+        SELECT ad_id, price, mileage, fuel, gearbox, manufactured_date, created_at, vehicle_id
+        FROM advertisements
+        WHERE discontinued = false AND price BETWEEN 10000 AND 20000 AND mileage < 100000
+        ORDER BY price, ad_id LIMIT 20
+    """,
+    'group by vehicle': """
+        SELECT vehicle_id, count(*), avg(price) FROM advertisements
+        WHERE discontinued = false GROUP BY vehicle_id
+    """,
+}
+# The advertisement page, before and after the split
+DETAIL_QUERIES = {
+    'wide': 'SELECT * FROM advertisements WHERE ad_id = :ad_id',
+    'split': ('SELECT * FROM advertisements LEFT JOIN advertisement_details '
+              'ON advertisement_details.ad_id = advertisements.ad_id '
+              'WHERE advertisements.ad_id = :ad_id'),
+}
+
+
+def restore_wide_layout(engine: Engine) -> None:
+    """
+    Moves the details back into the advertisements table, as before the
+    split: every optional text column inline, 'Not provided' when missing.
+    """
+    dialect_name = engine.dialect.name
+    with engine.begin() as connection:
+        for name in ADVERTISEMENT_DETAIL_COLUMNS:
+            connection.execute(text(f'ALTER TABLE advertisements ADD COLUMN {name} VARCHAR'))
+        values = ', '.join(f"{name} = coalesce(details.{name}, '{NOT_PROVIDED}')"
+                           for name in ADVERTISEMENT_DETAIL_COLUMNS)
+        connection.execute(text(
+            f'UPDATE advertisements SET {values} FROM advertisement_details AS details '
+            f'WHERE details.ad_id = advertisements.ad_id'))
+        placeholders = ', '.join(f"{name} = '{NOT_PROVIDED}'" for name in ADVERTISEMENT_DETAIL_COLUMNS)
+        connection.execute(text(
+            f'UPDATE advertisements SET {placeholders} WHERE ad_id NOT IN '
+            f'(SELECT ad_id FROM advertisement_details)'))
+        connection.execute(text('DELETE FROM advertisement_details'))
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if dialect_name == 'postgresql':
+            connection.execute(text('VACUUM FULL advertisements'))
+            connection.execute(text('VACUUM ANALYZE advertisements, advertisement_details'))
+        else:
+            connection.execute(text('VACUUM'))
+
+
+def table_sizes(engine: Engine) -> Dict[str, float]:
+    """Size in MB of the advertisements and advertisement_details tables, without indexes."""
+    if engine.dialect.name == 'postgresql':
+        statement = 'SELECT pg_table_size(:name)'
+    else:
+        statement = 'SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name = :name'
+    with engine.connect() as connection:
+        if engine.dialect.name != 'postgresql':
+            connection.execute(text('ANALYZE'))
+        return {name: connection.scalar(text(statement), {'name': name}) / 2 ** 20
+                for name in (Advertisement.__tablename__, AdvertisementDetails.__tablename__)}
+
+
+def time_queries(engine: Engine, layout: str, repeat: int) -> Dict[str, float]:
+    """Median milliseconds of every filter query and of the advertisement page query."""
+    with engine.connect() as connection:
+        ad_ids = connection.scalars(select(Advertisement.ad_id).order_by(Advertisement.ad_id)
+                                    .limit(repeat)).all()
+        results = {}
+        for name, sql in FILTER_QUERIES.items():
+            statement = text(sql)
+            connection.execute(statement).all()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                connection.execute(statement).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+        statement = text(DETAIL_QUERIES[layout])
+        timings = []
+        for ad_id in ad_ids:
+            started = time.perf_counter()
+            connection.execute(statement, {'ad_id': ad_id}).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        results['advertisement page'] = statistics.median(timings)
+    return results
+
+
+def run_benchmark(url: str, ads: int = 200_000,
+                  repeat: int = 10) -> Tuple[Dict[str, Tuple[float, float]], float, int]:
+    """
+    Times the filter queries and measures the table sizes with the details
+    inline (the layout before the split), then runs the migration of
+    migrate_advertisement_details and measures again. An empty database is
+    filled with generated data first, so use a scratch database.
+
+    Returns:
+        Tuple[Dict[str, Tuple[float, float]], float, int]: Measure -> (before,
+        after) in ms or MB, seconds of the migration and the details moved.
+    """
+    engine = get_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        empty = connection.scalar(select(Advertisement.ad_id).limit(1)) is None
+    if empty:
+        generate_marketplace(max(ads // 10, 10), ads, workers=1, url=url)
+    with engine.connect() as connection:
+        wide = bool(legacy_columns(connection))
+    if not wide:
+        restore_wide_layout(engine)
+
+    before = {**time_queries(engine, 'wide', repeat),
+              **{f'{name} MB': size for name, size in table_sizes(engine).items()}}
+    started = time.perf_counter()
+    moved = migrate_advertisement_details(engine, rewrite=True)
+    seconds = time.perf_counter() - started
+    after = {**time_queries(engine, 'split', repeat),
+             **{f'{name} MB': size for name, size in table_sizes(engine).items()}}
+    return {name: (before[name], after[name]) for name in before}, seconds, moved
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Filter query latency and table size before and after the advertisement_details split.')
+    parser.add_argument('--url', required=True,
+                        help='Scratch database, PostgreSQL or SQLite. An empty database is filled '
+                             'with generated data, a split one is put back to the wide layout.')
+    parser.add_argument('--ads', type=int, default=200_000,
+                        help='Advertisements generated into an empty database')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    results, seconds, moved = run_benchmark(args.url, args.ads, args.repeat)
+    print(f'\nMigration: {moved} advertisement details moved in {seconds:.1f} s\n')
+    print(f"{'measure':<32}{'wide':>10}{'split':>10}")
+    for name, (before, after) in results.items():
+        print(f'{name:<32}{before:>10.2f}{after:>10.2f}')
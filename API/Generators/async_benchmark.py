@@ -0,0 +1,146 @@
+from database_model import Base, Category, Vehicle
+from database_session import get_engine, get_session
+from database_session_async import get_async_engine, get_async_session, dispose_async_engines
+from insert_new_user import save_new_user
+from insert_new_ad import create_advertisement
+from insert_async import create_user_async, create_advertisement_async
+from create_fields.addressDTO import UserAddressAddDTO
+from create_fields.create_vehicle_ad import MotorCarAd
+
+import argparse
+import asyncio
+import hashlib
+import time
+import uuid
+from datetime import datetime
+from typing import List, Tuple, Dict
+from sqlalchemy import select
+
+BENCHMARK_MAKER = 'Benchmark'
+BENCHMARK_MODEL = 'Async'
+
+
+def make_users(count: int) -> List[Tuple[UserAddressAddDTO, Dict]]:
+    """
+    Builds unique, valid users outside the measured section.
+
+    Args:
+        count (int): The number of users.
+
+    Returns:
+        List[Tuple[UserAddressAddDTO, Dict]]: Address DTO and user fields per user.
+    """
+    run = uuid.uuid4().hex[:8]
+    # Phone numbers must be unique across runs as well
+    phone_base = int(run, 16) % 10 ** 5 * 10 ** 4
+    users = []
+    for number in range(count):
+        username = f'bench{run}{number}'
+        street = f'{number} Benchmark Street {run}'
+        address = UserAddressAddDTO.model_validate({
+            'country': 'United Kingdom',
+            'city': 'London',
+            'state': 'Greater London',
+            'zip_code': '10001',
+            'address': street,
+            'address_hash': hashlib.sha256(
+                ('United Kingdom' + 'London' + street).encode('utf-8')).hexdigest()})
+        user = {
+            'username': username,
+            'first_name': 'Kate',
+            'last_name': 'Duffy',
+            'email_address': f'{username}@example.com',
+            'main_phone_number': f'07{(phone_base + number) % 10 ** 9:09d}',
+            'gender': 'female'}
+        users.append((address, user))
+    return users
+
+
+def make_ad(user_id: int) -> MotorCarAd:
+    """Builds a valid advertisement of the benchmark vehicle."""
+    return MotorCarAd(
+        user_id=user_id, maker=BENCHMARK_MAKER, model=BENCHMARK_MODEL, price=15000,
+        condition='Used', fuel='Petrol', power_output=110, gearbox='Manual',
+        mileage=42000, used=True, color='Black', primary_registration=datetime(2019, 5, 1),
+        manufactured_date=datetime(2019, 1, 1), engine_volume=1.6,
+        average_consumption=6.1, vin_number=uuid.uuid4().hex[:17].upper())
+
+
+def prepare_database(url: str) -> None:
+    """Creates the tables and the benchmark vehicle if they do not exist."""
+    Base.metadata.create_all(get_engine(url))
+    with get_session(url) as session:
+        vehicle_id = session.execute(select(Vehicle.vehicle_id).where(
+            Vehicle.maker == BENCHMARK_MAKER, Vehicle.model == BENCHMARK_MODEL)).scalar()
+        if vehicle_id is None:
+            if session.get(Category, 1) is None:
+                session.add(Category(category_id=1, category_name='cars',
+                                     description='This category represents cars '
+                                                 'driven by only combustion engines.'))
+            session.add(Vehicle(maker=BENCHMARK_MAKER, model=BENCHMARK_MODEL, category_id=1))
+            session.commit()
+
+
+def run_sync(url: str, users: List[Tuple[UserAddressAddDTO, Dict]]) -> float:
+    """
+    Creates every user and one advertisement per user, one request after another.
+
+    Returns:
+        float: Requests per second.
+    """
+    started = time.perf_counter()
+    for address, user in users:
+        with get_session(url) as session:
+            user_id = save_new_user(session, address, user)
+            create_advertisement(session, make_ad(user_id))
+    return len(users) / (time.perf_counter() - started)
+
+
+async def run_async(url: str, users: List[Tuple[UserAddressAddDTO, Dict]],
+                    concurrency: int) -> float:
+    """
+    Creates every user and one advertisement per user, with up to
+    concurrency requests in flight on one event loop.
+
+    Returns:
+        float: Requests per second.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(address: UserAddressAddDTO, user: Dict) -> None:
+        async with semaphore:
+            async with get_async_session(url) as session:
+                user_id = await create_user_async(session, address, user)
+                await create_advertisement_async(session, make_ad(user_id))
+
+    # Opens the pool connections before measuring
+    async with get_async_engine(url).connect():
+        pass
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request(address, user) for address, user in users))
+    elapsed = time.perf_counter() - started
+    await dispose_async_engines()
+    return len(users) / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Sync vs asyncio throughput of user creation and ad insertion.')
+    parser.add_argument('--url', default=None,
+                        help='Database connection string, defaults to the .env PostgreSQL '
+                             'database. Use sqlite:///benchmark.db for the aiosqlite stand-in.')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    from config import settings
+    url = args.url or settings.DATABASE_URL_psycopg
+    prepare_database(url)
+
+    sync_rate = run_sync(url, make_users(args.requests))
+    async_rate = asyncio.run(run_async(url, make_users(args.requests), args.concurrency))
+
+    print(f'sync  (sequential):          {sync_rate:10.1f} requests/sec')
+    print(f'async (concurrency {args.concurrency:>3}):      {async_rate:10.1f} requests/sec')
+    print(f'speedup: {async_rate / sync_rate:.2f}x')
@@ -0,0 +1,91 @@
+from API.Validators.vehicle_input.autocomplete import CatalogAutocomplete
+from API.Validators.vehicle_input.catalog import CarCatalog
+
+import random
+import time
+import numpy as np
+
+
+def make_typo(word: str, rng: random.Random) -> str:
+    """Applies one random edit (substitution, deletion or insertion) to the word."""
+    position = rng.randrange(len(word))
+    letter = rng.choice('abcdefghijklmnopqrstuvwxyz')
+    edit = rng.choice(('substitute', 'delete', 'insert'))
+    if edit == 'substitute':
+        return word[:position] + letter + word[position + 1:]
+    if edit == 'delete' and len(word) > 1:
+        return word[:position] + word[position + 1:]
+    return word[:position] + letter + word[position:]
+
+
+def measure(func, inputs) -> dict:
+    """
+    Calls func for every input and collects latency percentiles.
+
+    Returns:
+        dict: mean, p50, p95 and p99 latency in microseconds.
+    """
+    timings = []
+    for args in inputs:
+        started = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings = np.array(timings)
+    return {'mean': timings.mean(),
+            'p50': np.percentile(timings, 50),
+            'p95': np.percentile(timings, 95),
+            'p99': np.percentile(timings, 99)}
+
+
+def run_benchmark(queries: int = 2000, seed: int = 42) -> dict:
+    """
+    Benchmarks prefix completion and fuzzy suggestions over the whole
+    cars.json vocabulary (brands, models and types). Index build and
+    warm-up times are reported as totals, queries per call.
+
+    Args:
+        queries (int): Number of queries per scenario.
+        seed (int): Seed of the random query generator.
+
+    Returns:
+        dict: scenario -> latency statistics in microseconds.
+    """
+    rng = random.Random(seed)
+
+    started = time.perf_counter()
+    catalog = CarCatalog.from_file()
+    index = CatalogAutocomplete(catalog)
+    build_ms = (time.perf_counter() - started) * 1e3
+
+    vocabulary = {
+        'brand': catalog.brand_names(),
+        'model': [model for brand in catalog.brand_names() for model in catalog.model_names(brand)],
+        'type': [type_name for (_, _, _), type_name in catalog.types.items()],
+    }
+
+    results = {'build': {'mean': build_ms * 1e3}}
+    for kind, names in vocabulary.items():
+        words = [rng.choice(names) for _ in range(queries)]
+        prefixes = [(word[:rng.randint(1, len(word))], kind) for word in words]
+        typos = [(make_typo(word, rng), kind) for word in words]
+        typed = [(make_typo(word, rng)[:max(4, len(word) // 2)], kind) for word in words]
+
+        # First pass builds the lazily created delete indexes
+        started = time.perf_counter()
+        for args in typos:
+            index.suggest(*args)
+        for args in typed:
+            index.search(*args)
+        results[f'{kind}_warm_up'] = {'mean': (time.perf_counter() - started) * 1e6}
+
+        results[f'{kind}_complete'] = measure(index.complete, prefixes)
+        results[f'{kind}_suggest'] = measure(index.suggest, typos)
+        results[f'{kind}_search'] = measure(index.search, typed)
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'scenario':<18}{'mean us':>10}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for scenario, stats in run_benchmark().items():
+        print(f"{scenario:<18}" + ''.join(f"{stats.get(key, float('nan')):>10.1f}"
+                                          for key in ('mean', 'p50', 'p95', 'p99')))
@@ -0,0 +1,397 @@
+from database_model import Advertisement, Vehicle, User
+from database_session import get_engine, get_session
+from advertisement_search import search_advertisements
+from insert_new_ad import advertisement_args, advertisement_rows, insert_advertisements, create_advertisement
+from create_fields.userDTO import UserAddDTO
+from create_fields.create_vehicle_ad import MotorCarAd, ElectroCarAd
+from create_fields.searchDTO import AdvertisementFilterDTO
+from API.Validators.user_input import validation_core
+from API.Validators.user_input.phone_number_valid import validate_phone_number
+from API.Validators.address_input.validation_core import validate_address, validate_state, validate_zip_code
+from marketplace_generator import generate_marketplace
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select, func, Engine
+
+BATCH_SIZE = 1000
+WARMUP = 3
+DEFAULT_TOLERANCE = 0.15
+# Size of the dataset generated into an empty database
+DATASET_USERS = 5_000
+DATASET_ADVERTISEMENTS = 50_000
+
+# A scenario gets the context and returns the measured operation and the
+# number of items it handles per call
+Scenario = Callable[[Dict], Tuple[Callable[[], None], int]]
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, calls: int) -> Callable[[Scenario], Scenario]:
+    """Registers a benchmark scenario measured over the given number of calls."""
+    def register(setup: Scenario) -> Scenario:
+        setup.calls = calls
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+
+def _batch(func: Callable, values: List) -> Tuple[Callable[[], None], int]:
+    """An operation calling func once per value."""
+    def run() -> None:
+        for value in values:
+            func(value)
+    return run, len(values)
+
+
+def _cycle(values: List) -> List:
+    """Repeats the sample values up to a batch."""
+    return (values * (BATCH_SIZE // len(values) + 1))[:BATCH_SIZE]
+
+
+def _user_values(number: int) -> Dict:
+    return {'username': f'benchuser{number}', 'first_name': 'Kate', 'last_name': 'Duffy',
+            'email_address': f'bench{number}@example.com', 'main_phone_number': '07400123456',
+            'gender': 'female', 'address_id': number}
+
+
+def _ad_values(context: Dict, number: int) -> Dict:
+    return {'user_id': context['user_id'], 'maker': context['maker'], 'model': context['model'],
+            'price': 10_000 + number % 5000, 'condition': 'Used', 'fuel': 'Petrol',
+            'power_output': 100, 'gearbox': 'Manual', 'mileage': 50_000 + number, 'used': True,
+            'color': 'Black', 'primary_registration': datetime(2018, 3, 1),
+            'manufactured_date': datetime(2018, 1, 1), 'engine_volume': 1.6,
+            'average_consumption': 6.1, 'vin_number': f"BENCH{context['run']}{number:08d}"}
+
+
+def _new_ads(context: Dict, amount: int) -> List[MotorCarAd]:
+    return [MotorCarAd.model_validate(_ad_values(context, next(context['numbers'])))
+            for _ in range(amount)]
+
+
+@scenario('validator.username', calls=200)
+def _validate_username(context: Dict):
+    return _batch(validation_core.validate_username, _cycle(['jenniferwilliams', 'qharris1', 'dannyread']))
+
+
+@scenario('validator.name', calls=200)
+def _validate_name(context: Dict):
+    return _batch(validation_core.validate_name, _cycle(['Christopherson', 'Kate', 'Eleanor']))
+
+
+@scenario('validator.email', calls=200)
+def _validate_email(context: Dict):
+    return _batch(validation_core.validate_email,
+                  _cycle(['stephanie82@example.org', 'j.smith@mail.co.uk', 'kate@example.com']))
+
+
+@scenario('validator.gender', calls=200)
+def _validate_gender(context: Dict):
+    return _batch(validation_core.validate_gender, _cycle(['male', 'female', 'other', 'unknown']))
+
+
+@scenario('validator.phone_number', calls=50)
+def _validate_phone_number(context: Dict):
+    # Distinct numbers every call, the parse cache does not hide the parsing
+    numbers = (f'07400{number:06d}' for number in count())
+
+    def run() -> None:
+        for _ in range(BATCH_SIZE):
+            validate_phone_number(next(numbers))
+    return run, BATCH_SIZE
+
+
+@scenario('validator.address', calls=200)
+def _validate_address(context: Dict):
+    def validate(value: Tuple[str, str]) -> None:
+        validate_address(value[0])
+        validate_zip_code(value[1])
+    return _batch(validate, _cycle([('1 Melissa Plaza', '12345'), ('22 Robinson Vista', '00501')]))
+
+
+@scenario('validator.state', calls=200)
+def _validate_state(context: Dict):
+    return _batch(validate_state, _cycle(['Ohio', 'New Hampshire', 'West Yorkshire']))
+
+
+@scenario('dto.UserAddDTO', calls=50)
+def _user_dto(context: Dict):
+    values = [_user_values(number) for number in range(BATCH_SIZE)]
+    return _batch(UserAddDTO.model_validate, values)
+
+
+@scenario('dto.MotorCarAd', calls=50)
+def _motor_car_dto(context: Dict):
+    values = [_ad_values(context, number) for number in range(BATCH_SIZE)]
+    return _batch(MotorCarAd.model_validate, values)
+
+
+@scenario('dto.ElectroCarAd', calls=50)
+def _electro_car_dto(context: Dict):
+    values = [{**_ad_values(context, number), 'fuel': 'Electric', 'hybrid': False,
+               'battery_capacity': 75} for number in range(BATCH_SIZE)]
+    return _batch(ElectroCarAd.model_validate, values)
+
+
+@scenario('mapping.advertisement_args', calls=50)
+def _advertisement_args(context: Dict):
+    ads = [MotorCarAd.model_validate(_ad_values(context, number)) for number in range(BATCH_SIZE)]
+    return (lambda: [advertisement_args(ad, context['vehicle_id']) for ad in ads]), BATCH_SIZE
+
+
+@scenario('mapping.advertisement_rows', calls=50)
+def _advertisement_rows(context: Dict):
+    ads = [MotorCarAd.model_validate(_ad_values(context, number)) for number in range(BATCH_SIZE)]
+    vehicle_ids = [context['vehicle_id']] * BATCH_SIZE
+    return (lambda: advertisement_rows(ads, vehicle_ids)), BATCH_SIZE
+
+
+@scenario('insert.advertisements_bulk', calls=10)
+def _insert_bulk(context: Dict):
+    engine = context['engine']
+
+    def run() -> None:
+        ads = context['batches'].pop()
+        with engine.begin() as connection:
+            insert_advertisements(connection, ads, [context['vehicle_id']] * len(ads))
+    # Validated beforehand, only the insert is measured
+    context['batches'] = [_new_ads(context, BATCH_SIZE) for _ in range(_insert_bulk.calls + WARMUP)]
+    return run, BATCH_SIZE
+
+
+@scenario('insert.advertisement_orm', calls=200)
+def _insert_orm(context: Dict):
+    ads = _new_ads(context, _insert_orm.calls + WARMUP)
+
+    def run() -> None:
+        with get_session(context['url']) as session:
+            create_advertisement(session, ads.pop())
+    return run, 1
+
+
+def _search(context: Dict, filters: AdvertisementFilterDTO, sort: str, pages: int = 1):
+    def run() -> None:
+        with get_session(context['url']) as session:
+            cursor = None
+            for _ in range(pages):
+                _, cursor = search_advertisements(session, filters, sort=sort, cursor=cursor)
+    return run, pages
+
+
+@scenario('query.search_newest', calls=200)
+def _search_newest(context: Dict):
+    return _search(context, AdvertisementFilterDTO(), 'newest')
+
+
+@scenario('query.search_model_by_price', calls=200)
+def _search_model(context: Dict):
+    return _search(context, AdvertisementFilterDTO(maker=context['maker'], model=context['model'],
+                                                   price_max=60_000), 'cheapest')
+
+
+@scenario('query.search_filters_pages', calls=50)
+def _search_pages(context: Dict):
+    return _search(context, AdvertisementFilterDTO(price_min=5_000, price_max=40_000,
+                                                   mileage_max=150_000), 'most_expensive', pages=10)
+
+
+def _reset_peak_rss() -> bool:
+    """Resets the peak resident set size of the process (Linux), False when not possible."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size since the last reset, or of the whole process."""
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def measure(operation: Callable[[], None], items: int, calls: int, warmup: int = WARMUP) -> Dict:
+    """
+    Times every call of the operation.
+
+    Args:
+        operation (Callable): The measured operation.
+        items (int): The number of items handled per call.
+        calls (int): The number of measured calls.
+        warmup (int): Calls made before measuring.
+
+    Returns:
+        Dict: ops_per_sec, latency percentiles of one item in microseconds
+        (p50_us, p95_us, p99_us), the number of measured items and the
+        peak RSS in MB during the measure.
+    """
+    for _ in range(warmup):
+        operation()
+    _reset_peak_rss()
+    timings = np.empty(calls)
+    for call in range(calls):
+        started = time.perf_counter()
+        operation()
+        timings[call] = time.perf_counter() - started
+    per_item = timings / items * 1e6
+    return {
+        'ops_per_sec': round(calls * items / timings.sum(), 1),
+        'p50_us': round(float(np.percentile(per_item, 50)), 3),
+        'p95_us': round(float(np.percentile(per_item, 95)), 3),
+        'p99_us': round(float(np.percentile(per_item, 99)), 3),
+        'operations': calls * items,
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+    }
+
+
+def prepare_context(url: str, seed: int = 42) -> Dict:
+    """
+    Fills an empty database with the marketplace generator and picks the
+    user and the most advertised vehicle used by the scenarios. A database
+    which already has advertisements is used as it is.
+
+    Args:
+        url (str): The benchmark database.
+        seed (int): Seed of the generated dataset.
+
+    Returns:
+        Dict: Engine, url and the data shared by the scenarios.
+    """
+    engine: Engine = get_engine(url)
+    with engine.connect() as connection:
+        has_data = engine.dialect.has_table(connection, Advertisement.__tablename__) and \
+            connection.scalar(select(Advertisement.ad_id).limit(1)) is not None
+    if not has_data:
+        generate_marketplace(DATASET_USERS, DATASET_ADVERTISEMENTS, seed=seed, workers=1, url=url)
+
+    with engine.connect() as connection:
+        user_id = connection.scalar(select(func.min(User.user_id)))
+        vehicle_id = connection.scalar(
+            select(Advertisement.vehicle_id).group_by(Advertisement.vehicle_id)
+            .order_by(func.count().desc()).limit(1))
+        maker, model = connection.execute(
+            select(Vehicle.maker, Vehicle.model).where(Vehicle.vehicle_id == vehicle_id)).one()
+    return {'engine': engine, 'url': url, 'user_id': user_id, 'vehicle_id': vehicle_id,
+            'maker': maker, 'model': model, 'run': int(time.time()), 'numbers': count()}
+
+
+def run_suite(url: str, patterns: Optional[List[str]] = None, seed: int = 42) -> Dict:
+    """
+    Runs the scenarios matching the patterns (e.g. 'validator.*'), all by default.
+
+    Args:
+        url (str): The benchmark database, SQLite or PostgreSQL.
+        patterns (List[str], optional): Shell-style patterns of scenario names.
+        seed (int): Seed of the generated dataset.
+
+    Returns:
+        Dict: 'meta' (environment of the run) and 'results' (scenario -> measures).
+    """
+    names = [name for name in SCENARIOS
+             if not patterns or any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+    context = prepare_context(url, seed)
+    results = {}
+    for name in names:
+        setup = SCENARIOS[name]
+        operation, items = setup(context)
+        results[name] = measure(operation, items, setup.calls)
+        print(f"{name:<32}{results[name]['ops_per_sec']:>14,.0f} ops/s"
+              f"{results[name]['p95_us']:>12.1f} us p95")
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'database': context['engine'].dialect.name,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Compares a run with a baseline run. A scenario regresses when its
+    throughput drops, or its p95 latency or peak RSS grows, by more than
+    the tolerance. Scenarios missing from either run are skipped.
+
+    Args:
+        results (Dict): The output of run_suite.
+        baseline (Dict): A saved output of run_suite.
+        tolerance (float): Allowed relative change, 0.15 for 15%.
+
+    Returns:
+        List[str]: A description of every regression.
+    """
+    regressions = []
+    for name, current in results['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        if current['ops_per_sec'] < before['ops_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: {current['ops_per_sec']:,.0f} ops/s, "
+                               f"baseline {before['ops_per_sec']:,.0f}")
+        for key, label in (('p95_us', 'us p95'), ('peak_rss_mb', 'MB peak RSS')):
+            if current[key] > before[key] * (1 + tolerance):
+                regressions.append(f'{name}: {current[key]:,.1f} {label}, baseline {before[key]:,.1f}')
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark suite of the validators, DTOs, inserts and searches.')
+    parser.add_argument('scenarios', nargs='*',
+                        help="Patterns of the scenarios to run, e.g. 'validator.*'. All by default.")
+    parser.add_argument('--url', default=None,
+                        help='Scratch database, SQLite or PostgreSQL. Defaults to a temporary '
+                             'SQLite file. An empty database is filled with generated data.')
+    parser.add_argument('--output', default=None, help='Saves the results as JSON to this file')
+    parser.add_argument('--baseline', default=None, help='JSON results to compare with')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--list', action='store_true', help='Lists the scenarios')
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(SCENARIOS))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.url or f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+        results = run_suite(url, args.scenarios, args.seed)
+        get_engine(url).dispose()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f'\nResults saved to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print(f'\n\033[1;31;40m{len(regressions)} regressions against {args.baseline}\033[0m')
+            print('\n'.join(regressions))
+            sys.exit(1)
+        print(f'\n\033[1;32;40mNo regression against {args.baseline}\033[0m')
@@ -0,0 +1,127 @@
+from database_model import Vehicle, User, Address, Category
+from database_session import get_engine
+from dealer_feeds import ingest_dealer_feed
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+import pandas as pd
+from sqlalchemy import select, insert, Engine
+
+FEED_PREFIX = 'Feed'
+FEED_MODELS = 200
+
+
+def prepare_catalog(engine: Engine, run: str) -> Tuple[int, List[Tuple[str, str]]]:
+    """
+    Adds a new benchmark dealer, a business user, and the benchmark vehicles,
+    once, to the database.
+
+    Args:
+        engine (Engine): The benchmark database.
+        run (str): Unique token of the benchmark run.
+
+    Returns:
+        Tuple[int, List[Tuple[str, str]]]: The dealer and the (maker, model) pairs.
+    """
+    vehicles = [(f'{FEED_PREFIX}Maker{number % 20}', f'{FEED_PREFIX}Model{number}')
+                for number in range(FEED_MODELS)]
+    with engine.begin() as connection:
+        address_id = connection.scalar(insert(Address).values(
+            address_hash=f'{FEED_PREFIX}Hash{run}', address='1 Dealer Street', city='City',
+            state='State', zip_code='00000', country='Country').returning(Address.address_id))
+        dealer = connection.scalar(insert(User).values(
+            username=f'{FEED_PREFIX}{run}', user_property='b', first_name='Feed',
+            email_address=f'feed.{run}@example.com', main_phone_number=f'07{run}',
+            gender='male', address_id=address_id).returning(User.user_id))
+        if not connection.scalar(select(Vehicle.vehicle_id)
+                                 .where(Vehicle.maker.like(f'{FEED_PREFIX}Maker%')).limit(1)):
+            category_id = connection.scalar(select(Category.category_id).limit(1))
+            if category_id is None:
+                category_id = connection.scalar(insert(Category).values(
+                    category_name='cars', description='cars').returning(Category.category_id))
+            connection.execute(insert(Vehicle), [
+                {'maker': maker, 'model': model, 'category_id': category_id}
+                for maker, model in vehicles])
+    return dealer, vehicles
+
+
+def generate_feed(count: int, vehicles: List[Tuple[str, str]], rng: random.Random,
+                  vin_prefix: str) -> List[Dict]:
+    """
+    Generates a dealer feed of count vehicles with unique VINs, all as strings,
+    as read from a CSV file. One in ten is an electric car.
+    """
+    feed = []
+    for number in range(count):
+        maker, model = rng.choice(vehicles)
+        row = {
+            'vehicle_type': 'motor_car', 'maker': maker, 'model': model,
+            'price': str(rng.randint(1_000, 90_000)), 'condition': 'Used',
+            'fuel': rng.choice(('Petrol', 'Diesel')), 'power_output': str(rng.randint(50, 300)),
+            'gearbox': rng.choice(('Manual', 'Automatic')), 'mileage': str(rng.randint(1, 300_000)),
+            'used': 'true', 'color': rng.choice(('Black', 'White', 'Red')),
+            'primary_registration': f'{rng.randint(2005, 2023)}-01-15',
+            'manufactured_date': f'{rng.randint(2004, 2022)}-06-01',
+            'engine_volume': f'{rng.uniform(1.0, 4.0):.1f}',
+            'average_consumption': f'{rng.uniform(4.0, 12.0):.1f}',
+            'vin_number': f'{vin_prefix}{number:07d}', 'body_type': 'Sedan',
+            'hybrid': '', 'battery_capacity': '',
+        }
+        if number % 10 == 0:
+            row.update(vehicle_type='electro_car', fuel='Electric', hybrid='false',
+                       battery_capacity=str(rng.randint(40, 100)))
+        feed.append(row)
+    return feed
+
+
+def run_benchmark(engine: Engine, count: int = 10_000, seed: int = 42) -> Dict[str, Tuple[float, dict]]:
+    """
+    Imports a generated feed, then the next day's feed of the same dealer:
+    5% of the vehicles sold (missing), 10% repriced, 1% invalid rows and
+    5% new vehicles. Every run adds a new dealer with its own advertisements,
+    deleting them would check every sales record, so use a scratch database.
+
+    Returns:
+        Dict[str, Tuple[float, dict]]: Seconds and counts of every import.
+    """
+    rng = random.Random(seed)
+    run = str(int(time.time()))
+    dealer, vehicles = prepare_catalog(engine, run)
+    feed = generate_feed(count, vehicles, rng, f'{FEED_PREFIX}{run}V')
+
+    next_feed = [dict(row) for row in feed if rng.random() >= 0.05]
+    for row in next_feed:
+        draw = rng.random()
+        if draw < 0.10:
+            row['price'] = str(int(row['price']) * 95 // 100)
+        elif draw < 0.11:
+            row['mileage'] = 'unknown'
+    next_feed.extend(generate_feed(count // 20, vehicles, rng, f'{FEED_PREFIX}{run}N'))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, rows in (('initial import', feed), ('next day', next_feed)):
+            path = Path(directory) / f'{name.replace(" ", "_")}.csv'
+            pd.DataFrame(rows).to_csv(path, index=False)
+            started = time.perf_counter()
+            counts = ingest_dealer_feed(str(path), dealer, engine)
+            results[name] = (time.perf_counter() - started, dict(counts))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark of the dealer feed import.')
+    parser.add_argument('--url', default=None,
+                        help='Connection string of a scratch database, defaults to the .env database.')
+    parser.add_argument('--vehicles', type=int, default=10_000)
+    args = parser.parse_args()
+
+    from config import settings
+    results = run_benchmark(get_engine(args.url or settings.DATABASE_URL_psycopg), args.vehicles)
+    print()
+    for name, (seconds, counts) in results.items():
+        print(f'{name:<16}{seconds:>8.2f} s   ' + ', '.join(f'{key} {value}' for key, value in counts.items()))
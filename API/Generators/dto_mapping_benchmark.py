@@ -0,0 +1,125 @@
+from database_model import Base, Vehicle, User, Address, Category
+from database_session import get_engine
+from insert_new_ad import advertisement_args, advertisement_rows, insert_advertisements, new_advertisement
+from create_fields.create_vehicle_ad import MotorCarAd, ElectroCarAd
+
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import select, insert, Engine
+from sqlalchemy.orm import Session
+
+VEHICLES = 100
+
+
+def generate_ads(count: int, user_id: int, vin_prefix: str, seed: int = 42) -> List[MotorCarAd]:
+    """Validates count generated advertisements, one in ten an ElectroCarAd."""
+    rng = random.Random(seed)
+    ads = []
+    for number in range(count):
+        values = {
+            'user_id': user_id, 'maker': 'MappingMaker', 'model': f'MappingModel{number % VEHICLES}',
+            'price': rng.randint(1_000, 90_000), 'condition': 'Used',
+            'fuel': rng.choice(('Petrol', 'Diesel')), 'power_output': rng.randint(50, 300),
+            'gearbox': 'Manual', 'mileage': rng.randint(1, 300_000), 'used': True, 'color': 'Black',
+            'primary_registration': datetime(2015, 1, 15), 'manufactured_date': datetime(2014, 6, 1),
+            'engine_volume': 2.0, 'average_consumption': 6.5,
+            'vin_number': f'{vin_prefix}{number:07d}', 'body_type': 'Sedan',
+        }
+        if number % 10:
+            ads.append(MotorCarAd.model_validate(values))
+        else:
+            ads.append(ElectroCarAd.model_validate({**values, 'hybrid': False, 'battery_capacity': 75}))
+    return ads
+
+
+def prepare_database(engine: Engine, run: str) -> Tuple[int, List[int]]:
+    """
+    Creates the tables, the benchmark vehicles and a user.
+
+    Args:
+        engine (Engine): The benchmark database.
+        run (str): Unique token of the benchmark run.
+
+    Returns:
+        Tuple[int, List[int]]: The user and the vehicles.
+    """
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        category_id = connection.scalar(select(Category.category_id).limit(1))
+        if category_id is None:
+            category_id = connection.scalar(insert(Category).values(
+                category_name='cars', description='cars').returning(Category.category_id))
+        vehicle_ids = connection.execute(insert(Vehicle).returning(Vehicle.vehicle_id), [
+            {'maker': 'MappingMaker', 'model': f'MappingModel{number}', 'category_id': category_id}
+            for number in range(VEHICLES)]).scalars().all()
+        address_id = connection.scalar(insert(Address).values(
+            address_hash=f'MappingHash{run}', address='1 Street', city='City',
+            state='State', zip_code='00000', country='Country').returning(Address.address_id))
+        user_id = connection.scalar(insert(User).values(
+            username=f'Mapping{run}', user_property='b', first_name='Kate',
+            email_address=f'mapping{run}@example.com', main_phone_number=f'07{run}',
+            gender='female', address_id=address_id).returning(User.user_id))
+    return user_id, vehicle_ids
+
+
+def timed(func: Callable, *args) -> float:
+    """Runs func once and returns the elapsed seconds."""
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def run_benchmark(engine: Engine, count: int = 100_000) -> Dict[str, float]:
+    """
+    Maps and saves count advertisements with the ORM path (advertisement_args,
+    Advertisement objects, Session.add_all) and the bulk path
+    (advertisement_rows, Core executemany). Every run adds its advertisements,
+    twice count, to the database, so use a scratch database.
+
+    Returns:
+        Dict[str, float]: Microseconds per advertisement of every step.
+    """
+    run = str(int(time.time()))
+    user_id, vehicles = prepare_database(engine, run)
+    ads = generate_ads(count, user_id, f'MAP{run}O')
+    bulk_ads = generate_ads(count, user_id, f'MAP{run}B')
+    vehicle_ids = [vehicles[number % VEHICLES] for number in range(count)]
+
+    def orm_objects():
+        return [new_advertisement(ad, vehicle_id) for ad, vehicle_id in zip(ads, vehicle_ids)]
+
+    def orm_save():
+        with Session(engine) as session:
+            session.add_all(orm_objects())
+            session.commit()
+
+    def core_save():
+        with engine.begin() as connection:
+            insert_advertisements(connection, bulk_ads, vehicle_ids)
+
+    results = {
+        'model_dump rows': timed(lambda: [advertisement_args(ad, vehicle_id)
+                                          for ad, vehicle_id in zip(ads, vehicle_ids)]),
+        'bulk rows': timed(advertisement_rows, ads, vehicle_ids),
+        'ORM objects': timed(orm_objects),
+    }
+    results['ORM save'] = timed(orm_save)
+    results['Core save'] = timed(core_save)
+    return {name: seconds / count * 1e6 for name, seconds in results.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Per advertisement cost of the ORM and bulk mapping paths.')
+    parser.add_argument('--url', default='sqlite:///:memory:',
+                        help='Connection string of a scratch database, SQLite in memory by default.')
+    parser.add_argument('--ads', type=int, default=100_000)
+    args = parser.parse_args()
+
+    results = run_benchmark(get_engine(args.url), args.ads)
+    print(f"\n{'step':<18}{'us / row':>10}")
+    for name, microseconds in results.items():
+        print(f'{name:<18}{microseconds:>10.2f}')
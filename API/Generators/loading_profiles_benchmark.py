@@ -0,0 +1,123 @@
+from database_model import Advertisement, User, SalesRecords, ADVERTISEMENT_DETAIL_COLUMNS
+from database_session import get_engine, get_session
+from loading_profiles import LOADING_PROFILES, apply_profile
+from advertisement_search import search_statement
+from create_fields.searchDTO import AdvertisementFilterDTO
+from sql_instrumentation import SQLInstrumentation
+from benchmark_suite import prepare_context
+
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import select, func, Select
+from sqlalchemy.orm import Mapper
+
+PAGE_SIZE = 20
+
+
+def render_listing_card(ad: Advertisement) -> Tuple:
+    """Reads what a search result shows."""
+    return (ad.ad_id, ad.price, ad.mileage, ad.fuel, ad.gearbox, ad.used, ad.condition_type,
+            ad.manufactured_date.year, ad.created_at, ad.vehicle.maker, ad.vehicle.model)
+
+
+def render_ad_detail(ad: Advertisement) -> Tuple:
+    """Reads what the advertisement page shows."""
+    mapper: Mapper = Advertisement.__mapper__
+    columns = tuple(getattr(ad, column.key) for column in mapper.column_attrs)
+    if ad.details is not None:
+        columns += tuple(getattr(ad.details, column) for column in ADVERTISEMENT_DETAIL_COLUMNS)
+    seller = ad.user
+    sale = ad.sales_record
+    return columns + (ad.vehicle.maker, ad.vehicle.model, ad.vehicle.category.category_name,
+                      seller.username, seller.first_name, seller.main_phone_number,
+                      seller.addresses.city if seller.addresses else None,
+                      sale.sale_date if sale else None)
+
+
+def render_seller_dashboard(user: User) -> Tuple:
+    """Reads what the seller dashboard shows."""
+    ads = [(ad.ad_id, ad.price, ad.discontinued, ad.vehicle.maker, ad.vehicle.model)
+           for ad in user.advertisements]
+    sales = [(sale.sale_date, sale.advertisement.price, sale.buyer.username)
+             for sale in user.sales_as_seller]
+    return user.username, user.addresses.city if user.addresses else None, ads, sales
+
+
+def profile_statements(context: Dict) -> Dict[str, Tuple[Select, Callable]]:
+    """
+    The SELECT of every profile and the rendering reading its result: a search
+    page, the page of a sold advertisement and the dashboard of the seller
+    with the most advertisements.
+    """
+    engine = context['engine']
+    with engine.connect() as connection:
+        sold_ad = connection.scalar(select(func.max(SalesRecords.advertisement_id)))
+        seller = connection.scalar(
+            select(Advertisement.user_id).group_by(Advertisement.user_id)
+            .order_by(func.count().desc()).limit(1))
+    return {
+        'listing_card': (search_statement(AdvertisementFilterDTO(), PAGE_SIZE), render_listing_card),
+        'ad_detail': (select(Advertisement).where(Advertisement.ad_id == sold_ad), render_ad_detail),
+        'seller_dashboard': (select(User).where(User.user_id == seller), render_seller_dashboard),
+    }
+
+
+def count_queries(url: str, statement: Select, render: Callable) -> Tuple[int, float, int]:
+    """
+    Loads and renders in a new session.
+
+    Returns:
+        Tuple[int, float, int]: Statements executed, milliseconds, rendered rows.
+    """
+    instrumentation = SQLInstrumentation(slow_query_ms=float('inf')).attach(get_engine(url))
+    try:
+        started = time.perf_counter()
+        with get_session(url) as session:
+            rows: List = [render(row) for row in session.scalars(statement).unique().all()]
+        elapsed = (time.perf_counter() - started) * 1000
+    finally:
+        instrumentation.detach()
+    return instrumentation.snapshot()['statements'], elapsed, len(rows)
+
+
+def check_profiles(url: str) -> Dict[str, Dict]:
+    """
+    Renders every profile with lazy loading and with the profile, counting
+    the statements. A lazy load the profile misses raises.
+
+    Returns:
+        Dict[str, Dict]: Profile -> statements and milliseconds of both loads,
+        expected statements and whether the profile stayed within them.
+    """
+    context = prepare_context(url)
+    results = {}
+    for profile, (statement, render) in profile_statements(context).items():
+        lazy, lazy_ms, rows = count_queries(url, statement, render)
+        queries, profile_ms, _ = count_queries(url, apply_profile(statement, profile), render)
+        expected = LOADING_PROFILES[profile][2]
+        results[profile] = {'rows': rows, 'lazy_queries': lazy, 'lazy_ms': lazy_ms,
+                            'queries': queries, 'ms': profile_ms, 'expected': expected,
+                            'passed': queries <= expected}
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Statements executed by every loading profile against lazy loading.')
+    parser.add_argument('--url', required=True,
+                        help='Scratch database, SQLite or PostgreSQL. An empty database is filled '
+                             'with generated data.')
+    args = parser.parse_args()
+
+    results = check_profiles(args.url)
+    print(f"\n{'profile':<18}{'rows':>6}{'lazy queries':>14}{'lazy ms':>10}{'queries':>9}{'ms':>8}")
+    for profile, result in results.items():
+        print(f"{profile:<18}{result['rows']:>6}{result['lazy_queries']:>14}{result['lazy_ms']:>10.1f}"
+              f"{result['queries']:>9}{result['ms']:>8.1f}")
+    failed = [profile for profile, result in results.items() if not result['passed']]
+    if failed:
+        print(f"\n\033[1;31;40mMore statements than expected: {', '.join(failed)}\033[0m")
+        sys.exit(1)
+    print('\n\033[1;32;40mEvery profile loads within its expected statements\033[0m')
@@ -0,0 +1,516 @@
+from database_model import (Base, Address, User, Category, Vehicle, Advertisement, AdvertisementDetails,
+                            SalesRecords, ADVERTISEMENT_DETAIL_COLUMNS)
+from database_session import get_engine
+from insert_new_user import hash_address, UPSERT_INSERTS
+
+import argparse
+import io
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from faker import Faker
+from sqlalchemy import select, insert, text, Engine, Connection, Table
+
+VEHICLES_CSV = Path(__file__).resolve().parent / 'vehicles.csv'
+FILE_FORMATS = {'csv': 'csv', 'parquet': 'parquet'}
+DEFAULT_SHARD_SIZE = 100_000
+
+# Values sampled by the shards, drawn once from Faker instead of once per row
+POOL_SIZE = 2000
+# Every tenth user is a business user, they publish most of the advertisements
+BUSINESS_EVERY = 10
+BUSINESS_SHARE = 0.6
+# Dates are relative to a fixed day, so a seed always gives the same dataset
+REFERENCE_DATE = np.datetime64('2024-01-01T00:00:00')
+DAY = np.timedelta64(1, 'D')
+
+CATEGORIES = (
+    (1, 'cars', 'This category represents cars driven by only combustion engines.'),
+    (2, 'trucks', 'This category represents trucks,heavy machinery.'),
+    (3, 'electrocars', 'This category represents cars driven by electrical motos.'),
+    (4, 'motorcycles', 'This category represents motorcycles.'),
+)
+# category_id -> fuels and their probabilities
+CATEGORY_FUELS = {
+    1: (('Petrol', 'Diesel', 'LPG', 'Hybrid'), (0.5, 0.35, 0.05, 0.1)),
+    2: (('Diesel',), (1.0,)),
+    3: (('Electric',), (1.0,)),
+    4: (('Petrol',), (1.0,)),
+}
+CONDITIONS = ('Used', 'New', 'After an accident', 'Broken')
+GEARBOXES = ('Manual', 'Automatic')
+GENDERS = ('male', 'female', 'other', 'unknown')
+OPTIONAL_POOLS = {
+    'body_type': ('Sedan', 'Hatchback', 'Estate', 'SUV', 'Coupe', 'Convertible', 'Van'),
+    'wheel_drive': ('Front', 'Rear', 'All wheel'),
+    'interior': ('Cloth', 'Leather', 'Alcantara'),
+    'audio_video_system': ('Radio', 'Navigation', 'Premium sound system'),
+    'wheels_discs': ('Steel', 'Alloy 16"', 'Alloy 18"'),
+    'safety_equip': ('ABS, ESP', 'ABS, ESP, lane assist', 'ABS'),
+    'lights': ('Halogen', 'Xenon', 'LED'),
+    'comfort_equip': ('Air conditioning', 'Climate control, heated seats', 'Cruise control'),
+    'miscell_equip': ('Tow bar', 'Roof rails', 'Spare wheel'),
+    'number_of_seats': ('2', '4', '5', '7'),
+    'number_of_doors': ('2', '3', '4', '5'),
+    'empty_weight': ('1200', '1500', '1800', '2500'),
+    'max_weight': ('1700', '2100', '2500', '3500'),
+}
+
+# Tables in load order, the generated ids keep the foreign keys valid
+TABLES = {
+    'addresses': Address.__table__,
+    'users': User.__table__,
+    'categories': Category.__table__,
+    'vehicles': Vehicle.__table__,
+    'advertisements': Advertisement.__table__,
+    'advertisement_details': AdvertisementDetails.__table__,
+    'sales_records': SalesRecords.__table__,
+}
+
+# Set in every worker process by _init_worker
+_state: Dict = {}
+
+
+def build_pools(seed: int) -> Dict[str, np.ndarray]:
+    """
+    Draws the pools of names, places and texts with Faker, once per dataset.
+    Names with punctuation are left out, so the usernames built from them
+    pass the username validation.
+
+    Args:
+        seed (int): Seed of Faker.
+
+    Returns:
+        Dict[str, np.ndarray]: Pool name -> unique values.
+    """
+    fake = Faker('en_GB')
+    fake.seed_instance(seed)
+
+    def pool(method, size: int = POOL_SIZE, alpha: bool = False) -> np.ndarray:
+        values = {method() for _ in range(size)}
+        if alpha:
+            values = {value for value in values if value.isalpha()}
+        return np.array(sorted(values), dtype=object)
+
+    return {
+        'first_name': pool(fake.first_name, alpha=True),
+        'last_name': pool(fake.last_name, alpha=True),
+        'street': pool(fake.street_name),
+        'city': pool(fake.city, 500),
+        'state': pool(fake.county, 200),
+        'color': pool(fake.safe_color_name, 200),
+        'description': pool(lambda: fake.paragraph(nb_sentences=3), 1000),
+        'miscell_info': pool(fake.sentence, 500),
+    }
+
+
+def read_catalog(engine: Optional[Engine] = None) -> pd.DataFrame:
+    """
+    Reads the vehicle catalog: the vehicles table of the target database
+    when it has vehicles, Generators/vehicles.csv otherwise. Names longer
+    than their column are cut.
+
+    Returns:
+        pd.DataFrame: vehicle_id, maker, model and category_id of every vehicle.
+    """
+    if engine is not None:
+        with engine.connect() as connection:
+            vehicles = pd.DataFrame(connection.execute(select(
+                Vehicle.vehicle_id, Vehicle.maker, Vehicle.model, Vehicle.category_id)).all(),
+                columns=['vehicle_id', 'maker', 'model', 'category_id'])
+        if len(vehicles):
+            return vehicles
+    vehicles = pd.read_csv(VEHICLES_CSV, usecols=['vehicle_id', 'brand', 'model', 'category_id'],
+                           dtype={'brand': str, 'model': str}, keep_default_na=False)
+    vehicles = vehicles.rename(columns={'brand': 'maker'})[['vehicle_id', 'maker', 'model', 'category_id']]
+    for column in ('maker', 'model'):
+        vehicles[column] = vehicles[column].str.slice(0, Vehicle.__table__.c[column].type.length)
+    return vehicles
+
+
+def _init_worker(pools: Dict[str, np.ndarray], catalog: pd.DataFrame, seed: int,
+                 users: int, url: Optional[str], output: Optional[str], file_format: str) -> None:
+    """Keeps the dataset settings in the worker process, sent once instead of with every shard."""
+    price_rng = np.random.default_rng([seed, 0])
+    # Base price of every catalog vehicle and a popularity skewed towards a few models
+    popularity = 1.0 / np.arange(1, len(catalog) + 1) ** 0.8
+    _state.update(
+        pools=pools, seed=seed, users=users, url=url, output=output, file_format=file_format,
+        vehicle_ids=catalog['vehicle_id'].to_numpy(),
+        category_ids=catalog['category_id'].to_numpy(),
+        base_prices=price_rng.lognormal(np.log(20_000), 0.6, len(catalog)),
+        popularity=popularity / popularity.sum(),
+    )
+
+
+def _init_process(*settings) -> None:
+    """Initializer of the pool processes: forgets the connections inherited from the parent."""
+    url = settings[4]
+    if url:
+        get_engine(url).dispose(close=False)
+    _init_worker(*settings)
+
+
+def _rng(table: str, shard: int) -> np.random.Generator:
+    """Generator of one shard, the same whichever worker generates it."""
+    return np.random.default_rng([_state['seed'], list(TABLES).index(table) + 1, shard])
+
+
+def _dates(rng: np.random.Generator, count: int, oldest_days: int, newest_days: int) -> np.ndarray:
+    """Random timestamps between oldest_days and newest_days before the reference date."""
+    seconds = rng.integers(newest_days * 86_400, oldest_days * 86_400, count)
+    return REFERENCE_DATE - seconds.astype('timedelta64[s]')
+
+
+def generate_addresses(shard: int, first_id: int, count: int) -> pd.DataFrame:
+    """Generates the addresses first_id .. first_id + count - 1, one per user."""
+    rng, pools = _rng('addresses', shard), _state['pools']
+    ids = np.arange(first_id, first_id + count)
+    street = rng.choice(pools['street'], count)
+    address = [f'{number} {name}' for number, name in zip(ids.tolist(), street)]
+    city = rng.choice(pools['city'], count)
+    created_at = _dates(rng, count, 3 * 365, 2 * 365)
+    return pd.DataFrame({
+        'address_id': ids,
+        'address_hash': [hash_address('United Kingdom', town, line) for town, line in zip(city, address)],
+        'address': address,
+        'city': city,
+        'state': rng.choice(pools['state'], count),
+        'zip_code': np.char.zfill(rng.integers(0, 100_000, count).astype(str), 5),
+        'country': 'United Kingdom',
+        'created_at': created_at,
+        'updated_at': created_at,
+    })
+
+
+def generate_users(shard: int, first_id: int, count: int) -> pd.DataFrame:
+    """
+    Generates the users first_id .. first_id + count - 1. Usernames, email
+    addresses and phone numbers are made unique by the user id.
+    """
+    rng, pools = _rng('users', shard), _state['pools']
+    ids = np.arange(first_id, first_id + count)
+    first_name = rng.choice(pools['first_name'], count)
+    last_name = rng.choice(pools['last_name'], count)
+    username = [f'{first[:6].lower()}{last[:4].lower()}{user_id}'
+                for first, last, user_id in zip(first_name, last_name, ids.tolist())]
+    additional = np.where(rng.random(count) < 0.1,
+                          np.char.add('075', np.char.zfill(ids.astype(str), 8)).astype(object), None)
+    registered_at = _dates(rng, count, 3 * 365, 2 * 365)
+    return pd.DataFrame({
+        'user_id': ids,
+        'address_id': ids,
+        'username': username,
+        'user_property': np.where(ids % BUSINESS_EVERY == 0, 'b', 'r'),
+        'first_name': first_name,
+        'last_name': last_name,
+        'email_address': [f'{name}@example.com' for name in username],
+        'main_phone_number': np.char.add('074', np.char.zfill(ids.astype(str), 8)),
+        'additional_phone_number': additional,
+        'gender': rng.choice(GENDERS, count),
+        'registered_at': registered_at,
+        'updated_at': registered_at,
+    })
+
+
+def generate_advertisements(shard: int, first_id: int, count: int,
+                            sold_ratio: float) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Generates the advertisements first_id .. first_id + count - 1, the
+    details of those with any optional text, and the sales of the sold ones.
+    A sale has the id of its advertisement, is made after the advertisement
+    was published and the buyer is not the seller.
+    """
+    rng, pools = _rng('advertisements', shard), _state['pools']
+    users = _state['users']
+    ids = np.arange(first_id, first_id + count)
+
+    business = rng.random(count) < BUSINESS_SHARE
+    if users >= BUSINESS_EVERY:
+        user_id = np.where(business,
+                           rng.integers(1, users // BUSINESS_EVERY + 1, count) * BUSINESS_EVERY,
+                           rng.integers(1, users + 1, count))
+    else:
+        # No business user, the advertisements are spread over every user
+        user_id = rng.integers(1, users + 1, count)
+    vehicle = rng.choice(len(_state['vehicle_ids']), count, p=_state['popularity'])
+    category = _state['category_ids'][vehicle]
+
+    fuel = np.empty(count, dtype=object)
+    for category_id, (fuels, weights) in CATEGORY_FUELS.items():
+        in_category = category == category_id
+        fuel[in_category] = rng.choice(fuels, in_category.sum(), p=weights)
+    fuel[~np.isin(category, list(CATEGORY_FUELS))] = 'Petrol'
+
+    age = rng.integers(0, 20, count)
+    mileage = np.maximum(1, age * rng.normal(15_000, 5_000, count)).astype(np.int64)
+    price = np.maximum(100, _state['base_prices'][vehicle] * 0.9 ** age
+                       * rng.lognormal(0, 0.15, count)).astype(np.int64)
+    manufactured = REFERENCE_DATE - (age * 365 + rng.integers(0, 365, count)) * DAY
+    created_at = _dates(rng, count, 2 * 365, 1)
+    sold = rng.random(count) < sold_ratio
+
+    ads = {
+        'ad_id': ids,
+        'discontinued': sold | (rng.random(count) < 0.05),
+        'price': price,
+        'condition_type': rng.choice(CONDITIONS, count, p=(0.85, 0.1, 0.04, 0.01)),
+        'fuel': fuel,
+        'power_output': rng.integers(40, 350, count),
+        'gearbox': rng.choice(GEARBOXES, count),
+        'mileage': mileage,
+        'used': mileage > 100,
+        'color': rng.choice(pools['color'], count),
+        'primary_registration': manufactured + rng.integers(0, 90, count) * DAY,
+        'manufactured_date': manufactured,
+        'engine_volume': np.where(fuel == 'Electric', 0.1, rng.uniform(0.9, 5.0, count).round(1)),
+        'average_consumption': rng.uniform(3.0, 15.0, count).round(1),
+        'vin_number': np.char.add('SYN', np.char.zfill(ids.astype(str), 14)),
+        'description': np.where(rng.random(count) < 0.7, rng.choice(pools['description'], count), None),
+        'miscell_info': np.where(rng.random(count) < 0.2, rng.choice(pools['miscell_info'], count), None),
+        'created_at': created_at,
+        'updated_at': created_at,
+        'user_id': user_id,
+        'vehicle_id': _state['vehicle_ids'][vehicle],
+    }
+    for column, values in OPTIONAL_POOLS.items():
+        ads[column] = np.where(rng.random(count) < 0.5,
+                               rng.choice(np.array(values, dtype=object), count), None)
+
+    frame = pd.DataFrame(ads)
+    details = frame[['ad_id', *ADVERTISEMENT_DETAIL_COLUMNS]]
+    details = details[details[list(ADVERTISEMENT_DETAIL_COLUMNS)].notna().any(axis=1)]
+
+    seller = user_id[sold]
+    buyer = rng.integers(1, users + 1, len(seller))
+    buyer = np.where(buyer == seller, buyer % users + 1, buyer)
+    sales = pd.DataFrame({
+        'record_id': ids[sold],
+        'sale_date': created_at[sold] + rng.integers(3_600, 60 * 86_400, len(seller)).astype('timedelta64[s]'),
+        'seller_id': seller,
+        'buyer_id': buyer,
+        'advertisement_id': ids[sold],
+    })
+    return frame.drop(columns=list(ADVERTISEMENT_DETAIL_COLUMNS)), details, sales
+
+
+def write_frame(frame: pd.DataFrame, table: str, shard: int) -> None:
+    """
+    Writes a shard to <output>/<table>/part-<shard>.<csv|parquet>.
+    Both formats are written by Arrow, CSV ten times faster than pandas.
+    """
+    directory = Path(_state['output']) / table
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"part-{shard:05d}.{FILE_FORMATS[_state['file_format']]}"
+    arrow_table = pa.Table.from_pandas(frame, preserve_index=False)
+    if _state['file_format'] == 'parquet':
+        pq.write_table(arrow_table, path)
+    else:
+        pa_csv.write_csv(arrow_table, path)
+
+
+def load_frame(connection: Connection, table: Table, frame: pd.DataFrame) -> None:
+    """
+    Loads a shard into its table, with COPY on PostgreSQL (as vehicles_init)
+    and a batched executemany on other databases. Arrow writes missing values
+    as empty fields and empty strings as "", as COPY reads them.
+    """
+    if connection.dialect.name == 'postgresql':
+        buffer = io.BytesIO()
+        pa_csv.write_csv(pa.Table.from_pandas(frame, preserve_index=False), buffer,
+                         pa_csv.WriteOptions(include_header=False))
+        statement = f"COPY {table.name} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = connection.connection.cursor()
+        try:
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+    else:
+        frame = frame.astype(object).where(frame.notna(), None)
+        for column in frame.columns:
+            if frame[column].map(type).eq(pd.Timestamp).any():
+                frame[column] = [value.to_pydatetime() if value is not None else None
+                                 for value in frame[column]]
+        connection.execute(insert(table), frame.to_dict(orient='records'))
+
+
+def _save(frames: List[Tuple[str, pd.DataFrame]], shard: int) -> None:
+    """Writes the frames of a shard to files, or loads them within one transaction."""
+    if _state['url']:
+        with get_engine(_state['url']).begin() as connection:
+            for table, frame in frames:
+                load_frame(connection, TABLES[table], frame)
+    else:
+        for table, frame in frames:
+            write_frame(frame, table, shard)
+
+
+def _run_shard(task: Tuple[str, int, int, int, float]) -> Dict[str, int]:
+    """Generates and saves one shard. Returns the number of rows per table."""
+    table, shard, first_id, count, sold_ratio = task
+    if table == 'addresses':
+        frames = [('addresses', generate_addresses(shard, first_id, count))]
+    elif table == 'users':
+        frames = [('users', generate_users(shard, first_id, count))]
+    else:
+        ads, details, sales = generate_advertisements(shard, first_id, count, sold_ratio)
+        frames = [('advertisements', ads), ('advertisement_details', details), ('sales_records', sales)]
+    _save(frames, shard)
+    return {name: len(frame) for name, frame in frames}
+
+
+def _shards(table: str, rows: int, shard_size: int, sold_ratio: float) -> Iterator[Tuple]:
+    for shard, first_id in enumerate(range(1, rows + 1, shard_size)):
+        yield table, shard, first_id, min(shard_size, rows + 1 - first_id), sold_ratio
+
+
+def _prepare_database(engine: Engine, catalog: pd.DataFrame) -> None:
+    """
+    Loads the categories, and the catalog when the vehicles table is empty.
+
+    Raises:
+        ValueError: If the users or advertisements tables are not empty,
+            the generated ids would collide.
+    """
+    with engine.begin() as connection:
+        for model in (User, Address, Advertisement, SalesRecords):
+            if connection.scalar(select(model.__table__.primary_key.columns[0]).limit(1)) is not None:
+                raise ValueError(f'Table {model.__tablename__} is not empty, '
+                                 f'the generator needs an empty database')
+        statement = UPSERT_INSERTS[connection.dialect.name](Category).on_conflict_do_nothing()
+        connection.execute(statement, [{'category_id': category_id, 'category_name': name,
+                                        'description': description}
+                                       for category_id, name, description in CATEGORIES])
+        if connection.scalar(select(Vehicle.vehicle_id).limit(1)) is None:
+            load_frame(connection, TABLES['vehicles'], catalog)
+
+
+def _reset_sequences(engine: Engine) -> None:
+    """Moves the PostgreSQL id sequences past the generated ids."""
+    with engine.begin() as connection:
+        for name, table in TABLES.items():
+            if table.autoincrement_column is None:
+                continue
+            key = table.autoincrement_column.name
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{name}', '{key}'), "
+                f"COALESCE((SELECT MAX({key}) FROM {name}), 0) + 1, false)"))
+
+
+def generate_marketplace(users: int = 1_000_000,
+                         advertisements: int = 5_000_000,
+                         sold_ratio: float = 0.2,
+                         seed: int = 42,
+                         workers: Optional[int] = None,
+                         shard_size: int = DEFAULT_SHARD_SIZE,
+                         output: Optional[str] = None,
+                         file_format: str = 'csv',
+                         url: Optional[str] = None) -> Counter:
+    """
+    Generates a synthetic marketplace: addresses, users, categories,
+    vehicles, advertisements and sales records.
+
+    Tables are cut in shards of consecutive ids, generated in parallel by a
+    process pool. Every shard has its own random generator derived from the
+    seed, its table and its position, and samples whole columns at once from
+    value pools drawn once with Faker. The same seed gives the same dataset
+    whatever the number of workers. The shards are streamed to files or
+    loaded into the database, table after table so the foreign keys hold.
+
+    Args:
+        users (int): The number of users, with one address each.
+            Every tenth user is a business user. At least 1 with
+            advertisements, 2 with sales.
+        advertisements (int): The number of advertisements.
+        sold_ratio (float): Share of the advertisements sold, with a sales record.
+        seed (int): Seed of the dataset.
+        workers (int, optional): Number of processes, defaults to the number of CPUs.
+        shard_size (int): Number of rows per shard.
+        output (str, optional): Directory of the files, one directory per table
+            and one file per shard. Ignored when url is given.
+        file_format (str): 'csv' or 'parquet'.
+        url (str, optional): Connection string of an empty database to load
+            instead of writing files. Its vehicles table is used as catalog
+            when not empty, Generators/vehicles.csv otherwise.
+
+    Returns:
+        Counter: The number of rows generated per table.
+
+    Raises:
+        ValueError: If neither output nor url is given, the file format is
+            unknown, there are too few users or the database is not empty.
+    """
+    if not output and not url:
+        raise ValueError('Give an output directory or a database url')
+    if advertisements > 0 and users < 1:
+        raise ValueError('Advertisements need at least 1 user')
+    if advertisements > 0 and sold_ratio > 0 and users < 2:
+        raise ValueError('Sales need at least 2 users, the buyer is not the seller')
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unknown file format {file_format}, use {', '.join(FILE_FORMATS)}")
+    workers = workers or os.cpu_count() or 1
+
+    engine = get_engine(url) if url else None
+    if engine is not None:
+        Base.metadata.create_all(engine)
+    catalog = read_catalog(engine)
+    settings = (build_pools(seed), catalog, seed, users, url, output, file_format)
+    _init_worker(*settings)
+
+    counts = Counter(categories=len(CATEGORIES), vehicles=len(catalog))
+    if engine is not None:
+        _prepare_database(engine, catalog)
+    else:
+        write_frame(pd.DataFrame(CATEGORIES, columns=['category_id', 'category_name', 'description']),
+                    'categories', 0)
+        write_frame(catalog, 'vehicles', 0)
+
+    phases = (('addresses', users), ('users', users), ('advertisements', advertisements))
+    if workers == 1:
+        for table, rows in phases:
+            for task in _shards(table, rows, shard_size, sold_ratio):
+                counts.update(_run_shard(task))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_process, initargs=settings) as pool:
+            for table, rows in phases:
+                for result in pool.map(_run_shard, _shards(table, rows, shard_size, sold_ratio)):
+                    counts.update(result)
+
+    if engine is not None and engine.dialect.name == 'postgresql':
+        _reset_sequences(engine)
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Seeded synthetic marketplace data for load tests, as files or into a database.')
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--ads', type=int, default=5_000_000)
+    parser.add_argument('--sold', type=float, default=0.2, help='Share of sold advertisements')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help='Defaults to the number of CPUs')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument('--output', default=None, help='Directory of the generated files')
+    parser.add_argument('--format', choices=list(FILE_FORMATS), default='csv')
+    parser.add_argument('--url', default=None,
+                        help='Load an empty database instead of writing files')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate_marketplace(args.users, args.ads, args.sold, args.seed, args.workers,
+                                  args.shard_size, args.output, args.format, args.url)
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f'\n\033[1;32;40m{total:,} rows generated in {elapsed:.2f}s '
+          f'({total / elapsed:,.0f} rows/sec)\033[0m')
+    for table, rows in counts.items():
+        print(f'{table:<16}{rows:>12,}')
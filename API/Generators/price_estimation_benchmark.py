@@ -0,0 +1,197 @@
+from price_estimation import ComparablesIndex, DEFAULT_COMPARABLES
+from database_session import get_engine
+
+import argparse
+import time
+from typing import Dict, Tuple
+import numpy as np
+
+FUELS = ('petrol', 'diesel', 'electric', 'hybrid', 'lpg')
+FUEL_FACTORS = np.array([1.0, 1.05, 1.25, 1.15, 0.9])
+CURRENT_YEAR = 2024
+
+
+def generate_listings(count: int, models: int, rng: np.random.Generator,
+                      first_ad_id: int = 1) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Generates listings priced by a known formula: a base price per model,
+    yearly depreciation, mileage and power output effects, a fuel factor
+    and 8% lognormal noise. Model popularity is skewed, a few models get
+    most of the listings, as on real marketplaces.
+
+    Args:
+        count (int): The number of listings.
+        models (int): The number of (maker, model) pairs.
+        rng (np.random.Generator): The random generator, seeded by the caller.
+        first_ad_id (int): The ad_id of the first listing.
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], np.ndarray]: The listing columns and
+        the noise free price of every listing.
+    """
+    model_rng = np.random.default_rng(7)
+    base_prices = model_rng.lognormal(np.log(30_000), 0.5, models)
+    depreciation = model_rng.uniform(0.06, 0.14, models)
+    base_power = model_rng.uniform(60, 250, models)
+
+    popularity = 1.0 / np.arange(1, models + 1)
+    vehicle_id = rng.choice(models, size=count, p=popularity / popularity.sum()) + 1
+    model = vehicle_id - 1
+    age = rng.integers(0, 20, count)
+    mileage = np.maximum(1, (age * rng.normal(15_000, 5_000, count))).astype(np.int64)
+    power_output = np.maximum(30, base_power[model] * rng.normal(1.0, 0.2, count)).astype(np.int64)
+    fuel = rng.choice(len(FUELS), size=count, p=[0.45, 0.3, 0.1, 0.1, 0.05])
+
+    fair_price = (base_prices[model] * (1 - depreciation[model]) ** age
+                  * np.exp(-mileage / 400_000) * (power_output / base_power[model]) ** 0.6
+                  * FUEL_FACTORS[fuel])
+    price = np.maximum(100, fair_price * rng.lognormal(0, 0.08, count)).astype(np.int64)
+
+    listings = {
+        'ad_id': np.arange(first_ad_id, first_ad_id + count, dtype=np.int64),
+        'vehicle_id': vehicle_id.astype(np.int64),
+        'year': CURRENT_YEAR - age,
+        'mileage': mileage,
+        'power_output': power_output,
+        'fuel': np.array(FUELS, dtype=object)[fuel],
+        'price': price,
+        'sold': rng.random(count) < 0.2,
+    }
+    return listings, fair_price
+
+
+def measure(func, inputs) -> dict:
+    """
+    Calls func for every input and collects latency percentiles.
+
+    Returns:
+        dict: mean, p50, p95 and p99 latency in microseconds.
+    """
+    timings = []
+    for args in inputs:
+        started = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings = np.array(timings)
+    return {'mean': timings.mean(),
+            'p50': np.percentile(timings, 50),
+            'p95': np.percentile(timings, 95),
+            'p99': np.percentile(timings, 99)}
+
+
+def run_benchmark(listings_count: int = 1_000_000, models: int = 2000,
+                  queries: int = 2000, k: int = DEFAULT_COMPARABLES,
+                  seed: int = 42) -> dict:
+    """
+    Builds the index from generated listings and prices held out listings
+    of the same distribution.
+
+    Accuracy is the absolute percentage error against the advertised price,
+    compared with a baseline of the median price of the model. Latency is
+    measured per estimate() call (comparables included).
+
+    Args:
+        listings_count (int): The number of indexed listings.
+        models (int): The number of (maker, model) pairs.
+        queries (int): The number of held out listings to price.
+        k (int): The number of comparables.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        dict: Build and update times, accuracy and latency statistics.
+    """
+    rng = np.random.default_rng(seed)
+    listings, _ = generate_listings(listings_count, models, rng)
+    held_out, fair_price = generate_listings(queries, models, rng,
+                                             first_ad_id=listings_count + 1)
+    vehicles = {vehicle_id: (f'Maker{vehicle_id % 60}', f'Model{vehicle_id}')
+                for vehicle_id in range(1, models + 1)}
+
+    index = ComparablesIndex()
+    started = time.perf_counter()
+    index.load(listings, vehicles)
+    build_s = time.perf_counter() - started
+
+    changed = rng.choice(listings_count, size=listings_count // 100, replace=False)
+    update = {name: values[changed] for name, values in listings.items()}
+    update['price'] = (update['price'] * 0.95).astype(np.int64)
+    update['listed'] = rng.random(len(changed)) > 0.3
+    started = time.perf_counter()
+    index.update(update, vehicles)
+    update_s = time.perf_counter() - started
+
+    inputs = [(*vehicles[vehicle_id], year, mileage, power_output, fuel, k)
+              for vehicle_id, year, mileage, power_output, fuel in zip(
+                  held_out['vehicle_id'].tolist(), held_out['year'].tolist(),
+                  held_out['mileage'].tolist(), held_out['power_output'].tolist(),
+                  held_out['fuel'].tolist())]
+    estimates = np.array([index.estimate(*args).estimated_price for args in inputs], dtype=float)
+    actual = held_out['price']
+
+    order = np.argsort(listings['vehicle_id'], kind='stable')
+    vehicle_ids, starts = np.unique(listings['vehicle_id'][order], return_index=True)
+    medians = dict(zip(vehicle_ids.tolist(), (np.median(prices) for prices in
+                                              np.split(listings['price'][order], starts[1:]))))
+    baseline = np.array([medians[vehicle_id] for vehicle_id in held_out['vehicle_id'].tolist()])
+
+    def errors(predicted: np.ndarray) -> dict:
+        error = np.abs(predicted - actual) / actual * 100
+        return {'mape': error.mean(), 'median': np.median(error),
+                'within_10': (error <= 10).mean() * 100}
+
+    # The most popular model, priced with its own held out listings
+    counts = np.bincount(listings['vehicle_id'])
+    largest = int(counts.argmax())
+    largest_inputs = [args for args, vehicle_id in zip(inputs, held_out['vehicle_id'].tolist())
+                      if vehicle_id == largest]
+
+    return {
+        'listings': len(index),
+        'build_s': build_s,
+        'update_s': update_s,
+        'estimate': errors(estimates),
+        'noise_floor': errors(fair_price),
+        'model_median': errors(baseline),
+        'latency': measure(index.estimate, inputs),
+        'largest_model': (int(counts[largest]),
+                          measure(index.estimate, largest_inputs)),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Accuracy and latency benchmark of the comparables price index.')
+    parser.add_argument('--listings', type=int, default=1_000_000)
+    parser.add_argument('--models', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--url', default=None,
+                        help='Also time build() and refresh() on this database')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.listings, args.models, args.queries)
+    print(f"\033[1;32;40m{results['listings']:,} listings indexed in {results['build_s']:.2f}s, "
+          f"1% changed in {results['update_s'] * 1000:.0f} ms\033[0m\n")
+
+    print(f"{'accuracy':<22}{'MAPE %':>10}{'median %':>10}{'<=10% %':>10}")
+    for name in ('estimate', 'model_median', 'noise_floor'):
+        stats = results[name]
+        print(f"{name:<22}{stats['mape']:>10.1f}{stats['median']:>10.1f}{stats['within_10']:>10.1f}")
+
+    count, largest = results['largest_model']
+    print(f"\n{'latency':<22}{'mean us':>10}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for name, stats in (('estimate', results['latency']),
+                        (f'model of {count:,}', largest)):
+        print(f"{name:<22}" + ''.join(f"{stats[key]:>10.1f}"
+                                      for key in ('mean', 'p50', 'p95', 'p99')))
+
+    if args.url:
+        engine = get_engine(args.url)
+        index = ComparablesIndex()
+        started = time.perf_counter()
+        built = index.build(engine)
+        build_s = time.perf_counter() - started
+        started = time.perf_counter()
+        changed = index.refresh(engine)
+        print(f'\nDatabase: {built:,} listings built in {build_s:.2f}s, '
+              f'refresh of {changed} changed listings in '
+              f'{(time.perf_counter() - started) * 1000:.0f} ms')
@@ -0,0 +1,304 @@
+from database_model import Base, Advertisement, AdvertisementDetails
+from database_session import get_engine, get_session
+from advertisement_search import search_statement, search_advertisements, SORT_ORDERS
+from advertisement_text_search import create_text_search, text_search_statement, search_text
+from create_fields.searchDTO import AdvertisementFilterDTO
+
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List, Tuple
+from sqlalchemy import text, Engine, Select
+
+BENCHMARK_PREFIX = 'Bench'
+BENCHMARK_MAKERS = 60
+BENCHMARK_VEHICLES = 2000
+BENCHMARK_USERS = 1000
+
+# Set based generation, 1M advertisements take seconds instead of minutes
+GENERATE_SQL = (
+    """
+    INSERT INTO categories (category_id, category_name, description)
+    SELECT id, name, name FROM (VALUES (1, 'cars'), (2, 'trucks'),
+                                       (3, 'electrocars'), (4, 'motorcycles')) AS c(id, name)
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO vehicles (maker, model, category_id)
+    SELECT :prefix || 'Maker' || (g % :makers), :prefix || 'Model' || g, 1 + g % 4
+    FROM generate_series(0, :vehicles - 1) AS g
+    """,
+    """
+    INSERT INTO addresses (address_hash, address, city, state, zip_code, country)
+    SELECT :prefix || 'Hash' || g, g || ' Benchmark Street', 'City' || (g % 50),
+           'State', lpad((g % 100000)::text, 5, '0'), 'Country' || (g % 5)
+    FROM generate_series(0, :users - 1) AS g
+    """,
+    """
+    INSERT INTO users (username, user_property, first_name, last_name, email_address,
+                       main_phone_number, gender, address_id)
+    SELECT :prefix || 'User' || a.g, 'r', 'Kate', 'Duffy', :prefix || a.g || '@example.com',
+           '07' || lpad(a.g::text, 9, '0'), 'female', a.address_id
+    FROM (SELECT address_id, substr(address_hash, length(:prefix) + 5)::int AS g
+          FROM addresses WHERE address_hash LIKE :prefix || 'Hash%') AS a
+    """,
+    """
+    INSERT INTO advertisements (discontinued, price, condition_type, fuel, power_output,
+                                gearbox, mileage, used, color, primary_registration,
+                                manufactured_date, engine_volume, average_consumption,
+                                vin_number, created_at, user_id, vehicle_id)
+    SELECT random() < 0.1,
+           500 + floor(random() * 99500)::int,
+           'Used',
+           (ARRAY['Petrol', 'Diesel', 'Electric', 'Hybrid'])[1 + floor(random() * 4)::int],
+           40 + floor(random() * 300)::int,
+           (ARRAY['Manual', 'Automatic'])[1 + floor(random() * 2)::int],
+           1 + floor(random() * 300000)::int,
+           true,
+           'Black',
+           d + interval '30 days',
+           d,
+           1.0 + floor(random() * 30) / 10,
+           4.0 + floor(random() * 80) / 10,
+           :prefix || lpad(g::text, 12, '0'),
+           timestamp '2024-01-01' + g * interval '30 seconds',
+           u.user_id,
+           v.vehicle_id
+    FROM (SELECT g, timestamp '2000-01-01' + floor(random() * 8760) * interval '1 day' AS d
+          FROM generate_series(0, :ads - 1) AS g) AS s
+    JOIN (SELECT vehicle_id, row_number() OVER (ORDER BY vehicle_id) - 1 AS n
+          FROM vehicles WHERE maker LIKE :prefix || 'Maker%') AS v ON v.n = s.g % :vehicles
+    JOIN (SELECT user_id, row_number() OVER (ORDER BY user_id) - 1 AS n
+          FROM users WHERE username LIKE :prefix || 'User%') AS u ON u.n = s.g % :users
+    """,
+    """
+    INSERT INTO advertisement_details (ad_id, description, comfort_equip, safety_equip)
+    SELECT ad_id,
+           CASE WHEN random() < 0.001 THEN 'Carbon ceramic brakes, track pack'
+                ELSE (ARRAY['Well maintained, full service history', 'One owner, garage kept',
+                            'Panoramic roof and leather seats', 'Minor scratches on the rear bumper',
+                            'Recently serviced, new tyres'])[1 + floor(random() * 5)::int] END,
+           (ARRAY['Heated seats, cruise control', 'Climate control, parking sensors',
+                  'Heated steering wheel, heated seats', 'Keyless entry',
+                  NULL])[1 + floor(random() * 5)::int],
+           (ARRAY['ABS, ESP, lane assist', 'Blind spot monitor',
+                  NULL])[1 + floor(random() * 3)::int]
+    FROM advertisements WHERE vin_number LIKE :prefix || '%'
+    """,
+)
+
+SCENARIOS: Dict[str, Dict] = {
+    'maker + model': {'maker': 'BenchMaker7', 'model': 'BenchModel7'},
+    'maker + price range': {'maker': 'BenchMaker7', 'price_min': 10000, 'price_max': 20000},
+    'category + price range': {'category_id': 2, 'price_min': 10000, 'price_max': 11000},
+    'price range': {'price_min': 20000, 'price_max': 20500},
+    'maker + years + gearbox': {'maker': 'BenchMaker3', 'year_min': 2010,
+                                'year_max': 2015, 'gearbox': 'Manual'},
+    'no filters': {},
+}
+
+# Full text queries with structured filters
+TEXT_SCENARIOS: Dict[str, Tuple[str, Dict]] = {
+    'rare phrase': ('"ceramic brakes"', {}),
+    'common words + maker': ('heated seats', {'maker': 'BenchMaker7'}),
+    'phrase + price range': ('"panoramic roof"', {'price_min': 20000, 'price_max': 25000}),
+}
+
+
+def prepare_dataset(engine: Engine, ads: int) -> None:
+    """
+    Creates the tables and generates the benchmark dataset, unless it
+    was generated before.
+
+    Args:
+        engine (Engine): PostgreSQL engine of a scratch database.
+        ads (int): The number of advertisements to generate.
+    """
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        existing = connection.execute(text(
+            "SELECT count(*) FROM advertisements WHERE vin_number LIKE :prefix || '%'"),
+            {'prefix': BENCHMARK_PREFIX}).scalar()
+        if existing:
+            print(f'Reusing {existing} generated advertisements')
+            return
+
+        started = time.perf_counter()
+        params = {'prefix': BENCHMARK_PREFIX, 'makers': BENCHMARK_MAKERS,
+                  'vehicles': BENCHMARK_VEHICLES, 'users': BENCHMARK_USERS, 'ads': ads}
+        for statement in GENERATE_SQL:
+            connection.execute(text(statement), params)
+        print(f'Generated {ads} advertisements in {time.perf_counter() - started:.1f}s')
+
+    started = time.perf_counter()
+    create_text_search(engine)
+    print(f'Full text search ready in {time.perf_counter() - started:.1f}s')
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text('VACUUM ANALYZE'))
+
+
+def plan_scans(plan: Dict) -> List[str]:
+    """
+    Lists the scan nodes of an EXPLAIN (FORMAT JSON) plan.
+
+    Args:
+        plan (Dict): A plan node.
+
+    Returns:
+        List[str]: '<node type> <index or table>' per scan node.
+    """
+    scans = []
+    if 'Scan' in plan['Node Type']:
+        scans.append(f"{plan['Node Type']} {plan.get('Index Name') or plan.get('Relation Name')}")
+    for child in plan.get('Plans', ()):
+        scans.extend(plan_scans(child))
+    return scans
+
+
+def explain(engine: Engine, statement: Select) -> Tuple[List[str], float]:
+    """
+    Runs EXPLAIN ANALYZE on the statement.
+
+    Args:
+        engine (Engine): The PostgreSQL engine.
+        statement (Select): The search statement.
+
+    Returns:
+        Tuple[List[str], float]: The scan nodes and the execution time in ms.
+    """
+    compiled = statement.compile(dialect=engine.dialect)
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql(
+            f'EXPLAIN (ANALYZE, FORMAT JSON) {compiled}', compiled.params).scalar()
+    plan = result[0] if isinstance(result, list) else json.loads(result)[0]
+    return plan_scans(plan['Plan']), plan['Execution Time']
+
+
+def time_search(url: str, filters: AdvertisementFilterDTO, repeat: int) -> Tuple[float, float]:
+    """
+    Times the first page of the search through the ORM.
+
+    Returns:
+        Tuple[float, float]: p50 and p95 in ms.
+    """
+    timings = []
+    with get_session(url) as session:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            search_advertisements(session, filters)
+            timings.append((time.perf_counter() - started) * 1000)
+            session.expunge_all()
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def time_text_search(url: str, query: str, filters: AdvertisementFilterDTO,
+                     repeat: int) -> Tuple[float, float]:
+    """
+    Times the ranked full text search and the same search with ILIKE
+    over the description and comfort equipment.
+
+    Returns:
+        Tuple[float, float]: p50 of the full text search and the ILIKE time in ms.
+    """
+    timings = []
+    with get_session(url) as session:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            search_text(session, query, filters)
+            timings.append((time.perf_counter() - started) * 1000)
+            session.expunge_all()
+
+        pattern = '%' + query.strip('"') + '%'
+        like_statement = (search_statement(filters, limit=21)
+                          .join(AdvertisementDetails, AdvertisementDetails.ad_id == Advertisement.ad_id)
+                          .where(AdvertisementDetails.description.ilike(pattern)
+                                 | AdvertisementDetails.comfort_equip.ilike(pattern)))
+        started = time.perf_counter()
+        session.scalars(like_statement).all()
+        like_ms = (time.perf_counter() - started) * 1000
+    return statistics.median(timings), like_ms
+
+
+def time_deep_pages(url: str, sort: str, pages: int) -> Tuple[float, float, float, str]:
+    """
+    Walks the listing page by page with cursors and times the first and
+    the last page, and the same last page read with OFFSET.
+
+    Returns:
+        Tuple[float, float, float, str]: First page, last page and OFFSET
+        page in ms, and the cursor of the last page.
+    """
+    filters = AdvertisementFilterDTO()
+    timings = []
+    cursor = None
+    with get_session(url) as session:
+        for _ in range(pages):
+            started = time.perf_counter()
+            _, next_cursor = search_advertisements(session, filters, sort=sort, cursor=cursor)
+            timings.append((time.perf_counter() - started) * 1000)
+            session.expunge_all()
+            last_cursor, cursor = cursor, next_cursor
+
+        offset_statement = search_statement(filters, limit=21, sort=sort).offset((pages - 1) * 20)
+        started = time.perf_counter()
+        session.scalars(offset_statement).all()
+        offset_ms = (time.perf_counter() - started) * 1000
+    return timings[0], timings[-1], offset_ms, last_cursor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='EXPLAIN verified benchmark of the advertisement search (PostgreSQL).')
+    parser.add_argument('--url', default=None,
+                        help='Connection string of a scratch PostgreSQL database, '
+                             'defaults to the .env database.')
+    parser.add_argument('--ads', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=500,
+                        help='Depth of the pagination benchmark')
+    args = parser.parse_args()
+
+    from config import settings
+    url = args.url or settings.DATABASE_URL_psycopg
+    engine = get_engine(url)
+    if engine.dialect.name != 'postgresql':
+        parser.error('The benchmark needs PostgreSQL')
+
+    prepare_dataset(engine, args.ads)
+
+    all_indexed = True
+    for name, values in SCENARIOS.items():
+        filters = AdvertisementFilterDTO(**values)
+        scans, execution_ms = explain(engine, search_statement(filters, limit=21))
+        p50, p95 = time_search(url, filters, args.repeat)
+        sequential = 'Seq Scan advertisements' in scans
+        all_indexed &= not sequential
+        print(f'{name:<26} explain {execution_ms:8.2f} ms   search p50 {p50:7.2f} ms '
+              f'p95 {p95:7.2f} ms   {"SEQ SCAN" if sequential else "indexed"}')
+        for scan in scans:
+            print(f'{"":<28}{scan}')
+
+    print('\nFull text search (ILIKE for comparison)')
+    for name, (query, values) in TEXT_SCENARIOS.items():
+        filters = AdvertisementFilterDTO(**values)
+        scans, execution_ms = explain(engine, text_search_statement('postgresql', query, filters))
+        p50, like_ms = time_text_search(url, query, filters, args.repeat)
+        all_indexed &= 'Seq Scan advertisements' not in scans
+        print(f'{name:<26} explain {execution_ms:8.2f} ms   search p50 {p50:7.2f} ms   '
+              f'ILIKE {like_ms:8.2f} ms   {", ".join(scans)}')
+
+    print(f'\nKeyset pagination, page 1 vs page {args.pages} (OFFSET for comparison)')
+    for sort in SORT_ORDERS:
+        first_ms, last_ms, offset_ms, cursor = time_deep_pages(url, sort, args.pages)
+        scans, _ = explain(engine, search_statement(
+            AdvertisementFilterDTO(), limit=21, sort=sort, cursor=cursor))
+        all_indexed &= 'Seq Scan advertisements' not in scans
+        print(f'{sort:<26} page 1 {first_ms:7.2f} ms   page {args.pages} {last_ms:7.2f} ms   '
+              f'OFFSET {offset_ms:8.2f} ms   {", ".join(scans)}')
+
+    if not all_indexed:
+        raise SystemExit('\nSome scenarios scan the advertisements table sequentially')
+    print('\nAll scenarios use index scans')
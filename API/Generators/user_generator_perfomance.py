@@ -3,11 +3,11 @@ from API.Validators.user_input.phone_number_valid import phone_number_validator_
 from API.Validators.user_input.username_valid import username_validate_func_perf
 from API.Validators.user_input.name_valid import name_validator_func_perf
 from API.Validators.user_input.gender_valid import gender_validator_func_perf
+from API.Validators.user_input.batch_valid import validate_user_frame
 
 import random
 import matplotlib.pyplot as plt
 import numpy as np
-from collections import Counter
 import pandas as pd
 from faker import Faker
 fake = Faker('en_GB')  # Great Britain region related fake data.
@@ -39,41 +39,15 @@ class UserValidationPerformance:
             self.result, self.number_of_iterations = self.test()
 
     def test(self):
-        counter_dict = Counter()
-        count = 0
-        for _, row in self.df.iterrows():
-            if self.validators['email'](row['email_address']):
-                counter_dict.update({'email_valid': 1})
-            else:
-                counter_dict.update({'email_invalid': 1})
-
-            if self.validators['main_phone_number'](row['main_phone_number']):
-                counter_dict.update({'phone_number_valid': 1})
-            else:
-                counter_dict.update({'phone_number_invalid': 1})
-
-            if self.validators['username'](row['username']):
-                counter_dict.update({'username_valid': 1})
-            else:
-                counter_dict.update({'username_invalid': 1})
-
-            if self.validators['first_last_name'](row['first_name']):
-                counter_dict.update({'first_name_valid': 1})
-            else:
-                counter_dict.update({'first_name_invalid': 1})
-
-            if self.validators['first_last_name'](row['last_name']):
-                counter_dict.update({'last_name_valid': 1})
-            else:
-                counter_dict.update({'last_name_invalid': 1})
-
-            if self.validators['gender'](row['gender']):
-                counter_dict.update({'gender_valid': 1})
-            else:
-                counter_dict.update({'gender_invalid': 1})
-            count += 1
-
-        return counter_dict, count
+        """
+        Validates all users column by column and counts
+        valid/invalid values per validator.
+
+        Returns:
+            Tuple[Counter, int]: The counters and the number of validated users.
+        """
+        _, counter_dict = validate_user_frame(self.df)
+        return counter_dict, len(self.df)
 
     def generate_data(self, number):
         field_names = ['username', 'first_name', 'last_name', 'email_address',
@@ -144,5 +118,6 @@ class UserValidationPerformance:
         plt.show()
 
 
-new = UserValidationPerformance()
-new.visual_results()
\ No newline at end of file
+if __name__ == '__main__':
+    new = UserValidationPerformance()
+    new.visual_results()
@@ -0,0 +1,105 @@
+from API.Validators.user_input.email_valid import email_validator_func_perf
+from API.Validators.user_input.username_valid import username_validate_func_perf
+from API.Validators.user_input.name_valid import name_validator_func_perf
+from API.Validators.user_input.gender_valid import gender_validator_func_perf
+
+import re
+import timeit
+from string import punctuation, digits
+
+
+# Previous implementations of the *_perf validators, kept as the baseline.
+def legacy_email(address):
+    if not address or not isinstance(address, str):
+        return False
+    return bool(re.search(r'[\w.-]+@[\w.-]+.\w+', address))
+
+
+def legacy_username(username):
+    if len(username) < 6:
+        return False
+    if len(username) > 20:
+        return False
+    if any(p in username for p in punctuation):
+        return False
+    return True
+
+
+def legacy_name(name):
+    if not isinstance(name, str):
+        return False
+    if not name:
+        return False
+    if len(name) > 20:
+        return False
+    if any(p in name for p in punctuation):
+        return False
+    if any(p in name for p in digits):
+        return False
+    return True
+
+
+def legacy_gender(gender):
+    if not isinstance(gender, str):
+        return False
+    if not gender:
+        return False
+    if gender not in ['male', 'female', 'other', 'unknown']:
+        return False
+    return True
+
+
+CASES = {
+    'email': (legacy_email, email_validator_func_perf,
+              ['stephanie82@example.org', 'not-an-email', 'j.smith@mail.co.uk']),
+    'username': (legacy_username, username_validate_func_perf,
+                 ['jenniferwilliams', 'qharris', 'bad.user!']),
+    'name': (legacy_name, name_validator_func_perf,
+             ['Christopherson', 'Kate', 'O\'Neil', 'R2D2']),
+    'gender': (legacy_gender, gender_validator_func_perf,
+               ['male', 'unknown', 'robot']),
+}
+
+
+def per_call_ns(func, values, number: int) -> float:
+    """
+    Measures the average cost of a single validator call.
+
+    Args:
+        func (Callable): The validator.
+        values (list): The values validated in every round.
+        number (int): The number of rounds.
+
+    Returns:
+        float: Best-of-five nanoseconds per call.
+    """
+    def run():
+        for value in values:
+            func(value)
+
+    best = min(timeit.repeat(run, number=number, repeat=5))
+    return best / (number * len(values)) * 1e9
+
+
+def run_benchmark(number: int = 20_000) -> dict:
+    """
+    Compares the per-call cost of the legacy and current validators.
+
+    Args:
+        number (int): The number of rounds per validator.
+
+    Returns:
+        dict: validator name -> (legacy ns/call, current ns/call).
+    """
+    results = {}
+    for name, (legacy, current, values) in CASES.items():
+        assert [legacy(v) for v in values] == [current(v) for v in values], name
+        results[name] = (per_call_ns(legacy, values, number),
+                         per_call_ns(current, values, number))
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'validator':<10}{'legacy ns/call':>16}{'current ns/call':>17}{'speedup':>10}")
+    for validator, (before, after) in run_benchmark().items():
+        print(f"{validator:<10}{before:>16.0f}{after:>17.0f}{before / after:>9.1f}x")
@@ -1,4 +1,6 @@
 from typing import Callable, Optional
+from API.Validators.errors import FieldValidationError
+from API.Validators.address_input.validation_core import validate_address
 
 
 def address_validator_decorator(func: Callable[[str], str]) -> Callable[[str], str]:
@@ -57,18 +59,13 @@ def address_validator_func(address: str, echo: Optional[bool] = False) -> str:
     """
     while True:
         try:
-            if not isinstance(address, str):
-                raise ValueError
-            if not address:
-                raise ValueError
-            if len(address) > 255:
-                raise ValueError
+            validate_address(address)
 
             if echo:
                 print("'\n\033[1;32;40mAddress has been saved, validation is successful\033[0m\n'")
 
             return address
-        except (ValueError, AttributeError) as error:
+        except FieldValidationError as error:
             print("\n\033[1;31;40mError in address validation, please try again\033[0m\n")
             print("\n\033[1;31;40mError: ", error, "\033[0m\n")
             address = input('Please enter valid address: ')
@@ -0,0 +1,110 @@
+from typing import Dict
+
+import pandas as pd
+
+from API.Validators.user_input.batch_valid import _string_mask
+from API.Validators.address_input.validation_core import (
+    ADDRESS_MAX_LENGTH, STATE_MAX_LENGTH, ZIP_CODE_LENGTH)
+
+# Limits of the city and country columns of the addresses table
+PLACE_MAX_LENGTH = 40
+
+
+def _bounded_string_mask(column: pd.Series, max_length: int) -> pd.Series:
+    """
+    Returns a mask of the non-empty strings not longer than max_length.
+
+    Args:
+        column (pd.Series): The column to be checked.
+        max_length (int): The maximum length of a value.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid values.
+    """
+    valid = _string_mask(column)
+    ok = column[valid].str.len().le(max_length)
+    return valid & ok.reindex(column.index, fill_value=False)
+
+
+def validate_address_column(column: pd.Series) -> pd.Series:
+    """
+    Validates a whole column of street addresses,
+    same rules as address_validator_func.
+
+    Args:
+        column (pd.Series): The addresses to be validated.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid addresses.
+    """
+    return _bounded_string_mask(column, ADDRESS_MAX_LENGTH)
+
+
+def validate_state_column(column: pd.Series) -> pd.Series:
+    """
+    Validates a whole column of states, same rules as state_validator_func.
+
+    Args:
+        column (pd.Series): The states to be validated.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid states.
+    """
+    return _bounded_string_mask(column, STATE_MAX_LENGTH)
+
+
+def validate_zip_code_column(column: pd.Series) -> pd.Series:
+    """
+    Validates a whole column of zip codes, same rules as zip_code_validator_func.
+
+    Args:
+        column (pd.Series): The zip codes to be validated.
+
+    Returns:
+        pd.Series: Boolean mask, True for 5-digit zip codes.
+    """
+    valid = _string_mask(column)
+    strings = column[valid]
+    ok = strings.str.len().eq(ZIP_CODE_LENGTH) & strings.str.isdigit()
+    return valid & ok.reindex(column.index, fill_value=False)
+
+
+def validate_place_column(column: pd.Series) -> pd.Series:
+    """
+    Validates a whole column of cities or countries against the
+    limits of the addresses table.
+
+    Args:
+        column (pd.Series): The cities or countries to be validated.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid values.
+    """
+    return _bounded_string_mask(column, PLACE_MAX_LENGTH)
+
+
+ADDRESS_COLUMN_VALIDATORS = {
+    'address': validate_address_column,
+    'city': validate_place_column,
+    'state': validate_state_column,
+    'zip_code': validate_zip_code_column,
+    'country': validate_place_column,
+}
+
+
+def validate_address_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validates all address columns of the data frame at once.
+
+    Args:
+        frame (pd.DataFrame): Addresses with the columns of ADDRESS_COLUMN_VALIDATORS.
+            Missing columns are skipped.
+
+    Returns:
+        pd.DataFrame: Boolean masks per column.
+    """
+    masks: Dict[str, pd.Series] = {}
+    for column, validator in ADDRESS_COLUMN_VALIDATORS.items():
+        if column in frame.columns:
+            masks[column] = validator(frame[column]).astype(bool)
+    return pd.DataFrame(masks, index=frame.index)
@@ -1,4 +1,6 @@
 from typing import Callable, Optional
+from API.Validators.errors import FieldValidationError
+from API.Validators.address_input.validation_core import validate_state
 
 
 def state_validator_decorator(
@@ -58,18 +60,13 @@ def state_validator_func(state: str, echo: Optional[bool] = False) -> str:
     """
     while True:
         try:
-            if not isinstance(state, str):
-                raise ValueError("State must be a string")
-            if not state:
-                raise ValueError("State cannot be empty")
-            if len(state) > 40:
-                raise ValueError("State cannot be longer than 40 characters")
+            validate_state(state)
 
             if echo:
                 print("\n\033[1;32;40mState has been saved, validation is successful\033[0m\n")
 
             return state
-        except ValueError as err:
+        except FieldValidationError as err:
             print('\n\033[1;31;40mError: ', err, '\033[0m\n')
             print("\n\033[1;31;40mPlease enter your state again\033[0m\n")
             state = input('Please enter your state again: ')
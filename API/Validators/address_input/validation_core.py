@@ -0,0 +1,61 @@
+from API.Validators.errors import FieldValidationError
+from API.Validators.user_input.validation_core import require_string
+
+# Shared by the interactive (*_validator_func), batch and validate_* validators.
+ADDRESS_MAX_LENGTH = 255
+STATE_MAX_LENGTH = 40
+ZIP_CODE_LENGTH = 5
+
+
+def validate_address(address: str, field: str = 'address') -> str:
+    """
+    Validates the street address without any user interaction.
+    Args:
+        address (str): The address to be validated.
+        field (str): The name of the validated field.
+    Returns:
+        str: The valid address.
+    Raises:
+        FieldValidationError: If the address is invalid.
+    """
+    require_string(address, field, 'Address')
+    if len(address) > ADDRESS_MAX_LENGTH:
+        raise FieldValidationError(
+            field, 'too_long', f"Address cannot be longer than {ADDRESS_MAX_LENGTH} characters")
+    return address
+
+
+def validate_state(state: str, field: str = 'state') -> str:
+    """
+    Validates the state without any user interaction.
+    Args:
+        state (str): The state to be validated.
+        field (str): The name of the validated field.
+    Returns:
+        str: The valid state.
+    Raises:
+        FieldValidationError: If the state is invalid.
+    """
+    require_string(state, field, 'State')
+    if len(state) > STATE_MAX_LENGTH:
+        raise FieldValidationError(
+            field, 'too_long', f"State cannot be longer than {STATE_MAX_LENGTH} characters")
+    return state
+
+
+def validate_zip_code(zip_code: str, field: str = 'zip_code') -> str:
+    """
+    Validates the zip code without any user interaction.
+    Args:
+        zip_code (str): The zip code to be validated.
+        field (str): The name of the validated field.
+    Returns:
+        str: The valid zip code.
+    Raises:
+        FieldValidationError: If the zip code is invalid.
+    """
+    require_string(zip_code, field, 'Zip code')
+    if len(zip_code) != ZIP_CODE_LENGTH or not zip_code.isdigit():
+        raise FieldValidationError(
+            field, 'format', f"Zip code must be a {ZIP_CODE_LENGTH}-digit number")
+    return zip_code
@@ -1,4 +1,6 @@
 from typing import Callable, Optional
+from API.Validators.errors import FieldValidationError
+from API.Validators.address_input.validation_core import validate_zip_code
 
 
 def zip_code_validator_decorator(
@@ -54,18 +56,13 @@ def zip_code_validator_func(zip_code: str, echo: Optional[bool] = False) -> str:
     """
     while True:
         try:
-            if not isinstance(zip_code, str):
-                raise ValueError("Zip code must be a string")
-            if not zip_code:
-                raise ValueError("Zip code cannot be empty")
-            if len(zip_code) != 5 or not zip_code.isdigit():
-                raise ValueError("Zip code must be a 5-digit number")
+            validate_zip_code(zip_code)
 
             if echo:
                 print("\n\033[1;32;40mZip code has been saved, validation is successful\033[0m\n")
 
             return zip_code
-        except ValueError as error:
+        except FieldValidationError as error:
             print("\n\033[1;31;40mError in zip code validation, please try again\033[0m\n")
             print("\n\033[1;31;40mError: ", error, "\033[0m\n")
             zip_code = input('Please enter valid zip code: ')
@@ -0,0 +1,54 @@
+from typing import Dict, List
+
+from pydantic import ValidationError
+
+
+class FieldValidationError(ValueError):
+    """Raised by the validate_* functions when a field value is invalid.
+
+    A ValueError, so pydantic field validators report it as a regular
+    validation error of the field.
+
+    Attributes:
+        field: (str): The name of the validated field.
+        code: (str): Machine readable reason, e.g. 'empty', 'too_long', 'format'.
+        message: (str): Human readable description of the problem.
+    """
+
+    def __init__(self, field: str, code: str, message: str) -> None:
+        super().__init__(message)
+        self.field = field
+        self.code = code
+        self.message = message
+
+    def as_dict(self) -> Dict[str, str]:
+        """
+        Returns the error as a dictionary.
+
+        Returns:
+            Dict: field, code and message of the error.
+        """
+        return {'field': self.field, 'code': self.code, 'message': self.message}
+
+
+def collect_field_errors(error: ValidationError) -> List[Dict[str, str]]:
+    """
+    Converts the errors of a failed DTO validation to field errors,
+    one per invalid field.
+
+    Args:
+        error (ValidationError): The error raised by model_validate.
+
+    Returns:
+        List[Dict]: field, code and message of every error. Errors raised
+        by pydantic itself (e.g. missing fields) use the pydantic error type as code.
+    """
+    errors = []
+    for details in error.errors():
+        cause = details.get('ctx', {}).get('error')
+        field = '.'.join(str(location) for location in details['loc'])
+        if isinstance(cause, FieldValidationError):
+            errors.append({'field': field, 'code': cause.code, 'message': cause.message})
+        else:
+            errors.append({'field': field, 'code': details['type'], 'message': details['msg']})
+    return errors
@@ -0,0 +1,178 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Tuple
+import re
+
+import pandas as pd
+
+from API.Validators.user_input.phone_number_valid import is_valid_number, DEFAULT_REGION
+from API.Validators.user_input.validation_core import (
+    EMAIL_REGEX, PUNCTUATION, DIGITS, GENDERS,
+    USERNAME_MIN_LENGTH, USERNAME_MAX_LENGTH, NAME_MAX_LENGTH)
+
+# Same rules as the *_validator_func_perf functions, applied to whole columns.
+PUNCTUATION_CLASS = '[' + re.escape(''.join(sorted(PUNCTUATION))) + ']'
+PUNCTUATION_OR_DIGIT_CLASS = '[' + re.escape(''.join(sorted(PUNCTUATION | DIGITS))) + ']'
+
+# Below this number of distinct phone numbers a process pool costs more than it saves
+PARALLEL_PHONE_THRESHOLD = 50_000
+
+# DataFrame column -> result key, mirrors UserValidationPerformance counters
+COLUMN_KEYS = {
+    'email_address': 'email',
+    'main_phone_number': 'phone_number',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'gender': 'gender',
+}
+
+
+def _string_mask(column: pd.Series) -> pd.Series:
+    """
+    Returns a mask of the values which are non-empty strings.
+
+    Args:
+        column (pd.Series): The column to be checked.
+
+    Returns:
+        pd.Series: Boolean mask, True for non-empty strings.
+    """
+    is_string = column.map(type).eq(str)
+    return is_string & column.where(is_string, '').str.len().gt(0)
+
+
+def validate_email_column(column: pd.Series) -> pd.Series:
+    """
+    Validates a whole column of email addresses.
+
+    Args:
+        column (pd.Series): The email addresses to be validated.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid email addresses.
+    """
+    valid = _string_mask(column)
+    matched = column[valid].str.contains(EMAIL_REGEX, regex=True)
+    return valid & matched.reindex(column.index, fill_value=False)
+
+
+def validate_username_column(column: pd.Series) -> pd.Series:
+    """
+    Validates a whole column of usernames.
+
+    Args:
+        column (pd.Series): The usernames to be validated.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid usernames.
+    """
+    valid = _string_mask(column)
+    strings = column[valid]
+    lengths = strings.str.len()
+    ok = lengths.between(USERNAME_MIN_LENGTH, USERNAME_MAX_LENGTH) & ~strings.str.contains(PUNCTUATION_CLASS, regex=True)
+    return valid & ok.reindex(column.index, fill_value=False)
+
+
+def validate_name_column(column: pd.Series) -> pd.Series:
+    """
+    Validates a whole column of first or last names.
+
+    Args:
+        column (pd.Series): The names to be validated.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid names.
+    """
+    valid = _string_mask(column)
+    strings = column[valid]
+    ok = strings.str.len().le(NAME_MAX_LENGTH) & ~strings.str.contains(
+        PUNCTUATION_OR_DIGIT_CLASS, regex=True)
+    return valid & ok.reindex(column.index, fill_value=False)
+
+
+def validate_gender_column(column: pd.Series) -> pd.Series:
+    """
+    Validates a whole column of genders.
+
+    Args:
+        column (pd.Series): The genders to be validated.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid genders.
+    """
+    return column.isin(list(GENDERS))
+
+
+def validate_phone_number_column(column: pd.Series, workers: int = 1,
+                                 region: str = DEFAULT_REGION) -> pd.Series:
+    """
+    Validates a whole column of phone numbers. Every distinct
+    number is parsed once and the result is mapped back onto the column.
+
+    Args:
+        column (pd.Series): The phone numbers to be validated.
+        workers (int): Number of processes parsing the distinct numbers.
+            Parsing is CPU bound, so large columns benefit from workers > 1.
+        region (str): The region used for numbers without a country code.
+
+    Returns:
+        pd.Series: Boolean mask, True for valid phone numbers.
+    """
+    valid = _string_mask(column)
+    strings = column[valid]
+    unique = strings.unique()
+    parse = partial(is_valid_number, region=region)
+
+    if workers > 1 and len(unique) > PARALLEL_PHONE_THRESHOLD:
+        chunk_size = max(1, len(unique) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(parse, unique, chunksize=chunk_size))
+    else:
+        results = [parse(number) for number in unique]
+
+    parsed = dict(zip(unique, results))
+    ok = strings.map(parsed).astype(bool)
+    return valid & ok.reindex(column.index, fill_value=False)
+
+
+COLUMN_VALIDATORS = {
+    'email_address': validate_email_column,
+    'main_phone_number': validate_phone_number_column,
+    'username': validate_username_column,
+    'first_name': validate_name_column,
+    'last_name': validate_name_column,
+    'gender': validate_gender_column,
+}
+
+
+def validate_user_frame(frame: pd.DataFrame, workers: int = 1) -> Tuple[pd.DataFrame, Counter]:
+    """
+    Validates all user columns of the data frame at once.
+
+    Args:
+        frame (pd.DataFrame): Users with the columns of COLUMN_VALIDATORS.
+            Missing columns are skipped.
+        workers (int): Number of processes used for phone number parsing.
+
+    Returns:
+        Tuple[pd.DataFrame, Counter]: Boolean masks per column and
+        the counts of valid/invalid values as '<key>_valid' / '<key>_invalid'.
+    """
+    masks: Dict[str, pd.Series] = {}
+    counts = Counter()
+
+    for column, validator in COLUMN_VALIDATORS.items():
+        if column not in frame.columns:
+            continue
+        if validator is validate_phone_number_column:
+            validator = partial(validator, workers=workers)
+        mask = validator(frame[column]).astype(bool)
+        masks[column] = mask
+        key = COLUMN_KEYS[column]
+        valid = int(mask.sum())
+        counts[f'{key}_valid'] = valid
+        counts[f'{key}_invalid'] = len(mask) - valid
+
+    return pd.DataFrame(masks, index=frame.index), counts
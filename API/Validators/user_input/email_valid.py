@@ -1,5 +1,6 @@
-import re
 from typing import Callable, Optional
+from API.Validators.user_input import validation_core
+from API.Validators.errors import FieldValidationError
 
 
 class InvalidEmailError(Exception):
@@ -15,8 +16,7 @@ def is_valid_email(email: str) -> bool:
        Returns:
            bool: True if the email address is valid, False otherwise.
        """
-    match = re.search(r'[\w.-]+@[\w.-]+.\w+', email)
-    return bool(match)
+    return validation_core.is_valid_email(email)
 
 
 def email_validator_decorator(
@@ -75,16 +75,13 @@ def email_validator_func(address: str, echo: Optional[bool] = False) -> str:
         """
     while True:
         try:
-            if not address or not isinstance(address, str):
-                raise ValueError
-            if not is_valid_email(address):
-                raise InvalidEmailError
+            validation_core.validate_email(address)
 
             if echo:
                 print('\n\033[1;32;40mEmail address has been saved, validation is successful\033[0m\n')
 
             return address
-        except (ValueError, AttributeError, InvalidEmailError) as error:
+        except FieldValidationError as error:
             print("\n\033[1;31;40mError in email address validation, please try again\033[0m\n")
             print("\n\033[1;31;40mError: ", error, "\033[0m\n")
 
@@ -1,4 +1,6 @@
 from typing import Callable, Optional
+from API.Validators.user_input.validation_core import GENDERS, is_valid_gender, validate_gender
+from API.Validators.errors import FieldValidationError
 
 
 def gender_validator_decorator(func: Callable[[str], str]) -> Callable[[str], str]:
@@ -30,7 +32,7 @@ def gender_validator_decorator(func: Callable[[str], str]) -> Callable[[str], st
                     raise ValueError
                 if not gender:
                     raise ValueError
-                if gender not in ['male', 'female', 'other', 'unknown']:
+                if gender not in GENDERS:
                     raise ValueError
                 return func(gender)
             except (ValueError, AttributeError):
@@ -57,16 +59,11 @@ def gender_validator_func(gender: str, echo: Optional[bool] = False) -> str:
     """
     while True:
         try:
-            if not isinstance(gender, str):
-                raise ValueError
-            if not gender:
-                raise ValueError
-            if gender not in ['male', 'female', 'other', 'unknown']:
-                raise ValueError
+            validate_gender(gender)
             if echo:
                 print("\n\033[1;32;40mGender has been saved, validation is successful\033[0m\n")
             return gender
-        except (ValueError, AttributeError) as error:
+        except FieldValidationError as error:
             print("\n\033[1;31;40mError in gender validation, please try again\033[0m\n")
             print("\n\033[1;31;40mError: ", error, "\033[0m\n")
             print("Choose from: male, female, other, unknown")
@@ -75,10 +72,4 @@ def gender_validator_func(gender: str, echo: Optional[bool] = False) -> str:
 
 def gender_validator_func_perf(gender: str) -> bool:
     # TODO: Docstring
-    if not isinstance(gender, str):
-        return False
-    if not gender:
-        return False
-    if gender not in ['male', 'female', 'other', 'unknown']:
-        return False
-    return True
\ No newline at end of file
+    return is_valid_gender(gender)
\ No newline at end of file
@@ -1,5 +1,8 @@
 from typing import Callable, Optional
 from string import punctuation, digits
+from API.Validators.errors import FieldValidationError
+from API.Validators.user_input.validation_core import (
+    is_valid_name, validate_name, NAME_MAX_LENGTH)
 
 
 def name_validator_decorator(func: Callable[[str], str]) -> Callable[[str], str]:
@@ -32,8 +35,8 @@ def name_validator_decorator(func: Callable[[str], str]) -> Callable[[str], str]
                     raise ValueError("Name must be a string")
                 if not name:
                     raise ValueError("Name cannot be empty")
-                if len(name) > 40:
-                    raise ValueError("Name must be maximum 40 characters")
+                if len(name) > NAME_MAX_LENGTH:
+                    raise ValueError(f"Name must be maximum {NAME_MAX_LENGTH} characters")
                 return func(name)
             except ValueError as err:
                 print(err)
@@ -94,22 +97,13 @@ def name_validator_func(name: str, echo: Optional[bool] = False) -> str:
     """
     while True:
         try:
-            if not isinstance(name, str):
-                raise ValueError("Name must be a string")
-            if not name:
-                raise ValueError("Name cannot be empty")
-            if len(name) > 20:
-                raise ValueError("Name must be maximum 20 characters")
-            if any(p in name for p in punctuation):
-                raise ValueError("Name must not contain punctuation")
-            if any(p in name for p in digits):
-                raise ValueError("Name must not contain digits")
+            validate_name(name)
 
             if echo:
                 print('\n\033[1;32;40mName has been saved, validation is successful\033[0m\n')
 
             return name
-        except ValueError as error:
+        except FieldValidationError as error:
             print("\n\033[1;31;40mError in first/last name validation, please try again\033[0m\n")
             print("\n\033[1;31;40mError: ", error, "\033[0m\n")
 
@@ -117,14 +111,4 @@ def name_validator_func(name: str, echo: Optional[bool] = False) -> str:
 
 def name_validator_func_perf(name: str) -> bool:
     # TODO: Docstring
-    if not isinstance(name, str):
-        return False
-    if not name:
-        return False
-    if len(name) > 20:
-        return False
-    if any(p in name for p in punctuation):
-        return False
-    if any(p in name for p in digits):
-        return False
-    return True
+    return is_valid_name(name)
@@ -1,21 +1,106 @@
+from functools import lru_cache
 from typing import Callable, Optional
 import phonenumbers
+from API.Validators.errors import FieldValidationError
+from API.Validators.user_input.validation_core import require_string
+
+DEFAULT_REGION = "GB"
+DEFAULT_CACHE_SIZE = 65536
+
+# Formatting characters ignored by phonenumbers, stripped so that
+# "020 7946 0018" and "020-7946-0018" share one cache entry.
+_SEPARATORS = str.maketrans('', '', ' -.()/\t')
+
 
 class InvalidNumberError(Exception):
     """Custom exception raised when a phone number is invalid"""
     pass
 
 
-def is_valid_number(number: str) -> bool:
+def normalize_number(number: str) -> str:
+    """
+        Removes whitespace and formatting characters from the phone number.
+        Args:
+            number (str): The input phone number as a string.
+        Returns:
+            str: The normalised phone number used as the cache key.
+        """
+    return number.strip().translate(_SEPARATORS)
+
+
+def _parse_possible_number(number: str, region: str) -> bool:
+    """
+        Parses the normalised phone number, not cached.
+        Args:
+            number (str): The normalised phone number.
+            region (str): The region used for numbers without a country code.
+        Returns:
+            bool: True if the number is a possible phone number, False otherwise.
+        """
+    try:
+        p_number = phonenumbers.parse(number, region=region)
+    except phonenumbers.NumberParseException:
+        return False
+    return phonenumbers.is_possible_number(p_number)
+
+
+_cached_parse = lru_cache(maxsize=DEFAULT_CACHE_SIZE)(_parse_possible_number)
+
+
+def configure_phone_cache(maxsize: Optional[int] = DEFAULT_CACHE_SIZE) -> None:
+    """
+        Replaces the phone number cache with a new one of the given size.
+        Args:
+            maxsize (int, optional): Maximum number of cached numbers,
+                0 disables caching, None makes the cache unbounded.
+        """
+    global _cached_parse
+    _cached_parse = lru_cache(maxsize=maxsize)(_parse_possible_number)
+
+
+def phone_cache_info():
+    """
+        Returns the statistics of the phone number cache.
+        Returns:
+            CacheInfo: hits, misses, maxsize and currsize of the cache.
+        """
+    return _cached_parse.cache_info()
+
+
+def clear_phone_cache() -> None:
+    """Empties the phone number cache and resets its statistics."""
+    _cached_parse.cache_clear()
+
+
+def is_valid_number(number: str, region: str = DEFAULT_REGION) -> bool:
     """
         Check if the given number is a valid phone number.
+        Results are cached by the normalised number and region.
         Args:
             number (str): The input phone number as a string.
+            region (str): The region used for numbers without a
+                country code. Defaults to "GB".
         Returns:
             bool: True if the number is a valid phone number, False otherwise.
         """
-    p_number = phonenumbers.parse(number, region="GB")
-    return phonenumbers.is_possible_number(p_number)
+    return _cached_parse(normalize_number(number), region)
+
+
+def validate_phone_number(number: str, field: str = 'main_phone_number') -> str:
+    """
+        Validates the phone number without any user interaction.
+        Args:
+            number (str): The phone number to be validated.
+            field (str): The name of the validated field.
+        Returns:
+            str: The valid phone number.
+        Raises:
+            FieldValidationError: If the phone number is invalid.
+        """
+    require_string(number, field, 'Phone number')
+    if not is_valid_number(number):
+        raise FieldValidationError(field, 'format', "Phone number is not valid")
+    return number
 
 
 def phone_number_validator_decorator(
@@ -74,16 +159,13 @@ def phone_number_validator_func(number: str, echo: Optional[bool] = False) -> st
     """
     while True:
         try:
-            if not number or not isinstance(number, str):
-                raise ValueError
-            if not is_valid_number(number):
-                raise InvalidNumberError
+            validate_phone_number(number)
 
             if echo:
                 print("\n\033[1;32;40mPhone number has been saved, validation is successful\033[0m\n")
 
             return number
-        except (ValueError, AttributeError, InvalidNumberError) as error:
+        except FieldValidationError as error:
             print("\n\033[1;31;40mError in phone number validation, please try again\033[0m\n")
             print("\n\033[1;31;40mError: ", error, "\033[0m\n")
 
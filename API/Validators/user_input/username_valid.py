@@ -1,5 +1,8 @@
 from typing import Callable, Optional
-from string import punctuation
+from API.Validators.errors import FieldValidationError
+from API.Validators.user_input.validation_core import (
+    has_punctuation, is_valid_username, validate_username,
+    USERNAME_MIN_LENGTH, USERNAME_MAX_LENGTH)
 
 
 def username_validate_decorator(func: Callable[[str], str]) -> Callable[[str], str]:
@@ -29,11 +32,11 @@ def username_validate_decorator(func: Callable[[str], str]) -> Callable[[str], s
         """
         while True:
             try:
-                if len(username) < 6:
-                    raise ValueError("Username must be at least 6 characters")
-                if len(username) > 20:
-                    raise ValueError("Username must be maximum 20 characters")
-                if any(p in username for p in punctuation):
+                if len(username) < USERNAME_MIN_LENGTH:
+                    raise ValueError(f"Username must be at least {USERNAME_MIN_LENGTH} characters")
+                if len(username) > USERNAME_MAX_LENGTH:
+                    raise ValueError(f"Username must be maximum {USERNAME_MAX_LENGTH} characters")
+                if has_punctuation(username):
                     raise ValueError("Username must not contain punctuation")
                 return func(username)
             except ValueError:
@@ -60,18 +63,13 @@ def username_validate_func(username: str, echo: Optional[bool] = False) -> str:
         """
     while True:
         try:
-            if len(username) < 6:
-                raise ValueError("Username must be at least 6 characters")
-            if len(username) > 20:
-                raise ValueError("Username must be maximum 20 characters")
-            if any(p in username for p in punctuation):
-                raise ValueError("Username must not contain punctuation")
+            validate_username(username)
 
             if echo:
                 print("\n\033[1;32;40mUsername has been saved, validation is successful\033[0m\n")
 
             return username
-        except ValueError as error:
+        except FieldValidationError as error:
             print("\n\033[1;31;40mError in username validation, please try again\033[0m\n")
             print("\n\033[1;31;40mError: ", error, "\033[0m\n")
 
@@ -79,10 +77,4 @@ def username_validate_func(username: str, echo: Optional[bool] = False) -> str:
 
 def username_validate_func_perf(username: str):
     # TODO: Docstring
-    if len(username) < 6:
-        return False
-    if len(username) > 20:
-        return False
-    if any(p in username for p in punctuation):
-        return False
-    return True
\ No newline at end of file
+    return is_valid_username(username)
\ No newline at end of file
@@ -0,0 +1,179 @@
+import re
+from string import punctuation, digits
+
+from API.Validators.errors import FieldValidationError
+
+# Compiled once at import time and shared by the decorator, interactive
+# (*_validator_func), performance (*_perf), batch and validate_* validators.
+EMAIL_REGEX = re.compile(r'[\w.-]+@[\w.-]+.\w+')
+
+PUNCTUATION = frozenset(punctuation)
+DIGITS = frozenset(digits)
+GENDERS = frozenset(('male', 'female', 'other', 'unknown'))
+
+USERNAME_MIN_LENGTH = 6
+USERNAME_MAX_LENGTH = 20
+NAME_MAX_LENGTH = 20
+
+
+def has_punctuation(value: str) -> bool:
+    """
+    Check if the string contains any punctuation character.
+    Args:
+        value (str): The string to be checked.
+    Returns:
+        bool: True if a punctuation character is found, False otherwise.
+    """
+    return not PUNCTUATION.isdisjoint(value)
+
+
+def has_digits(value: str) -> bool:
+    """
+    Check if the string contains any digit.
+    Args:
+        value (str): The string to be checked.
+    Returns:
+        bool: True if a digit is found, False otherwise.
+    """
+    return not DIGITS.isdisjoint(value)
+
+
+def is_valid_email(email: str) -> bool:
+    """
+    Check if the input string is a valid email address.
+    Args:
+        email (str): The input email address to be validated.
+    Returns:
+        bool: True if the email address is valid, False otherwise.
+    """
+    # Cheap membership test first, the regex backtracks a lot on strings without '@'
+    return '@' in email and EMAIL_REGEX.search(email) is not None
+
+
+def is_valid_username(username: str) -> bool:
+    """
+    Check if the input string is a valid username.
+    Args:
+        username (str): The username to be validated.
+    Returns:
+        bool: True if the username is valid, False otherwise.
+    """
+    return (USERNAME_MIN_LENGTH <= len(username) <= USERNAME_MAX_LENGTH
+            and not has_punctuation(username))
+
+
+def is_valid_name(name: str) -> bool:
+    """
+    Check if the input string is a valid first or last name.
+    Args:
+        name (str): The name to be validated.
+    Returns:
+        bool: True if the name is valid, False otherwise.
+    """
+    return (isinstance(name, str) and 0 < len(name) <= NAME_MAX_LENGTH
+            and not has_punctuation(name) and not has_digits(name))
+
+
+def is_valid_gender(gender: str) -> bool:
+    """
+    Check if the input string is one of the supported genders.
+    Args:
+        gender (str): The gender to be validated.
+    Returns:
+        bool: True if the gender is valid, False otherwise.
+    """
+    return isinstance(gender, str) and gender in GENDERS
+
+
+def require_string(value: str, field: str, label: str) -> None:
+    """
+    Raises a FieldValidationError if the value is not a non-empty string.
+    Args:
+        value (str): The value to be checked.
+        field (str): The name of the validated field.
+        label (str): The name of the field in the error messages.
+    """
+    if not isinstance(value, str):
+        raise FieldValidationError(field, 'type', f"{label} must be a string")
+    if not value:
+        raise FieldValidationError(field, 'empty', f"{label} cannot be empty")
+
+
+def validate_username(username: str, field: str = 'username') -> str:
+    """
+    Validates the username without any user interaction.
+    Args:
+        username (str): The username to be validated.
+        field (str): The name of the validated field.
+    Returns:
+        str: The valid username.
+    Raises:
+        FieldValidationError: If the username is invalid.
+    """
+    require_string(username, field, 'Username')
+    if len(username) < USERNAME_MIN_LENGTH:
+        raise FieldValidationError(
+            field, 'too_short', f"Username must be at least {USERNAME_MIN_LENGTH} characters")
+    if len(username) > USERNAME_MAX_LENGTH:
+        raise FieldValidationError(
+            field, 'too_long', f"Username must be maximum {USERNAME_MAX_LENGTH} characters")
+    if has_punctuation(username):
+        raise FieldValidationError(field, 'punctuation', "Username must not contain punctuation")
+    return username
+
+
+def validate_name(name: str, field: str = 'name') -> str:
+    """
+    Validates the first or last name without any user interaction.
+    Args:
+        name (str): The name to be validated.
+        field (str): The name of the validated field, e.g. 'first_name'.
+    Returns:
+        str: The valid name.
+    Raises:
+        FieldValidationError: If the name is invalid.
+    """
+    require_string(name, field, 'Name')
+    if len(name) > NAME_MAX_LENGTH:
+        raise FieldValidationError(
+            field, 'too_long', f"Name must be maximum {NAME_MAX_LENGTH} characters")
+    if has_punctuation(name):
+        raise FieldValidationError(field, 'punctuation', "Name must not contain punctuation")
+    if has_digits(name):
+        raise FieldValidationError(field, 'digits', "Name must not contain digits")
+    return name
+
+
+def validate_email(email: str, field: str = 'email_address') -> str:
+    """
+    Validates the email address without any user interaction.
+    Args:
+        email (str): The email address to be validated.
+        field (str): The name of the validated field.
+    Returns:
+        str: The valid email address.
+    Raises:
+        FieldValidationError: If the email address is invalid.
+    """
+    require_string(email, field, 'Email address')
+    if not is_valid_email(email):
+        raise FieldValidationError(field, 'format', "Email address is not valid")
+    return email
+
+
+def validate_gender(gender: str, field: str = 'gender') -> str:
+    """
+    Validates the gender without any user interaction.
+    Args:
+        gender (str): The gender to be validated.
+        field (str): The name of the validated field.
+    Returns:
+        str: The valid gender.
+    Raises:
+        FieldValidationError: If the gender is invalid.
+    """
+    require_string(gender, field, 'Gender')
+    if gender not in GENDERS:
+        raise FieldValidationError(
+            field, 'choice', f"Gender must be one of: {', '.join(sorted(GENDERS))}")
+    return gender
@@ -0,0 +1,269 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from API.Validators.vehicle_input.catalog import CarCatalog, get_catalog
+
+KINDS = ('brand', 'model', 'type')
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings obtained by deleting up to max_distance characters from word."""
+    found = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {item[:index] + item[index + 1:]
+                    for item in frontier for index in range(len(item))}
+        found |= frontier
+    return found
+
+
+def _levenshtein(first: str, second: str, max_distance: int) -> int:
+    """
+    Levenshtein distance limited to a band of max_distance around the
+    diagonal. Returns max_distance + 1 as soon as the limit is exceeded.
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    limit = max_distance + 1
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row] + [limit] * len(second)
+        low = max(1, row - max_distance)
+        high = min(len(second), row + max_distance)
+        for column in range(low, high + 1):
+            cost = previous[column - 1] + (first_char != second[column - 1])
+            current[column] = min(cost, previous[column] + 1, current[column - 1] + 1, limit)
+        if min(current[max(0, low - 1):high + 1]) > max_distance:
+            return limit
+        previous = current
+    return min(previous[-1], limit)
+
+
+class _Vocabulary:
+    """Names of one scope (e.g. all brands, or the models of one brand).
+
+    Prefix completion bisects a sorted array of the names. Fuzzy search
+    uses symmetric delete indexes: a name is within d edits of the term
+    only if both share a string reachable with at most d deletions, so
+    candidates are found with a few dictionary lookups and verified with
+    a banded Levenshtein distance. The delete indexes are built on first
+    use per (prefix length, distance) and kept.
+    """
+
+    def __init__(self, names: List[str]) -> None:
+        entries = sorted({(name.casefold(), name) for name in names})
+        self.keys: List[str] = [key for key, _ in entries]
+        self.names: List[str] = [name for _, name in entries]
+        self._delete_indexes: Dict[Tuple[Optional[int], int], Dict[str, List[int]]] = {}
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        """Names starting with the prefix, in alphabetical order."""
+        prefix = prefix.casefold()
+        found = []
+        index = bisect_left(self.keys, prefix)
+        while (index < len(self.keys) and len(found) < limit
+               and self.keys[index].startswith(prefix)):
+            found.append(self.names[index])
+            index += 1
+        return found
+
+    def _delete_index(self, length: Optional[int], max_distance: int) -> Dict[str, List[int]]:
+        """Delete index over whole names (length None) or name prefixes of the given length."""
+        index_key = (length, max_distance)
+        index = self._delete_indexes.get(index_key)
+        if index is None:
+            index = {}
+            for position, key in enumerate(self.keys):
+                for deleted in _deletes(key[:length], max_distance):
+                    index.setdefault(deleted, []).append(position)
+            self._delete_indexes[index_key] = index
+        return index
+
+    def fuzzy(self, term: str, max_distance: int,
+              prefix: bool) -> List[Tuple[int, str]]:
+        """
+        Names within max_distance edits of the term.
+
+        With prefix=True the distance is measured against the best
+        matching prefix of a name, which suits type-ahead input.
+        """
+        term = term.casefold()
+        if prefix:
+            lengths = range(max(1, len(term) - max_distance), len(term) + max_distance + 1)
+        else:
+            lengths = (None,)
+
+        term_deletes = _deletes(term, max_distance)
+        candidates: Set[int] = set()
+        for length in lengths:
+            index = self._delete_index(length, max_distance)
+            for deleted in term_deletes:
+                candidates.update(index.get(deleted, ()))
+
+        # Names often share prefixes (e.g. all 'Continental ...' types),
+        # so every distinct prefix is verified once.
+        distances: Dict[str, int] = {}
+
+        def distance_to(text: str) -> int:
+            if text not in distances:
+                distances[text] = _levenshtein(term, text, max_distance)
+            return distances[text]
+
+        found = []
+        for position in candidates:
+            key = self.keys[position]
+            if prefix:
+                distance = min(distance_to(key[:length]) for length in lengths)
+            else:
+                distance = distance_to(key)
+            if distance <= max_distance:
+                found.append((distance, self.names[position]))
+        return found
+
+
+class CatalogAutocomplete:
+    """Type-ahead index over brands, models and types of the car catalog.
+
+    Every scope (all brands, all models, all types, the models of one
+    brand, the types of one model) has its own vocabulary, so suggestions
+    can be narrowed down by the already chosen brand and model.
+
+    Methods:
+        complete(prefix, kind, maker, model, limit): Prefix completion.
+        suggest(term, kind, maker, model, max_distance, limit, prefix):
+            Edit distance suggestions.
+        search(text, kind, maker, model, limit): Prefix completion filled
+            up with fuzzy suggestions.
+    """
+
+    def __init__(self, catalog: CarCatalog) -> None:
+        self.catalog = catalog
+        self._scopes: Dict[Tuple[str, ...], _Vocabulary] = {}
+
+        brands = catalog.brand_names()
+        all_models: List[str] = []
+        all_types: List[str] = []
+        for brand in brands:
+            models = catalog.model_names(brand)
+            all_models.extend(models)
+            self._scopes[('model', brand.casefold())] = _Vocabulary(models)
+            for model in models:
+                types = catalog.type_names(brand, model)
+                if types:
+                    all_types.extend(types)
+                    self._scopes[('type', brand.casefold(), model.casefold())] = _Vocabulary(types)
+
+        self._scopes[('brand',)] = _Vocabulary(brands)
+        self._scopes[('model',)] = _Vocabulary(all_models)
+        self._scopes[('type',)] = _Vocabulary(all_types)
+
+    def _vocabulary(self, kind: str, maker: Optional[str],
+                    model: Optional[str]) -> Optional[_Vocabulary]:
+        if kind not in KINDS:
+            raise ValueError(f"Kind must be one of {', '.join(KINDS)}")
+        scope: Tuple[str, ...] = (kind,)
+        if kind in ('model', 'type') and maker:
+            scope += (maker.strip().casefold(),)
+            if kind == 'type' and model:
+                scope += (model.strip().casefold(),)
+            elif kind == 'type':
+                scope = (kind,)
+        return self._scopes.get(scope)
+
+    def complete(self, prefix: str, kind: str = 'brand', maker: Optional[str] = None,
+                 model: Optional[str] = None, limit: int = 10) -> List[str]:
+        """
+        Returns the names starting with the prefix.
+
+        Args:
+            prefix (str): The typed text, letter case is ignored.
+            kind (str): 'brand', 'model' or 'type'.
+            maker (str, optional): Restricts models and types to this brand.
+            model (str, optional): Restricts types to this model.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            List[str]: Up to limit names in alphabetical order.
+        """
+        vocabulary = self._vocabulary(kind, maker, model)
+        if vocabulary is None:
+            return []
+        return vocabulary.complete(prefix.strip(), limit)
+
+    def suggest(self, term: str, kind: str = 'brand', maker: Optional[str] = None,
+                model: Optional[str] = None, max_distance: int = 2, limit: int = 5,
+                prefix: bool = False) -> List[Tuple[str, int]]:
+        """
+        Returns the names within max_distance edits of the term.
+
+        Args:
+            term (str): The typed text, letter case is ignored.
+            kind (str): 'brand', 'model' or 'type'.
+            maker (str, optional): Restricts models and types to this brand.
+            model (str, optional): Restricts types to this model.
+            max_distance (int): Maximum Levenshtein distance, lowered
+                to one edit per three characters of the term.
+            limit (int): Maximum number of suggestions.
+            prefix (bool): Compare the term with name prefixes, e.g.
+                'volksw' matches 'Volkswagen' with distance 0.
+
+        Returns:
+            List[Tuple[str, int]]: (name, distance) pairs, closest first.
+        """
+        vocabulary = self._vocabulary(kind, maker, model)
+        term = term.strip()
+        if vocabulary is None or not term:
+            return []
+        # Short terms are within a couple of edits of almost every short
+        # name, so allow at most one edit per three typed characters.
+        max_distance = min(max_distance, len(term) // 3)
+        found = vocabulary.fuzzy(term, max_distance, prefix)
+        found.sort(key=lambda item: (item[0], item[1].casefold()))
+        return [(name, distance) for distance, name in found[:limit]]
+
+    def search(self, text: str, kind: str = 'brand', maker: Optional[str] = None,
+               model: Optional[str] = None, limit: int = 10) -> List[str]:
+        """
+        Type-ahead suggestions: exact prefix matches first, then
+        prefix matches with typos (up to one edit per four characters).
+
+        Args:
+            text (str): The typed text.
+            kind (str): 'brand', 'model' or 'type'.
+            maker (str, optional): Restricts models and types to this brand.
+            model (str, optional): Restricts types to this model.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            List[str]: Up to limit names.
+        """
+        names = self.complete(text, kind, maker, model, limit)
+        max_distance = min(2, len(text.strip()) // 4)
+        if len(names) < limit and max_distance:
+            for name, _ in self.suggest(text, kind, maker, model, max_distance,
+                                        limit, prefix=True):
+                if name not in names:
+                    names.append(name)
+                if len(names) == limit:
+                    break
+        return names
+
+
+_autocomplete: Optional[CatalogAutocomplete] = None
+_autocomplete_lock = threading.Lock()
+
+
+def get_autocomplete() -> CatalogAutocomplete:
+    """
+    Returns the process-wide autocomplete index built from the shared catalog.
+
+    Returns:
+        CatalogAutocomplete: The autocomplete index.
+    """
+    global _autocomplete
+    if _autocomplete is None:
+        with _autocomplete_lock:
+            if _autocomplete is None:
+                _autocomplete = CatalogAutocomplete(get_catalog())
+    return _autocomplete
@@ -0,0 +1,180 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+CATALOG_PATH = Path(__file__).resolve().parents[2] / 'Data' / 'cars.json'
+
+
+def _key(value: str) -> str:
+    """Case-insensitive lookup key."""
+    return value.strip().casefold()
+
+
+class CarCatalog:
+    """In-memory index over the car catalog (Data/cars.json).
+
+    All lookups are case-insensitive dictionary lookups and return
+    the names spelled as in the catalog.
+
+    Attributes:
+        brands (Dict[str, str]): brand key -> brand name.
+        models (Dict[Tuple[str, str], str]): (brand key, model key) -> model name.
+        types (Dict[Tuple[str, str, str], str]): (brand key, model key, type key)
+            -> type name.
+
+    Methods:
+        from_file(path): Builds the catalog from a JSON file.
+        brand_names(): Returns all brand names in catalog order.
+        model_names(maker): Returns the model names of a brand.
+        type_names(maker, model): Returns the type names of a model.
+        find_brand(maker): Returns the brand name or None.
+        find_model(maker, model): Returns the model name or None.
+        find_type(maker, model, type_name): Returns the type name or None.
+        resolve(maker, model, type_name): Returns (maker, model) or None.
+        resolve_many(vehicles): Resolves many vehicles at once.
+    """
+
+    def __init__(self, data: List[dict]) -> None:
+        self.brands: Dict[str, str] = {}
+        self.models: Dict[Tuple[str, str], str] = {}
+        self.types: Dict[Tuple[str, str, str], str] = {}
+        self._models_by_brand: Dict[str, List[str]] = {}
+        self._types_by_model: Dict[Tuple[str, str], List[str]] = {}
+
+        for brand in data:
+            brand_name = brand['brand']
+            brand_key = _key(brand_name)
+            self.brands[brand_key] = brand_name
+            model_names = self._models_by_brand.setdefault(brand_key, [])
+
+            for model in brand.get('models', []):
+                model_name = model.get('title', 'Unknown')
+                model_key = (brand_key, _key(model_name))
+                self.models[model_key] = model_name
+                model_names.append(model_name)
+
+                type_names = self._types_by_model.setdefault(model_key, [])
+                for type_name in model.get('types', []):
+                    self.types[model_key + (_key(type_name),)] = type_name
+                    type_names.append(type_name)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path] = CATALOG_PATH) -> 'CarCatalog':
+        """
+        Builds the catalog from a JSON file.
+
+        Args:
+            path (str | Path): Path to the catalog. Defaults to Data/cars.json.
+
+        Returns:
+            CarCatalog: The catalog index.
+        """
+        with open(path, encoding='utf-8') as cars:
+            return cls(json.load(cars))
+
+    def brand_names(self) -> List[str]:
+        """Returns all brand names in catalog order."""
+        return list(self.brands.values())
+
+    def model_names(self, maker: str) -> List[str]:
+        """Returns the model names of a brand, empty if the brand is unknown."""
+        return list(self._models_by_brand.get(_key(maker), []))
+
+    def type_names(self, maker: str, model: str) -> List[str]:
+        """Returns the type names of a model, empty if the model has no types."""
+        return list(self._types_by_model.get((_key(maker), _key(model)), []))
+
+    def find_brand(self, maker: str) -> Optional[str]:
+        """
+        Args:
+            maker (str): The brand, in any letter case.
+
+        Returns:
+            str | None: The brand name as in the catalog, None if unknown.
+        """
+        return self.brands.get(_key(maker))
+
+    def find_model(self, maker: str, model: str) -> Optional[str]:
+        """
+        Args:
+            maker (str): The brand, in any letter case.
+            model (str): The model, in any letter case.
+
+        Returns:
+            str | None: The model name as in the catalog, None if unknown.
+        """
+        return self.models.get((_key(maker), _key(model)))
+
+    def find_type(self, maker: str, model: str, type_name: str) -> Optional[str]:
+        """
+        Args:
+            maker (str): The brand, in any letter case.
+            model (str): The model, in any letter case.
+            type_name (str): The type of the model, in any letter case.
+
+        Returns:
+            str | None: The type name as in the catalog, None if unknown.
+        """
+        return self.types.get((_key(maker), _key(model), _key(type_name)))
+
+    def resolve(self, maker: str, model: str,
+                type_name: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """
+        Validates a vehicle against the catalog without any user interaction.
+
+        Args:
+            maker (str): The brand.
+            model (str): The model.
+            type_name (str, optional): The type, required only for
+                models which define types.
+
+        Returns:
+            Tuple[str, str] | None: The brand and the model (joined with the
+            type if given), spelled as in the catalog. None if not found.
+        """
+        brand_name = self.find_brand(maker)
+        model_name = self.find_model(maker, model)
+        if brand_name is None or model_name is None:
+            return None
+        if type_name is None:
+            return brand_name, model_name
+
+        type_found = self.find_type(maker, model, type_name)
+        if type_found is None:
+            return None
+        return brand_name, f'{model_name} {type_found}'
+
+    def resolve_many(self, vehicles: Iterable[Tuple[str, ...]]
+                     ) -> List[Optional[Tuple[str, str]]]:
+        """
+        Validates many vehicles at once, e.g. a batch of incoming ads.
+
+        Args:
+            vehicles (Iterable[Tuple[str, ...]]): (maker, model) or
+                (maker, model, type) tuples.
+
+        Returns:
+            List[Tuple[str, str] | None]: The result of resolve() per vehicle.
+        """
+        return [self.resolve(*vehicle) for vehicle in vehicles]
+
+
+_catalog: Optional[CarCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> CarCatalog:
+    """
+    Returns the process-wide catalog, loading Data/cars.json on first use.
+    Thread-safe, the file is read only once per process.
+
+    Returns:
+        CarCatalog: The shared catalog index.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = CarCatalog.from_file()
+    return _catalog
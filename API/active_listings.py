@@ -0,0 +1,189 @@
+from typing import List, Optional, Tuple
+from database_model import Advertisement, Vehicle, Category, User, Address
+from database_session import get_engine
+from create_fields.searchDTO import AdvertisementFilterDTO
+from advertisement_search import (filter_conditions, keyset_page, encode_cursor,
+                                  DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, DEFAULT_SORT)
+from sqlalchemy import select, Select, Table, Column, MetaData, Engine, Row, text
+from sqlalchemy.orm import Session
+from config import settings
+
+VIEW_NAME = 'active_listings'
+
+# One narrow row per active advertisement, flattened from
+# advertisements -> vehicles -> categories and users -> addresses.
+ACTIVE_LISTINGS_SELECT = (
+    select(Advertisement.ad_id, Advertisement.price, Advertisement.mileage,
+           Advertisement.fuel, Advertisement.gearbox, Advertisement.used,
+           Advertisement.manufactured_date, Advertisement.created_at,
+           Advertisement.user_id, Vehicle.maker, Vehicle.model, Vehicle.category_id,
+           Category.category_name, Address.city, Address.country)
+    .join(Vehicle, Advertisement.vehicle_id == Vehicle.vehicle_id)
+    .join(Category, Vehicle.category_id == Category.category_id)
+    .join(User, Advertisement.user_id == User.user_id)
+    .join(Address, User.address_id == Address.address_id)
+    .where(Advertisement.discontinued == False)
+)
+
+# Read only mapping of the view, kept out of Base.metadata so create_all
+# never creates it as a table.
+active_listings = Table(
+    VIEW_NAME, MetaData(),
+    *(Column(column.key, column.type, primary_key=column.key == 'ad_id')
+      for column in ACTIVE_LISTINGS_SELECT.selected_columns))
+
+# Indexes of the materialized view. The unique index is required
+# by REFRESH MATERIALIZED VIEW CONCURRENTLY.
+VIEW_INDEXES = (
+    f'CREATE UNIQUE INDEX IF NOT EXISTS ux_{VIEW_NAME}_ad_id ON {VIEW_NAME} (ad_id)',
+    f'CREATE INDEX IF NOT EXISTS ix_{VIEW_NAME}_created_at ON {VIEW_NAME} (created_at, ad_id)',
+    f'CREATE INDEX IF NOT EXISTS ix_{VIEW_NAME}_price ON {VIEW_NAME} (price, ad_id)',
+    f'CREATE INDEX IF NOT EXISTS ix_{VIEW_NAME}_maker_model ON {VIEW_NAME} (maker, model, price)',
+    f'CREATE INDEX IF NOT EXISTS ix_{VIEW_NAME}_category ON {VIEW_NAME} (category_id, price)',
+    f'CREATE INDEX IF NOT EXISTS ix_{VIEW_NAME}_location ON {VIEW_NAME} (country, city)',
+)
+
+LISTING_SORT_ORDERS = {
+    'newest': (active_listings.c.created_at, True),
+    'oldest': (active_listings.c.created_at, False),
+    'cheapest': (active_listings.c.price, False),
+    'most_expensive': (active_listings.c.price, True),
+}
+
+
+def create_active_listings(engine: Engine) -> None:
+    """
+    Creates the active listings read model if it does not exist.
+
+    PostgreSQL gets a materialized view with its indexes. Other databases
+    (local SQLite) get a plain view with the same columns, always up to date.
+
+    Args:
+        engine (Engine): The engine of the database.
+    """
+    query = ACTIVE_LISTINGS_SELECT.compile(dialect=engine.dialect,
+                                           compile_kwargs={'literal_binds': True})
+    with engine.begin() as connection:
+        if engine.dialect.name == 'postgresql':
+            connection.execute(text(f'CREATE MATERIALIZED VIEW IF NOT EXISTS {VIEW_NAME} AS {query}'))
+            for statement in VIEW_INDEXES:
+                connection.execute(text(statement))
+        else:
+            connection.execute(text(f'CREATE VIEW IF NOT EXISTS {VIEW_NAME} AS {query}'))
+
+
+def drop_active_listings(engine: Engine) -> None:
+    """
+    Drops the active listings read model, e.g. before its definition changes.
+
+    Args:
+        engine (Engine): The engine of the database.
+    """
+    kind = 'MATERIALIZED VIEW' if engine.dialect.name == 'postgresql' else 'VIEW'
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP {kind} IF EXISTS {VIEW_NAME}'))
+
+
+def refresh_active_listings(engine: Engine, concurrently: bool = True) -> None:
+    """
+    Recomputes the materialized view from the base tables. Run it on
+    a schedule or after bulk changes of advertisements.
+
+    With concurrently=True readers are never blocked, the view is
+    compared with the new result and only the differences are written.
+    Plain views (SQLite) need no refresh.
+
+    Args:
+        engine (Engine): The engine of the database.
+        concurrently (bool): Refresh without locking out readers.
+            The first refresh of an unpopulated view cannot be concurrent.
+    """
+    if engine.dialect.name != 'postgresql':
+        return
+    option = ' CONCURRENTLY' if concurrently else ''
+    with engine.begin() as connection:
+        connection.execute(text(f'REFRESH MATERIALIZED VIEW{option} {VIEW_NAME}'))
+
+
+def listing_statement(filters: AdvertisementFilterDTO,
+                      limit: int = DEFAULT_PAGE_SIZE,
+                      sort: str = DEFAULT_SORT,
+                      cursor: Optional[str] = None,
+                      country: Optional[str] = None,
+                      city: Optional[str] = None) -> Select:
+    """
+    Builds the single table SELECT of one listing page.
+
+    Args:
+        filters (AdvertisementFilterDTO): The search filters.
+        limit (int): The number of rows to fetch.
+        sort (str): One of LISTING_SORT_ORDERS.
+        cursor (str, optional): The cursor returned with the previous page.
+        country (str, optional): Only listings of sellers from this country.
+        city (str, optional): Only listings of sellers from this city.
+
+    Returns:
+        Select: SELECT ... FROM active_listings WHERE ... ORDER BY <sort key>, ad_id LIMIT ...
+
+    Raises:
+        ValueError: If filters.discontinued is True, the view holds active
+            advertisements only.
+    """
+    if filters.discontinued:
+        raise ValueError("Active listings hold no discontinued advertisements, "
+                         "search them with advertisement_search")
+    statement = select(active_listings).where(
+        *filter_conditions(filters, active_listings.c, active_listings.c))
+    if country is not None:
+        statement = statement.where(active_listings.c.country == country)
+    if city is not None:
+        statement = statement.where(active_listings.c.city == city)
+    return keyset_page(statement, active_listings.c.ad_id, limit, sort, cursor,
+                       LISTING_SORT_ORDERS)
+
+
+def list_active_listings(session: Session,
+                         filters: Optional[AdvertisementFilterDTO] = None,
+                         limit: int = DEFAULT_PAGE_SIZE,
+                         sort: str = DEFAULT_SORT,
+                         cursor: Optional[str] = None,
+                         country: Optional[str] = None,
+                         city: Optional[str] = None) -> Tuple[List[Row], Optional[str]]:
+    """
+    Returns one page of active listings, read from the active listings
+    view only (no joins).
+
+    Args:
+        session (Session): The database session.
+        filters (AdvertisementFilterDTO, optional): The search filters.
+        limit (int): The page size, at most MAX_PAGE_SIZE.
+        sort (str): One of LISTING_SORT_ORDERS, defaults to 'newest'.
+        cursor (str, optional): The cursor returned with the previous page.
+        country (str, optional): Only listings of sellers from this country.
+        city (str, optional): Only listings of sellers from this city.
+
+    Returns:
+        Tuple[List[Row], Optional[str]]: The listing rows and the cursor
+        of the next page, None on the last page.
+
+    Raises:
+        ValueError: If the page size, the sort order or the cursor is invalid,
+            or filters.discontinued is True (active advertisements only).
+    """
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+
+    statement = listing_statement(filters or AdvertisementFilterDTO(), limit + 1,
+                                  sort, cursor, country, city)
+    rows = session.execute(statement).all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(sort, page[-1], LISTING_SORT_ORDERS) if len(rows) > limit else None
+    return page, next_cursor
+
+
+if __name__ == '__main__':
+    # Creates the view if needed and refreshes it, e.g. from cron:
+    # python active_listings.py
+    engine = get_engine(settings.DATABASE_URL_psycopg)
+    create_active_listings(engine)
+    refresh_active_listings(engine)
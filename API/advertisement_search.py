@@ -0,0 +1,245 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from database_model import Advertisement, Vehicle
+from create_fields.searchDTO import AdvertisementFilterDTO
+from loading_profiles import apply_profile
+from sqlalchemy import select, Select, tuple_, DateTime
+from sqlalchemy.orm import Session
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Sort order -> (sort key column, descending). Every order is backed by a
+# (sort key, ad_id) index, ad_id breaks ties so the order is total.
+SORT_ORDERS = {
+    'newest': (Advertisement.created_at, True),
+    'oldest': (Advertisement.created_at, False),
+    'cheapest': (Advertisement.price, False),
+    'most_expensive': (Advertisement.price, True),
+}
+DEFAULT_SORT = 'newest'
+
+
+def filter_conditions(filters: AdvertisementFilterDTO, columns: Any = Advertisement,
+                      vehicle_columns: Any = None) -> List:
+    """
+    Compiles the filters to WHERE conditions on the advertisements table,
+    or on a read model with the same column names (active_listings).
+
+    Vehicle filters become one 'vehicle_id IN (SELECT ...)' condition,
+    unless the maker, model and category_id are columns of the same row.
+    The year range is compared with manufactured_date boundaries so the
+    conditions stay index friendly.
+
+    Args:
+        filters (AdvertisementFilterDTO): The search filters.
+        columns (Any): The advertisement columns, Advertisement or e.g.
+            active_listings.c. Without a discontinued column (active rows
+            only) filters.discontinued is ignored.
+        vehicle_columns (Any, optional): The maker, model and category_id
+            columns when they are on the same row, e.g. active_listings.c.
+
+    Returns:
+        List: The conditions, all of them must be met.
+    """
+    conditions = []
+
+    if filters.discontinued is not None and hasattr(columns, 'discontinued'):
+        # Compared with a constant (not a bound parameter), so the planner
+        # can use the partial indexes of active advertisements.
+        conditions.append(columns.discontinued == filters.discontinued)
+
+    vehicle = vehicle_columns if vehicle_columns is not None else Vehicle
+    vehicle_conditions = []
+    if filters.maker is not None:
+        vehicle_conditions.append(vehicle.maker == filters.maker)
+    if filters.model is not None:
+        vehicle_conditions.append(vehicle.model == filters.model)
+    if filters.category_id is not None:
+        vehicle_conditions.append(vehicle.category_id == filters.category_id)
+    if vehicle_conditions and vehicle_columns is not None:
+        conditions.extend(vehicle_conditions)
+    elif vehicle_conditions:
+        conditions.append(columns.vehicle_id.in_(
+            select(Vehicle.vehicle_id).where(*vehicle_conditions)))
+
+    if filters.price_min is not None:
+        conditions.append(columns.price >= filters.price_min)
+    if filters.price_max is not None:
+        conditions.append(columns.price <= filters.price_max)
+    if filters.mileage_min is not None:
+        conditions.append(columns.mileage >= filters.mileage_min)
+    if filters.mileage_max is not None:
+        conditions.append(columns.mileage <= filters.mileage_max)
+    if filters.fuel is not None:
+        conditions.append(columns.fuel == filters.fuel)
+    if filters.gearbox is not None:
+        conditions.append(columns.gearbox == filters.gearbox)
+    if filters.year_min is not None:
+        conditions.append(columns.manufactured_date >= datetime(filters.year_min, 1, 1))
+    if filters.year_max is not None:
+        conditions.append(columns.manufactured_date < datetime(filters.year_max + 1, 1, 1))
+    if filters.used is not None:
+        conditions.append(columns.used == filters.used)
+
+    return conditions
+
+
+def encode_cursor(sort: str, advertisement: Any, sort_orders: Dict = SORT_ORDERS) -> str:
+    """
+    Builds the opaque cursor pointing after the advertisement.
+
+    Args:
+        sort (str): The sort order of the listing.
+        advertisement (Any): The last advertisement (or listing row) of the page.
+        sort_orders (Dict): The sort orders of the listing.
+
+    Returns:
+        str: URL safe cursor.
+    """
+    column, _ = sort_orders[sort]
+    value = getattr(advertisement, column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, advertisement.ad_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str, sort_orders: Dict = SORT_ORDERS) -> Tuple[Any, int]:
+    """
+    Reads the sort key and ad_id from a cursor.
+
+    Args:
+        cursor (str): A cursor returned by search_advertisements.
+        sort (str): The sort order of the listing.
+        sort_orders (Dict): The sort orders of the listing.
+
+    Returns:
+        Tuple[Any, int]: The sort key value and the ad_id.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another sort order.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, ad_id = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(ad_id, int):
+        raise ValueError("Cursor does not belong to this sort order")
+
+    column, _ = sort_orders[sort]
+    try:
+        if isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, int):
+            raise TypeError
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return value, ad_id
+
+
+def keyset_page(statement: Select, id_column: Any, limit: int, sort: str,
+                cursor: Optional[str], sort_orders: Dict = SORT_ORDERS) -> Select:
+    """
+    Adds the seek predicate, the order and the limit of one page to the statement.
+
+    Args:
+        statement (Select): The filtered statement.
+        id_column (Any): The ad_id column breaking ties of the sort key.
+        limit (int): The number of rows to fetch.
+        sort (str): One of sort_orders.
+        cursor (str, optional): The cursor returned with the previous page.
+        sort_orders (Dict): The sort orders of the listing.
+
+    Returns:
+        Select: The statement of the page.
+
+    Raises:
+        ValueError: If the sort order or the cursor is invalid.
+    """
+    if sort not in sort_orders:
+        raise ValueError(f"Sort must be one of {', '.join(sort_orders)}")
+    column, descending = sort_orders[sort]
+
+    if cursor is not None:
+        value, ad_id = decode_cursor(cursor, sort, sort_orders)
+        key = tuple_(column, id_column)
+        statement = statement.where(key < tuple_(value, ad_id) if descending
+                                    else key > tuple_(value, ad_id))
+
+    if descending:
+        order = (column.desc(), id_column.desc())
+    else:
+        order = (column.asc(), id_column.asc())
+    return statement.order_by(*order).limit(limit)
+
+
+def search_statement(filters: AdvertisementFilterDTO,
+                     limit: int = DEFAULT_PAGE_SIZE,
+                     sort: str = DEFAULT_SORT,
+                     cursor: Optional[str] = None) -> Select:
+    """
+    Builds the single SELECT of one page of advertisements.
+
+    Pages are continued with a seek predicate on (sort key, ad_id) instead
+    of OFFSET, so a deep page costs the same as the first one and rows
+    inserted meanwhile never shift the following pages.
+
+    Args:
+        filters (AdvertisementFilterDTO): The search filters.
+        limit (int): The number of rows to fetch.
+        sort (str): One of SORT_ORDERS.
+        cursor (str, optional): The cursor returned with the previous page.
+
+    Returns:
+        Select: SELECT ... FROM advertisements WHERE ... ORDER BY <sort key>, ad_id LIMIT ...
+
+    Raises:
+        ValueError: If the sort order or the cursor is invalid.
+    """
+    statement = select(Advertisement).where(*filter_conditions(filters))
+    return keyset_page(statement, Advertisement.ad_id, limit, sort, cursor)
+
+
+def search_advertisements(session: Session,
+                          filters: AdvertisementFilterDTO,
+                          limit: int = DEFAULT_PAGE_SIZE,
+                          sort: str = DEFAULT_SORT,
+                          cursor: Optional[str] = None,
+                          profile: Optional[str] = None
+                          ) -> Tuple[List[Advertisement], Optional[str]]:
+    """
+    Returns one page of the advertisements matching the filters.
+
+    Args:
+        session (Session): The database session.
+        filters (AdvertisementFilterDTO): The search filters.
+        limit (int): The page size, at most MAX_PAGE_SIZE.
+        sort (str): One of SORT_ORDERS, defaults to 'newest'.
+        cursor (str, optional): The cursor returned with the previous page.
+        profile (str, optional): A loading profile of loading_profiles, e.g.
+            'listing_card' to load the vehicles in the same SELECT and raise
+            on any other lazy load. Defaults to lazy loading.
+
+    Returns:
+        Tuple[List[Advertisement], Optional[str]]: The advertisements and the
+        cursor of the next page, None on the last page.
+
+    Raises:
+        ValueError: If the page size, the sort order, the cursor or the profile is invalid.
+    """
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+
+    # One extra row tells whether another page exists
+    statement = search_statement(filters, limit + 1, sort, cursor)
+    if profile is not None:
+        statement = apply_profile(statement, profile)
+    rows = session.scalars(statement).all()
+    page = list(rows[:limit])
+    next_cursor = encode_cursor(sort, page[-1]) if len(rows) > limit else None
+    return page, next_cursor
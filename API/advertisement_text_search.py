@@ -0,0 +1,170 @@
+import re
+from typing import List, Optional, Tuple
+from database_model import Advertisement, AdvertisementDetails
+from create_fields.searchDTO import AdvertisementFilterDTO
+from advertisement_search import filter_conditions, MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE
+from sqlalchemy import select, Select, Engine, text, func, cast, literal, literal_column, table, column
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+
+TEXT_SEARCH_CONFIG = 'english'
+
+# Free text columns of advertisement_details. Descriptions rank above equipment.
+# Advertisements without details have no row and are never found.
+DESCRIPTION_COLUMNS = ('description',)
+EQUIPMENT_COLUMNS = ('interior', 'comfort_equip', 'safety_equip', 'audio_video_system',
+                     'lights', 'wheels_discs', 'miscell_equip', 'miscell_info',
+                     'body_type', 'wheel_drive')
+
+DETAILS_TABLE = AdvertisementDetails.__tablename__
+SEARCH_VECTOR_COLUMN = 'search_vector'
+SEARCH_INDEX_NAME = 'ix_advertisement_details_search_vector'
+FTS_TABLE = 'advertisements_fts'
+
+# SQLite FTS5 column weights of bm25(), in the order description, equipment
+FTS_WEIGHTS = (2.0, 1.0)
+
+
+def _document(columns: Tuple[str, ...], prefix: str = '') -> str:
+    """SQL concatenation of the columns, NULL becomes ''."""
+    return " || ' ' || ".join(f"coalesce({prefix}{name}, '')" for name in columns)
+
+
+def _postgresql_ddl() -> Tuple[str, ...]:
+    """Generated tsvector column (kept up to date by PostgreSQL) and its GIN index."""
+    vector = (f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', {_document(DESCRIPTION_COLUMNS)}), 'A')"
+              f" || setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', {_document(EQUIPMENT_COLUMNS)}), 'B')")
+    return (
+        f'ALTER TABLE {DETAILS_TABLE} ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector '
+        f'GENERATED ALWAYS AS ({vector}) STORED',
+        f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME} ON {DETAILS_TABLE} '
+        f'USING GIN ({SEARCH_VECTOR_COLUMN})',
+    )
+
+
+def _sqlite_ddl() -> Tuple[str, ...]:
+    """FTS5 table filled from advertisement_details and kept in sync by triggers."""
+    def values(prefix: str) -> str:
+        return (f"{prefix}ad_id, {_document(DESCRIPTION_COLUMNS, prefix)}, "
+                f"{_document(EQUIPMENT_COLUMNS, prefix)}")
+
+    insert = f'INSERT INTO {FTS_TABLE} (rowid, description, equipment)'
+    delete = f'DELETE FROM {FTS_TABLE} WHERE rowid = old.ad_id;'
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"description, equipment, tokenize = 'porter unicode61')",
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {DETAILS_TABLE} '
+        f'BEGIN {insert} VALUES ({values("new.")}); END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE ON {DETAILS_TABLE} '
+        f'BEGIN {delete} {insert} VALUES ({values("new.")}); END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {DETAILS_TABLE} '
+        f'BEGIN {delete} END',
+        f'DELETE FROM {FTS_TABLE}',
+        f'{insert} SELECT {values("")} FROM {DETAILS_TABLE}',
+    )
+
+
+def text_search_ddl(dialect_name: str) -> Tuple[str, ...]:
+    """The statements of create_text_search, to run them within another transaction."""
+    return _postgresql_ddl() if dialect_name == 'postgresql' else _sqlite_ddl()
+
+
+def create_text_search(engine: Engine) -> None:
+    """
+    Adds full text search over the advertisement_details table.
+
+    PostgreSQL gets a stored generated tsvector column with a GIN index,
+    other databases (local SQLite) an FTS5 table maintained by triggers.
+    Safe to run again, SQLite re-indexes all advertisements.
+
+    Args:
+        engine (Engine): The engine of the database.
+    """
+    with engine.begin() as connection:
+        for statement in text_search_ddl(engine.dialect.name):
+            connection.execute(text(statement))
+
+
+def fts5_query(query: str) -> str:
+    """
+    Converts search text to an FTS5 query. Quoted parts are searched as
+    phrases, every other word must occur. FTS5 operators are not interpreted.
+
+    Args:
+        query (str): The search text, e.g. '"heated seats" panoramic'.
+
+    Returns:
+        str: The FTS5 query, e.g. '"heated seats" "panoramic"', empty if there is nothing to search.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\w+)', query):
+        words = re.findall(r'\w+', phrase) if phrase else [word]
+        if words and words[0]:
+            terms.append('"' + ' '.join(words) + '"')
+    return ' '.join(terms)
+
+
+def text_search_statement(dialect_name: str, query: str,
+                          filters: Optional[AdvertisementFilterDTO] = None,
+                          limit: int = DEFAULT_PAGE_SIZE) -> Select:
+    """
+    Builds the SELECT of the best matching advertisements with their rank,
+    restricted by the structured filters.
+
+    Args:
+        dialect_name (str): The database dialect, 'postgresql' or 'sqlite'.
+        query (str): The search text. Quoted parts are phrases.
+        filters (AdvertisementFilterDTO, optional): The search filters.
+        limit (int): The number of results.
+
+    Returns:
+        Select: SELECT advertisements.*, rank ... ORDER BY rank DESC, ad_id DESC LIMIT ...
+    """
+    conditions = filter_conditions(filters or AdvertisementFilterDTO())
+
+    if dialect_name == 'postgresql':
+        vector = literal_column(f'{DETAILS_TABLE}.{SEARCH_VECTOR_COLUMN}')
+        ts_query = func.websearch_to_tsquery(cast(literal(TEXT_SEARCH_CONFIG), REGCONFIG), query)
+        rank = func.ts_rank_cd(vector, ts_query)
+        statement = (select(Advertisement, rank.label('rank'))
+                     .join(AdvertisementDetails, AdvertisementDetails.ad_id == Advertisement.ad_id)
+                     .where(vector.op('@@')(ts_query), *conditions))
+    else:
+        fts = table(FTS_TABLE, column('rowid'))
+        # bm25() is lower for better matches
+        rank = -func.bm25(literal_column(FTS_TABLE), *FTS_WEIGHTS)
+        statement = (select(Advertisement, rank.label('rank'))
+                     .join(fts, fts.c.rowid == Advertisement.ad_id)
+                     .where(literal_column(FTS_TABLE).op('MATCH')(fts5_query(query)), *conditions))
+
+    return statement.order_by(rank.desc(), Advertisement.ad_id.desc()).limit(limit)
+
+
+def search_text(session: Session, query: str,
+                filters: Optional[AdvertisementFilterDTO] = None,
+                limit: int = DEFAULT_PAGE_SIZE) -> List[Tuple[Advertisement, float]]:
+    """
+    Full text search over the description and equipment of advertisements,
+    e.g. 'panoramic roof' or '"heated seats" leather'.
+
+    Args:
+        session (Session): The database session.
+        query (str): The search text. Quoted parts are phrases.
+        filters (AdvertisementFilterDTO, optional): Structured filters,
+            by default active advertisements only.
+        limit (int): The number of results, at most MAX_PAGE_SIZE.
+
+    Returns:
+        List[Tuple[Advertisement, float]]: Advertisements with their rank, best first.
+
+    Raises:
+        ValueError: If the number of results is out of range.
+    """
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Page size must be between 1 and {MAX_PAGE_SIZE}")
+    if not fts5_query(query):
+        return []
+
+    dialect_name = session.get_bind().dialect.name
+    rows = session.execute(text_search_statement(dialect_name, query, filters, limit))
+    return [(advertisement, rank) for advertisement, rank in rows]
@@ -0,0 +1,348 @@
+import argparse
+import hashlib
+import hmac
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from database_model import Advertisement, AdvertisementDetails, Vehicle, Category, User, Address, SalesRecords
+from database_session import get_engine
+from market_analytics import UPDATE_OVERLAP, SALES_RECORD_OVERLAP
+from sqlalchemy import (select, Select, Engine, Connection, Boolean, Integer,
+                        Float, DateTime, Date)
+from config import settings
+
+EXPORT_BATCH_SIZE = 10_000
+STATE_FILE = 'export_state.json'
+PARTITION_COLUMN = 'month'
+FILE_FORMATS = {'parquet': 'parquet', 'ipc': 'arrow'}
+
+# Advertisements without the VIN and the free text columns (descriptions may
+# hold phone numbers or names), the seller is pseudonymized and located by
+# country and city only.
+ADVERTISEMENTS_SELECT = (
+    select(Advertisement.ad_id, Advertisement.vehicle_id, Advertisement.price,
+           Advertisement.condition_type, Advertisement.fuel, Advertisement.power_output,
+           Advertisement.gearbox, Advertisement.mileage, Advertisement.used,
+           Advertisement.color, Advertisement.primary_registration,
+           Advertisement.manufactured_date, Advertisement.engine_volume,
+           Advertisement.average_consumption, AdvertisementDetails.body_type,
+           AdvertisementDetails.wheel_drive, AdvertisementDetails.number_of_seats,
+           AdvertisementDetails.number_of_doors, Advertisement.discontinued,
+           Advertisement.created_at, Advertisement.updated_at,
+           Advertisement.user_id.label('seller_key'),
+           Address.country.label('seller_country'), Address.city.label('seller_city'))
+    .join(User, Advertisement.user_id == User.user_id)
+    .join(Address, User.address_id == Address.address_id)
+    .outerjoin(AdvertisementDetails, Advertisement.ad_id == AdvertisementDetails.ad_id)
+)
+
+VEHICLES_SELECT = (
+    select(Vehicle.vehicle_id, Vehicle.maker, Vehicle.model,
+           Vehicle.category_id, Category.category_name)
+    .join(Category, Vehicle.category_id == Category.category_id)
+)
+
+SALES_SELECT = select(SalesRecords.record_id, SalesRecords.sale_date,
+                      SalesRecords.advertisement_id,
+                      SalesRecords.seller_id.label('seller_key'),
+                      SalesRecords.buyer_id.label('buyer_key'))
+
+SELLERS_SELECT = (
+    select(User.user_id.label('seller_key'), User.user_property,
+           Address.country, Address.city, User.updated_at)
+    .join(Address, User.address_id == Address.address_id)
+)
+
+# Dataset -> (statement, watermark column, partition column, pseudonymized columns).
+# Without a watermark column the dataset is replaced on every export, without
+# a partition column it is written unpartitioned. An integer watermark is the
+# primary key of an append only table, rows already exported are not written again.
+EXPORT_DATASETS = {
+    'vehicles': (VEHICLES_SELECT, None, None, ()),
+    'advertisements': (ADVERTISEMENTS_SELECT, Advertisement.updated_at,
+                       Advertisement.created_at, ('seller_key',)),
+    'sales_records': (SALES_SELECT, SalesRecords.record_id, SalesRecords.sale_date,
+                      ('seller_key', 'buyer_key')),
+    'sellers': (SELLERS_SELECT, User.updated_at, None, ('seller_key',)),
+}
+
+
+def arrow_type(sql_type: Any) -> pa.DataType:
+    """
+    Maps a SQLAlchemy column type to the Arrow type of the export.
+
+    Args:
+        sql_type (Any): The SQLAlchemy type.
+
+    Returns:
+        pa.DataType: The Arrow type, strings for anything else.
+    """
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, Float):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp('us')
+    if isinstance(sql_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def pseudonymize(key: bytes, value: Any) -> Optional[str]:
+    """
+    Replaces an identifier with its keyed hash (HMAC-SHA256). The same
+    user always gets the same key, but without the secret key the ids
+    cannot be recovered by hashing every possible id.
+
+    Args:
+        key (bytes): The secret key.
+        value (Any): The identifier, e.g. a user_id.
+
+    Returns:
+        str, optional: The hex digest, None for None.
+    """
+    if value is None:
+        return None
+    return hmac.new(key, str(value).encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def export_schema(statement: Select, pseudonymized: Tuple[str, ...],
+                  partitioned: bool) -> pa.Schema:
+    """
+    Builds the Arrow schema of the exported rows of a statement.
+
+    Args:
+        statement (Select): The dataset statement.
+        pseudonymized (Tuple[str, ...]): The columns exported as hashes.
+        partitioned (bool): Whether the partition column is added.
+
+    Returns:
+        pa.Schema: The schema, pseudonymized columns are strings.
+    """
+    fields = [pa.field(column.key, pa.string() if column.key in pseudonymized
+                       else arrow_type(column.type))
+              for column in statement.selected_columns]
+    if partitioned:
+        fields.append(pa.field(PARTITION_COLUMN, pa.string()))
+    return pa.schema(fields)
+
+
+def exported_keys(path: str, file_format: str, column: str, above: int) -> Set[int]:
+    """
+    Returns the values of an integer column above a bound in an exported
+    dataset, the row group statistics skip the older files.
+
+    Args:
+        path (str): The dataset directory.
+        file_format (str): 'parquet' or 'ipc' (Arrow IPC).
+        column (str): The key column.
+        above (int): Only values greater than this.
+
+    Returns:
+        Set[int]: The exported values, empty before the first export.
+    """
+    if not os.path.isdir(path):
+        return set()
+    dataset = ds.dataset(path, format=file_format, partitioning='hive')
+    table = dataset.to_table(columns=[column], filter=ds.field(column) > above)
+    return set(table.column(column).to_pylist())
+
+
+def _record_batches(connection: Connection, statement: Select, schema: pa.Schema,
+                    partition_column: Optional[str], pseudonymized: Tuple[str, ...],
+                    key: bytes, batch_size: int, watermark_column: Optional[str],
+                    progress: Dict[str, Any],
+                    skipped: Optional[Set[int]] = None) -> Iterator[pa.RecordBatch]:
+    """
+    Streams the rows of the statement as record batches of at most batch_size
+    rows, counting them and tracking the highest watermark in progress.
+    Rows whose watermark column is in skipped are left out.
+    """
+    result = connection.execution_options(yield_per=batch_size).execute(statement)
+    for rows in result.partitions():
+        columns = dict(zip(result.keys(), zip(*rows)))
+        for name in pseudonymized:
+            columns[name] = [pseudonymize(key, value) for value in columns[name]]
+        arrays = [pa.array(columns[field.name], type=field.type)
+                  for field in schema if field.name != PARTITION_COLUMN]
+        if partition_column is not None:
+            arrays.append(pc.strftime(arrays[schema.get_field_index(partition_column)],
+                                      format='%Y-%m'))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+        if skipped:
+            batch = batch.filter(pc.invert(pc.is_in(batch.column(watermark_column),
+                                                    value_set=pa.array(list(skipped), pa.int64()))))
+            if not batch.num_rows:
+                continue
+        progress['rows'] += batch.num_rows
+        if watermark_column is not None:
+            highest = pc.max(batch.column(watermark_column)).as_py()
+            if progress['watermark'] is None or highest > progress['watermark']:
+                progress['watermark'] = highest
+        yield batch
+
+
+def export_dataset(connection: Connection, name: str, output_dir: str,
+                   since: Optional[Any] = None, file_format: str = 'parquet',
+                   key: bytes = b'', batch_size: int = EXPORT_BATCH_SIZE
+                   ) -> Tuple[int, Optional[Any]]:
+    """
+    Streams one dataset into <output_dir>/<name>, partitioned by month
+    (hive style, month=YYYY-MM) when the dataset has a partition column.
+
+    Rows are read with a server side cursor batch_size rows at a time and
+    written as they arrive, so memory does not grow with the table. An
+    incremental export appends new files, consumers keep the latest row
+    per primary key (updated rows are exported again). Rows committed late
+    are caught by re-reading behind the watermark, UPDATE_OVERLAP for
+    timestamps and SALES_RECORD_OVERLAP for ids; the re-read ids already
+    in the dataset are not written twice.
+
+    Args:
+        connection (Connection): The database connection.
+        name (str): One of EXPORT_DATASETS.
+        output_dir (str): The export directory.
+        since (Any, optional): The watermark of the previous export,
+            only rows above it are exported.
+        file_format (str): 'parquet' or 'ipc' (Arrow IPC).
+        key (bytes): The secret key of the pseudonymized columns.
+        batch_size (int): The number of rows fetched and written at once.
+
+    Returns:
+        Tuple[int, Optional[Any]]: The number of exported rows and the new
+        watermark, None for datasets replaced on every export.
+    """
+    statement, watermark_column, partition_column, pseudonymized = EXPORT_DATASETS[name]
+    partition_key = partition_column.key if partition_column is not None else None
+    watermark_key = watermark_column.key if watermark_column is not None else None
+    skipped: Set[int] = set()
+    if watermark_column is not None and since is not None:
+        if isinstance(watermark_column.type, DateTime):
+            statement = statement.where(watermark_column > since - UPDATE_OVERLAP)
+        else:
+            statement = statement.where(watermark_column > since - SALES_RECORD_OVERLAP)
+            skipped = exported_keys(os.path.join(output_dir, name), file_format, watermark_key,
+                                    since - SALES_RECORD_OVERLAP)
+
+    schema = export_schema(statement, pseudonymized, partition_key is not None)
+    progress = {'rows': 0, 'watermark': since}
+    batches = _record_batches(connection, statement, schema, partition_key, pseudonymized,
+                              key, batch_size, watermark_key, progress, skipped)
+
+    run = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    ds.write_dataset(
+        pa.RecordBatchReader.from_batches(schema, batches),
+        os.path.join(output_dir, name),
+        format=file_format,
+        partitioning=[PARTITION_COLUMN] if partition_key is not None else None,
+        partitioning_flavor='hive',
+        basename_template=f'part-{run}-{{i}}.{FILE_FORMATS[file_format]}',
+        # Row groups are flushed per batch instead of buffering up to 1M rows
+        max_rows_per_group=batch_size,
+        # Datasets without a watermark are replaced, the others appended to
+        existing_data_behavior=('overwrite_or_ignore' if watermark_column is not None
+                                else 'delete_matching'),
+    )
+    return progress['rows'], progress['watermark'] if watermark_column is not None else None
+
+
+def read_export_state(output_dir: str) -> Dict[str, Any]:
+    """
+    Reads the watermarks of the previous exports into the directory.
+
+    Args:
+        output_dir (str): The export directory.
+
+    Returns:
+        Dict[str, Any]: Dataset -> watermark, empty before the first export.
+    """
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        state = json.load(file)
+    for name, value in state.items():
+        _, watermark_column, _, _ = EXPORT_DATASETS[name]
+        if isinstance(watermark_column.type, DateTime):
+            state[name] = datetime.fromisoformat(value)
+    return state
+
+
+def write_export_state(output_dir: str, state: Dict[str, Any]) -> None:
+    """
+    Saves the watermarks atomically, after the files have been written.
+
+    Args:
+        output_dir (str): The export directory.
+        state (Dict[str, Any]): Dataset -> watermark.
+    """
+    path = os.path.join(output_dir, STATE_FILE)
+    serialized = {name: value.isoformat() if isinstance(value, datetime) else value
+                  for name, value in state.items() if value is not None}
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(serialized, file, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def export_analytics(engine: Engine, output_dir: str, full: bool = False,
+                     file_format: str = 'parquet', hash_key: Optional[str] = None,
+                     batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Exports the anonymized analytics datasets (EXPORT_DATASETS) for third
+    parties. User ids are replaced by keyed hashes, addresses by country
+    and city, names, emails, phone numbers and VINs are never exported.
+
+    Args:
+        engine (Engine): The engine of the database.
+        output_dir (str): The export directory, holding the export state.
+        full (bool): Ignore the watermarks and export every row.
+            Existing files of appended datasets are not removed.
+        file_format (str): 'parquet' or 'ipc' (Arrow IPC).
+        hash_key (str, optional): The secret key of the pseudonymized columns,
+            defaults to settings.EXPORT_HASH_KEY.
+        batch_size (int): The number of rows fetched and written at once.
+
+    Returns:
+        Dict[str, int]: The number of exported rows per dataset.
+
+    Raises:
+        ValueError: If the file format is unknown or no hash key is set.
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"File format must be one of {', '.join(FILE_FORMATS)}")
+    hash_key = hash_key or settings.EXPORT_HASH_KEY
+    if not hash_key:
+        raise ValueError("Set EXPORT_HASH_KEY to pseudonymize user ids")
+
+    os.makedirs(output_dir, exist_ok=True)
+    state = {} if full else read_export_state(output_dir)
+    exported = {}
+    for name in EXPORT_DATASETS:
+        with engine.connect() as connection:
+            exported[name], state[name] = export_dataset(
+                connection, name, output_dir, state.get(name), file_format,
+                hash_key.encode('utf-8'), batch_size)
+        write_export_state(output_dir, state)
+    return exported
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Anonymized analytics export into partitioned Parquet or Arrow IPC files.')
+    parser.add_argument('output_dir')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore the watermarks of the previous export')
+    parser.add_argument('--format', choices=list(FILE_FORMATS), default='parquet')
+    parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    counts = export_analytics(get_engine(settings.DATABASE_URL_psycopg), args.output_dir,
+                              args.full, args.format, batch_size=args.batch_size)
+    for name, rows in counts.items():
+        print(f'\033[1;32;40m{name}: {rows} rows exported\033[0m')
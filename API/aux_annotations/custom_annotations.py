@@ -4,11 +4,17 @@ from sqlalchemy.orm import mapped_column
 from sqlalchemy import text
 
 
+# Current UTC time of the database, SQLite gets now() and TIMEZONE()
+# from database_session.register_sqlite_functions
+UTC_NOW = "TIMEZONE('utc', now())"
+
 # Postgres specific dialect, do not use it in SQLite
 created_at = Annotated[datetime, mapped_column(
-    server_default=text("TIMEZONE('utc', now())"))]
+    server_default=text(UTC_NOW))]
 
-# Postgres specific dialect, do not use it in SQLite
+# Postgres specific dialect, do not use it in SQLite.
+# Updates are stamped in UTC too, updated_at is the watermark of the
+# rollups, the comparables index and the analytics export.
 updated_at = Annotated[datetime, mapped_column(
-    server_default=text("TIMEZONE('utc', now())"),
-    onupdate=datetime.now)]
\ No newline at end of file
+    server_default=text(UTC_NOW),
+    onupdate=text(UTC_NOW))]
\ No newline at end of file
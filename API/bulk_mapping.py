@@ -0,0 +1,74 @@
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel
+from database_model import Base
+
+
+@lru_cache(maxsize=None)
+def _row_plan(dto: Type[BaseModel], model: Type[Base],
+              renamed: Tuple[Tuple[str, str], ...],
+              excluded: Tuple[str, ...]) -> Tuple[itemgetter, Tuple[str, ...]]:
+    """
+    Computes once per DTO class which fields are copied to which columns.
+
+    Returns:
+        Tuple[itemgetter, Tuple[str, ...]]: Getter of the field values and
+        the column names, in the same order.
+    """
+    renames = dict(renamed)
+    columns = set(model.__table__.columns.keys())
+    fields, names = [], []
+    for field in dto.model_fields:
+        column = renames.get(field, field)
+        if field not in excluded and column in columns:
+            fields.append(field)
+            names.append(column)
+    if len(fields) == 1:
+        # itemgetter of one key returns the value, not a tuple
+        return (lambda values, field=fields[0]: (values[field],)), tuple(names)
+    return itemgetter(*fields), tuple(names)
+
+
+def dto_rows(dtos: Sequence[BaseModel],
+             model: Type[Base],
+             renamed: Optional[Mapping[str, str]] = None,
+             excluded: Sequence[str] = (),
+             extra: Optional[Dict] = None) -> List[Dict]:
+    """
+    Converts validated DTOs to the column values of a table,
+    ready for an executemany of a Core insert().
+
+    Unlike key_args(), no model_dump() dictionary is built per DTO: the
+    field values are read from the validated instance and copied to the
+    columns planned once per DTO class. The fields must hold plain column
+    values, nested models are not dumped.
+
+    Args:
+        dtos (Sequence[BaseModel]): The validated DTOs, of one or several classes.
+        model (Type[Base]): The ORM model of the table.
+        renamed (Mapping[str, str], optional): DTO field -> column, for fields
+            named differently from their column.
+        excluded (Sequence[str]): DTO fields which are not saved.
+            Fields without a column are left out anyway.
+        extra (Dict, optional): Values of other columns, the same for every row.
+
+    Returns:
+        List[Dict]: Column values of every DTO, in the order of the DTOs.
+    """
+    renamed = tuple((renamed or {}).items())
+    excluded = tuple(excluded)
+    extra = extra or {}
+
+    rows = []
+    plan_of: Dict[type, Tuple[itemgetter, Tuple[str, ...]]] = {}
+    for dto in dtos:
+        plan = plan_of.get(type(dto))
+        if plan is None:
+            plan = plan_of[type(dto)] = _row_plan(type(dto), model, renamed, excluded)
+        getter, columns = plan
+        row = dict(zip(columns, getter(dto.__dict__)))
+        if extra:
+            row.update(extra)
+        rows.append(row)
+    return rows
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +10,21 @@ class Settings(BaseSettings):
     DB_PASS: str
     DB_NAME: str
 
+    # Connection pool, see database_session.get_engine()
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_ECHO: bool = False
+
+    # Statement timing, slow-query log and N+1 detection (sql_instrumentation.py)
+    DB_INSTRUMENT: bool = False
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_N_PLUS_ONE_THRESHOLD: int = 10
+
+    # Secret key pseudonymizing user ids in analytics exports (analytics_export.py)
+    EXPORT_HASH_KEY: Optional[str] = None
+
     @property
     def DATABASE_URL_psycopg(self) -> str:
         return f"postgresql+psycopg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
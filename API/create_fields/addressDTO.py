@@ -1,6 +1,4 @@
-from API.Validators.address_input.address_valid import address_validator_func
-from API.Validators.address_input.state_valid import state_validator_func
-from API.Validators.address_input.zip_code_valid import zip_code_validator_func
+from API.Validators.address_input import validation_core
 from typing import Dict
 from datetime import datetime
 
@@ -41,7 +39,7 @@ class UserAddressAddDTO(BaseModel):
 
         :return: The address of the user (str).
         """
-        return address_validator_func(address)
+        return validation_core.validate_address(address)
 
     @field_validator('state')
     @classmethod
@@ -50,7 +48,7 @@ class UserAddressAddDTO(BaseModel):
 
         :return: The state of the user (str).
         """
-        return state_validator_func(state)
+        return validation_core.validate_state(state)
 
     @field_validator('zip_code')
     @classmethod
@@ -59,7 +57,7 @@ class UserAddressAddDTO(BaseModel):
 
         :return: The zip code of the user (str).
         """
-        return zip_code_validator_func(zip_code)
+        return validation_core.validate_zip_code(zip_code)
 
     def key_args(self) -> Dict[str, str]:
         """
@@ -3,6 +3,9 @@ from typing import Optional, Dict
 from abc import abstractmethod
 from pydantic import BaseModel
 
+# Default of the optional fields, saved as NULL (insert_new_ad.detail_values)
+NOT_PROVIDED = "Not provided"
+
 
 class AbstractVehicle(BaseModel):
     """Represents a vehicle abstract class to be inherited
@@ -81,20 +84,20 @@ class AbstractVehicle(BaseModel):
     average_consumption: float
     vin_number: str
 
-    body_type: Optional[str] = "Not provided"
-    wheel_drive: Optional[str] = "Not provided"
-    interior: Optional[str] = "Not provided"
-    audio_video_system: Optional[str] = "Not provided"
-    wheels_discs: Optional[str] = "Not provided"
-    safety_equip: Optional[str] = "Not provided"
-    lights: Optional[str] = "Not provided"
-    comfort_equip: Optional[str] = "Not provided"
-    miscell_equip: Optional[str] = "Not provided"
-    miscell_info: Optional[str] = "Not provided"
-    number_of_seats: Optional[str] = "Not provided"
-    number_of_doors: Optional[str] = "Not provided"
-    empty_weight: Optional[str] = "Not provided"
-    max_weight: Optional[str] = "Not provided"
+    body_type: Optional[str] = NOT_PROVIDED
+    wheel_drive: Optional[str] = NOT_PROVIDED
+    interior: Optional[str] = NOT_PROVIDED
+    audio_video_system: Optional[str] = NOT_PROVIDED
+    wheels_discs: Optional[str] = NOT_PROVIDED
+    safety_equip: Optional[str] = NOT_PROVIDED
+    lights: Optional[str] = NOT_PROVIDED
+    comfort_equip: Optional[str] = NOT_PROVIDED
+    miscell_equip: Optional[str] = NOT_PROVIDED
+    miscell_info: Optional[str] = NOT_PROVIDED
+    number_of_seats: Optional[str] = NOT_PROVIDED
+    number_of_doors: Optional[str] = NOT_PROVIDED
+    empty_weight: Optional[str] = NOT_PROVIDED
+    max_weight: Optional[str] = NOT_PROVIDED
 
     @abstractmethod
     def key_args(self):
@@ -0,0 +1,41 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ComparableListingDTO(BaseModel):
+    """Represents a listing comparable to a vehicle being priced.
+
+    Attributes:
+        ad_id: (int): The advertisement of the listing.
+        price: (int): The price of the listing.
+        year: (int): The year of manufacture.
+        mileage: (int): The mileage.
+        power_output: (int): The power output.
+        fuel: (str): The fuel type.
+        sold: (bool): Sold (True) or still active (False).
+        distance: (float): How different the listing is, 0 for an identical vehicle.
+    """
+    ad_id: int
+    price: int
+    year: int
+    mileage: int
+    power_output: int
+    fuel: str
+    sold: bool
+    distance: float
+
+
+class PriceEstimateDTO(BaseModel):
+    """Represents the suggested price of a vehicle.
+
+    Attributes:
+        estimated_price: (int): The suggested price, None without comparables.
+        price_low: (int): The lower quartile of the comparable prices.
+        price_high: (int): The upper quartile of the comparable prices.
+        comparables: (List[ComparableListingDTO]): The nearest listings, nearest first.
+    """
+    estimated_price: Optional[int] = None
+    price_low: Optional[int] = None
+    price_high: Optional[int] = None
+    comparables: List[ComparableListingDTO] = []
@@ -0,0 +1,54 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class AdvertisementFilterDTO(BaseModel):
+    """Represents the filters of an advertisement search.
+    Every filter is optional, None means the filter is not applied.
+
+    Attributes:
+        maker: (str): The manufacturer of the vehicle.
+        model: (str): The model of the vehicle.
+        category_id: (int): The category of the vehicle.
+        price_min: (int): The lowest price.
+        price_max: (int): The highest price.
+        mileage_min: (int): The lowest mileage.
+        mileage_max: (int): The highest mileage.
+        fuel: (str): The fuel type.
+        gearbox: (str): The gearbox type.
+        year_min: (int): The earliest year of manufacture.
+        year_max: (int): The latest year of manufacture.
+        used: (bool): Used or new vehicles.
+        discontinued: (bool): Discontinued or active advertisements.
+            Defaults to False (active advertisements only).
+
+    Class method validators:
+        validate_ranges(self): Checks that every minimum is not above its maximum.
+    """
+    maker: Optional[str] = None
+    model: Optional[str] = None
+    category_id: Optional[int] = None
+    price_min: Optional[int] = Field(default=None, ge=0)
+    price_max: Optional[int] = Field(default=None, ge=0)
+    mileage_min: Optional[int] = Field(default=None, ge=0)
+    mileage_max: Optional[int] = Field(default=None, ge=0)
+    fuel: Optional[str] = None
+    gearbox: Optional[str] = None
+    year_min: Optional[int] = Field(default=None, ge=1886, le=9998)
+    year_max: Optional[int] = Field(default=None, ge=1886, le=9998)
+    used: Optional[bool] = None
+    discontinued: Optional[bool] = False
+
+    @model_validator(mode='after')
+    def validate_ranges(self) -> 'AdvertisementFilterDTO':
+        """Checks that every minimum is not above its maximum.
+
+        :return: The filter (AdvertisementFilterDTO).
+        """
+        for name in ('price', 'mileage', 'year'):
+            low = getattr(self, f'{name}_min')
+            high = getattr(self, f'{name}_max')
+            if low is not None and high is not None and low > high:
+                raise ValueError(f"{name}_min cannot be greater than {name}_max")
+        return self
@@ -1,14 +1,11 @@
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 
-from API.Validators.user_input.gender_valid import gender_validator_func
-from API.Validators.user_input.phone_number_valid import phone_number_validator_func
-from API.Validators.user_input.email_valid import email_validator_func
-from API.Validators.user_input.name_valid import name_validator_func
-from API.Validators.user_input.username_valid import username_validate_func
+from API.Validators.user_input import validation_core
+from API.Validators.user_input.phone_number_valid import validate_phone_number
 from datetime import datetime
 
-from pydantic import BaseModel, field_validator, Field
-from addressDTO import UserAddressDTO
+from pydantic import BaseModel, field_validator, Field, ValidationInfo
+from create_fields.addressDTO import UserAddressDTO
 
 
 class UserAddDTO(BaseModel):
@@ -33,6 +30,7 @@ class UserAddDTO(BaseModel):
         validate_name(cls, first/last name: str)
         validate_email_address(cls, address: str)
         validate_phone_number(cls, number: str)
+        validate_additional_phone_number(cls, number: str | None)
         validate_gender(cls, gender: str)
     """
     username: str
@@ -40,7 +38,7 @@ class UserAddDTO(BaseModel):
     last_name: str
     email_address: str
     main_phone_number: str
-    additional_phone_number: Union[str, None, Field(validate_default=True)] = None
+    additional_phone_number: Optional[str] = Field(default=None, validate_default=True)
     gender: str
     address_id: int
 
@@ -51,16 +49,16 @@ class UserAddDTO(BaseModel):
 
         :return: The username (str).
         """
-        return username_validate_func(username)
+        return validation_core.validate_username(username)
 
     @field_validator('first_name', 'last_name')
     @classmethod
-    def validate_name(cls, name: str) -> str:
+    def validate_name(cls, name: str, info: ValidationInfo) -> str:
         """Validates the name.
 
         :return: The name (str).
         """
-        return name_validator_func(name)
+        return validation_core.validate_name(name, info.field_name)
 
     @field_validator('email_address')
     @classmethod
@@ -69,7 +67,7 @@ class UserAddDTO(BaseModel):
 
         :return: The email address (str).
         """
-        return email_validator_func(address)
+        return validation_core.validate_email(address)
 
 
 
@@ -80,11 +78,11 @@ class UserAddDTO(BaseModel):
 
         :return: The phone number (str).
         """
-        return phone_number_validator_func(number)
+        return validate_phone_number(number)
 
     @field_validator('additional_phone_number')
     @classmethod
-    def validate_phone_number(
+    def validate_additional_phone_number(
             cls, number: Union[str, None]) -> Union[str, None]:
         """Validates the phone number.
 
@@ -92,7 +90,7 @@ class UserAddDTO(BaseModel):
         """
         if number is None:
             return None
-        return phone_number_validator_func(number)
+        return validate_phone_number(number, 'additional_phone_number')
 
     @field_validator('gender')
     @classmethod
@@ -101,7 +99,7 @@ class UserAddDTO(BaseModel):
 
         :return: The gender (str).
         """
-        return gender_validator_func(gender)
+        return validation_core.validate_gender(gender)
 
     def key_args(self) -> Dict[str, str]:
         """
@@ -1,7 +1,7 @@
 from typing import Optional, List
-from datetime import datetime
-from sqlalchemy import (create_engine, Integer, String, DateTime,
-                        ForeignKey, Float, Boolean, UniqueConstraint,
+from datetime import datetime, date
+from sqlalchemy import (Integer, BigInteger, String, DateTime,
+                        Date, ForeignKey, Float, Boolean,
                         CheckConstraint, Index)
 
 from sqlalchemy.orm import (relationship, Mapped,
@@ -10,6 +10,7 @@ from sqlalchemy.orm import (relationship, Mapped,
 from aux_annotations.custom_annotations import created_at, updated_at
 
 from config import settings
+from database_session import get_engine
 import enum
 
 
@@ -30,6 +31,7 @@ class Address(Base):
             country (str): The country.
             created_at (datetime): The creation timestamp.
             updated_at (datetime): The last update timestamp.
+            users (list of User): The users living at the address.
         """
 
     __tablename__ = 'addresses'
@@ -44,7 +46,7 @@ class Address(Base):
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
 
-    user: Mapped["User"] = relationship(back_populates='addresses')
+    users: Mapped[List["User"]] = relationship(back_populates='addresses')
 
     def __repr__(self) -> str:
         return (f"Address(address_id={self.address_id},"
@@ -91,9 +93,10 @@ class User(Base):
     registered_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
 
-    address_id: Mapped["Address"] = mapped_column(ForeignKey('addresses.address_id'), unique=True)
+    # Users may share an address, addresses are reused on address_hash
+    address_id: Mapped["Address"] = mapped_column(ForeignKey('addresses.address_id'))
     addresses: Mapped["Address"] = relationship(
-        back_populates='user', uselist=False)
+        back_populates='users')
 
     advertisements: Mapped[List["Advertisement"]] = relationship(
         back_populates='user')
@@ -102,7 +105,7 @@ class User(Base):
     #     back_populates='user')
 
     sales_as_seller: Mapped[List["SalesRecords"]] = relationship(
-        back_populates="seller", foreign_keys="[SalesRecord.seller_id]"
+        back_populates="seller", foreign_keys="[SalesRecords.seller_id]"
     )
 
     sales_as_buyer: Mapped[List["SalesRecords"]] = relationship(
@@ -110,10 +113,9 @@ class User(Base):
     )
 
     __table_args__ = (
-        UniqueConstraint('address_id'),
         # Index('title_index', 'title'),
-        CheckConstraint('gender IN ("male", "female", "other", "unknown")'),
-        CheckConstraint('user_property IN ("r", "b")'),
+        CheckConstraint("gender IN ('male', 'female', 'other', 'unknown')"),
+        CheckConstraint("user_property IN ('r', 'b')"),
     )
 
     def __repr__(self) -> str:
@@ -150,11 +152,16 @@ class SalesRecords(Base):
     advertisement_id: Mapped[int] = mapped_column(ForeignKey('advertisements.ad_id'))
 
     seller: Mapped["User"] = relationship(
-        "User", back_populates="users.sales_as_seller", foreign_keys=[seller_id])
+        "User", back_populates="sales_as_seller", foreign_keys=[seller_id])
     buyer: Mapped["User"] = relationship(
-        "User", back_populates="users.sales_as_buyer", foreign_keys=[buyer_id])
+        "User", back_populates="sales_as_buyer", foreign_keys=[buyer_id])
 
-    advertisement: Mapped["Advertisement"] = relationship(back_populates='sales_records')
+    advertisement: Mapped["Advertisement"] = relationship(back_populates='sales_record')
+
+    __table_args__ = (
+        # Day ranges recomputed by the sales rollup (market_analytics.py)
+        Index('ix_sales_records_sale_date', 'sale_date'),
+    )
 
     def __repr__(self) -> str:
         return (f"SalesRecords(record_id={self.record_id},"
@@ -206,25 +213,12 @@ class Advertisement(Base):
             engine_volume (float): The engine volume.
             average_consumption (float): The average consumption.
             vin_number (str): The VIN number.
-            body_type (str, optional): The body type.
-            wheel_drive (str, optional): The wheel drive type.
-            description (str, optional): The description.
-            interior (str, optional): The interior.
-            audio_video_system (str, optional): The audio/video system.
-            wheels_discs (str, optional): The wheels discs.
-            safety_equip (str, optional): The safety equipment.
-            lights (str, optional): The lights.
-            comfort_equip (str, optional): The comfort equipment.
-            miscell_equip (str, optional): The miscellaneous equipment.
-            miscell_info (str, optional): The miscellaneous information.
-            number_of_seats (str, optional): The number of seats.
-            number_of_doors (str, optional): The number of doors.
-            empty_weight (str, optional): The empty weight.
-            max_weight (str, optional): The maximum weight.
             created_at (datetime): The creation timestamp.
             updated_at (datetime): The last update timestamp.
             user (User): The related user.
             vehicle (Vehicle): The related vehicle.
+            details (AdvertisementDetails, optional): The optional text fields,
+                None when the advertisement has none.
         """
 
     __tablename__ = 'advertisements'
@@ -254,26 +248,6 @@ class Advertisement(Base):
     vin_number: Mapped[str] = mapped_column(
         String(40), nullable=False, unique=True)
 
-    body_type: Mapped[Optional[str]]
-    wheel_drive: Mapped[Optional[str]]
-    description: Mapped[Optional[str]]
-    interior: Mapped[Optional[str]]
-    audio_video_system: Mapped[Optional[str]]
-    wheels_discs: Mapped[Optional[str]]
-    safety_equip: Mapped[Optional[str]]
-    lights: Mapped[Optional[str]]
-    comfort_equip: Mapped[Optional[str]]
-
-    # Miscellaneous equpment
-    miscell_equip: Mapped[Optional[str]]
-
-    # Miscellaneous information
-    miscell_info: Mapped[Optional[str]]
-    number_of_seats: Mapped[Optional[str]]
-    number_of_doors: Mapped[Optional[str]]
-    empty_weight: Mapped[Optional[str]]
-    max_weight: Mapped[Optional[str]]
-
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
 
@@ -284,15 +258,30 @@ class Advertisement(Base):
     vehicle: Mapped["Vehicle"] = relationship(back_populates='advertisements', uselist=False)
 
     sales_record: Mapped["SalesRecords"] = relationship(
-        back_populates="advertisements"
+        back_populates="advertisement"
     )
 
+    details: Mapped[Optional["AdvertisementDetails"]] = relationship(
+        back_populates='advertisement', uselist=False, cascade='all, delete-orphan')
+
     __table_args__ = (
         CheckConstraint(price > 0),
         CheckConstraint(mileage > 0),
         CheckConstraint(power_output > 0),
         CheckConstraint(engine_volume > 0),
         CheckConstraint(average_consumption > 0),
+        # Search and listing indexes (advertisement_search.py), partial on active
+        # advertisements. (sort key, ad_id) indexes serve the keyset pagination.
+        # The '== False' predicates must match the queries literally.
+        Index('ix_advertisements_active_vehicle_price', vehicle_id, price,
+              postgresql_where=(discontinued == False), sqlite_where=(discontinued == False)),
+        Index('ix_advertisements_active_price', price, ad_id,
+              postgresql_where=(discontinued == False), sqlite_where=(discontinued == False)),
+        Index('ix_advertisements_active_created_at', 'created_at', ad_id,
+              postgresql_where=(discontinued == False), sqlite_where=(discontinued == False)),
+        Index('ix_advertisements_user_id', user_id),
+        # Changed advertisements picked up by the analytics rollups
+        Index('ix_advertisements_updated_at', 'updated_at'),
     )
 
     def __repr__(self) -> str:
@@ -311,6 +300,66 @@ class Advertisement(Base):
                 f" engine_volume={self.engine_volume},"
                 f" average_consumption={self.average_consumption},"
                 f" vin_number={self.vin_number},"
+                f" created_at={self.created_at},"
+                f" updated_at={self.updated_at})")
+
+
+class AdvertisementDetails(Base):
+    """Model representing the optional text fields of an advertisement.
+
+    Kept out of the advertisements table, read by searches and listings,
+    and loaded for the advertisement page only. Values not provided are
+    NULL, advertisements without any have no row.
+
+        Attributes:
+            ad_id (int): The primary key, and foreign key referencing the advertisement.
+            body_type (str, optional): The body type.
+            wheel_drive (str, optional): The wheel drive type.
+            description (str, optional): The description.
+            interior (str, optional): The interior.
+            audio_video_system (str, optional): The audio/video system.
+            wheels_discs (str, optional): The wheels discs.
+            safety_equip (str, optional): The safety equipment.
+            lights (str, optional): The lights.
+            comfort_equip (str, optional): The comfort equipment.
+            miscell_equip (str, optional): The miscellaneous equipment.
+            miscell_info (str, optional): The miscellaneous information.
+            number_of_seats (str, optional): The number of seats.
+            number_of_doors (str, optional): The number of doors.
+            empty_weight (str, optional): The empty weight.
+            max_weight (str, optional): The maximum weight.
+            advertisement (Advertisement): The related advertisement.
+        """
+
+    __tablename__ = 'advertisement_details'
+
+    ad_id: Mapped[int] = mapped_column(
+        ForeignKey('advertisements.ad_id', ondelete='CASCADE'), primary_key=True)
+
+    body_type: Mapped[Optional[str]]
+    wheel_drive: Mapped[Optional[str]]
+    description: Mapped[Optional[str]]
+    interior: Mapped[Optional[str]]
+    audio_video_system: Mapped[Optional[str]]
+    wheels_discs: Mapped[Optional[str]]
+    safety_equip: Mapped[Optional[str]]
+    lights: Mapped[Optional[str]]
+    comfort_equip: Mapped[Optional[str]]
+
+    # Miscellaneous equpment
+    miscell_equip: Mapped[Optional[str]]
+
+    # Miscellaneous information
+    miscell_info: Mapped[Optional[str]]
+    number_of_seats: Mapped[Optional[str]]
+    number_of_doors: Mapped[Optional[str]]
+    empty_weight: Mapped[Optional[str]]
+    max_weight: Mapped[Optional[str]]
+
+    advertisement: Mapped["Advertisement"] = relationship(back_populates='details')
+
+    def __repr__(self) -> str:
+        return (f"AdvertisementDetails(ad_id={self.ad_id},"
                 f" body_type={self.body_type},"
                 f" wheel_drive={self.wheel_drive},"
                 f" description={self.description},"
@@ -325,9 +374,12 @@ class Advertisement(Base):
                 f" number_of_seats={self.number_of_seats},"
                 f" number_of_doors={self.number_of_doors},"
                 f" empty_weight={self.empty_weight},"
-                f" max_weight={self.max_weight},"
-                f" created_at={self.created_at},"
-                f" updated_at={self.updated_at})")
+                f" max_weight={self.max_weight})")
+
+
+# Columns of advertisement_details besides the key, in table order
+ADVERTISEMENT_DETAIL_COLUMNS = tuple(column.name for column in AdvertisementDetails.__table__.columns
+                                     if column.name != 'ad_id')
 
 
 class Vehicle(Base):
@@ -351,7 +403,12 @@ class Vehicle(Base):
     category_id: Mapped[int] = mapped_column(ForeignKey('categories.category_id'))
     category: Mapped["Category"] = relationship(back_populates='vehicles', uselist=False)
 
-    advertisements: Mapped["Advertisement"] = relationship(back_populates='vehicles')
+    advertisements: Mapped[List["Advertisement"]] = relationship(back_populates='vehicle')
+
+    __table_args__ = (
+        Index('ix_vehicles_maker_model', maker, model),
+        Index('ix_vehicles_category_id', category_id),
+    )
 
     def __repr__(self) -> str:
         return (f"Vehicle(vehicle_id={self.vehicle_id},"
@@ -360,12 +417,108 @@ class Vehicle(Base):
                 f" category_id={self.category_id})")
 
 
+class SalesDailyRollup(Base):
+    """Model representing the pre-aggregated daily sales (market_analytics.py).
+
+        Attributes:
+            sale_day (date): The day of the sales.
+            maker (str): The maker of the sold vehicles.
+            model (str): The model of the sold vehicles.
+            sales_count (int): The number of sales.
+            revenue (int): The sum of the advertisement prices.
+        """
+
+    __tablename__ = 'sales_daily_rollup'
+
+    sale_day: Mapped[date] = mapped_column(Date, primary_key=True)
+    maker: Mapped[str] = mapped_column(String(20), primary_key=True)
+    model: Mapped[str] = mapped_column(String(20), primary_key=True)
+    sales_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    revenue: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    def __repr__(self) -> str:
+        return (f"SalesDailyRollup(sale_day={self.sale_day},"
+                f" maker={self.maker}, model={self.model},"
+                f" sales_count={self.sales_count}, revenue={self.revenue})")
+
+
+class ActiveAdsLocationRollup(Base):
+    """Model representing the pre-aggregated active advertisements
+    by seller location (market_analytics.py).
+
+        Attributes:
+            country (str): The country of the sellers.
+            city (str): The city of the sellers.
+            active_ads (int): The number of active advertisements.
+        """
+
+    __tablename__ = 'active_ads_location_rollup'
+
+    country: Mapped[str] = mapped_column(String(40), primary_key=True)
+    city: Mapped[str] = mapped_column(String(40), primary_key=True)
+    active_ads: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return (f"ActiveAdsLocationRollup(country={self.country},"
+                f" city={self.city}, active_ads={self.active_ads})")
+
+
+class ModelYearPriceRollup(Base):
+    """Model representing the pre-aggregated prices of active advertisements
+    by model and year of manufacture (market_analytics.py).
+
+        Attributes:
+            maker (str): The maker of the vehicles.
+            model (str): The model of the vehicles.
+            year (int): The year of manufacture.
+            ad_count (int): The number of active advertisements.
+            median_price (float): The median price.
+        """
+
+    __tablename__ = 'model_year_price_rollup'
+
+    maker: Mapped[str] = mapped_column(String(20), primary_key=True)
+    model: Mapped[str] = mapped_column(String(20), primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ad_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    median_price: Mapped[float] = mapped_column(Float, nullable=False)
+
+    def __repr__(self) -> str:
+        return (f"ModelYearPriceRollup(maker={self.maker}, model={self.model},"
+                f" year={self.year}, ad_count={self.ad_count},"
+                f" median_price={self.median_price})")
+
+
+class RollupWatermark(Base):
+    """Model representing how far a rollup has processed its base table.
+
+        Attributes:
+            rollup_name (str): The name of the rollup table.
+            last_id (int, optional): The last processed primary key.
+            last_updated_at (datetime, optional): The last processed update timestamp.
+            refreshed_at (datetime): The time of the last refresh.
+        """
+
+    __tablename__ = 'rollup_watermarks'
+
+    rollup_name: Mapped[str] = mapped_column(String(40), primary_key=True)
+    last_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return (f"RollupWatermark(rollup_name={self.rollup_name},"
+                f" last_id={self.last_id},"
+                f" last_updated_at={self.last_updated_at},"
+                f" refreshed_at={self.refreshed_at})")
+
+
 if __name__ == "__main__":
     # By default, the engine is created using the environment variables
     # from .env file.
     # use select_database() to change the engine to use a different database
-    # example: engine = create_engine(select_database(), echo=True)
-    engine = create_engine(settings.DATABASE_URL_psycopg, echo=True)
+    # example: engine = get_engine(select_database())
+    engine = get_engine(settings.DATABASE_URL_psycopg)
     Base.metadata.create_all(engine)
 
 
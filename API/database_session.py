@@ -0,0 +1,122 @@
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, Engine, make_url, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from config import settings
+
+_engines: Dict[str, Engine] = {}
+_session_factories: Dict[str, sessionmaker] = {}
+_lock = threading.Lock()
+
+
+def engine_options(url: str) -> dict:
+    """
+    Builds the create_engine keyword arguments from the settings.
+
+    Args:
+        url (str): The database connection string.
+
+    Returns:
+        dict: Keyword arguments for sqlalchemy.create_engine.
+    """
+    options = {'echo': settings.DB_ECHO, 'pool_pre_ping': settings.DB_POOL_PRE_PING}
+    if make_url(url).get_backend_name() != 'sqlite':
+        # SQLite uses its own pool classes without size and overflow
+        options.update(pool_size=settings.DB_POOL_SIZE,
+                       max_overflow=settings.DB_MAX_OVERFLOW,
+                       pool_recycle=settings.DB_POOL_RECYCLE)
+    return options
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(sep=' ')
+
+
+def register_sqlite_functions(engine: Engine) -> None:
+    """
+    Registers now() and TIMEZONE() on every new SQLite connection, so the
+    PostgreSQL server defaults of the created_at/updated_at columns
+    (aux_annotations.custom_annotations) also work in local SQLite databases.
+
+    Args:
+        engine (Engine): A SQLite engine (use AsyncEngine.sync_engine for async engines).
+    """
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, _) -> None:
+        dbapi_connection.create_function('now', 0, _utc_now)
+        dbapi_connection.create_function('TIMEZONE', 2, lambda _, value: value)
+
+
+def get_engine(url: Optional[str] = None) -> Engine:
+    """
+    Returns the process-wide engine for the connection string,
+    creating it (and its connection pool) on first use only.
+
+    Args:
+        url (str, optional): The database connection string. Defaults to
+            the PostgreSQL database from the environment variables.
+
+    Returns:
+        Engine: The shared engine.
+    """
+    url = url or settings.DATABASE_URL_psycopg
+    engine = _engines.get(url)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(url)
+            if engine is None:
+                engine = create_engine(url, **engine_options(url))
+                if engine.dialect.name == 'sqlite':
+                    register_sqlite_functions(engine)
+                if settings.DB_INSTRUMENT:
+                    from sql_instrumentation import instrument
+                    instrument(engine)
+                _engines[url] = engine
+    return engine
+
+
+def get_session_factory(url: Optional[str] = None) -> sessionmaker:
+    """
+    Returns the process-wide session factory bound to the shared engine.
+
+    Args:
+        url (str, optional): The database connection string. Defaults to
+            the PostgreSQL database from the environment variables.
+
+    Returns:
+        sessionmaker: The session factory.
+    """
+    url = url or settings.DATABASE_URL_psycopg
+    factory = _session_factories.get(url)
+    if factory is None:
+        engine = get_engine(url)
+        with _lock:
+            factory = _session_factories.setdefault(
+                url, sessionmaker(bind=engine, expire_on_commit=False))
+    return factory
+
+
+def get_session(url: Optional[str] = None) -> Session:
+    """
+    Opens a new session from the shared session factory.
+
+    Args:
+        url (str, optional): The database connection string. Defaults to
+            the PostgreSQL database from the environment variables.
+
+    Returns:
+        Session: A new session, to be used as a context manager.
+    """
+    return get_session_factory(url)()
+
+
+def dispose_engines() -> None:
+    """Closes the connection pools of all shared engines."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _session_factories.clear()
@@ -0,0 +1,110 @@
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
+
+from config import settings
+from database_session import engine_options, register_sqlite_functions
+
+_async_engines: Dict[str, AsyncEngine] = {}
+_async_session_factories: Dict[str, async_sessionmaker] = {}
+_lock = threading.Lock()
+
+# Async drivers used for connection strings written for a sync driver
+ASYNC_DRIVERS = {
+    'postgresql': 'psycopg',
+    'sqlite': 'aiosqlite',
+}
+
+
+def async_url(url: str) -> str:
+    """
+    Converts a connection string to one using an asyncio driver,
+    e.g. postgresql+psycopg2:// to postgresql+psycopg://.
+
+    Args:
+        url (str): The database connection string.
+
+    Returns:
+        str: The connection string for create_async_engine.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.get_driver_name() == driver:
+        return url
+    return parsed.set(drivername=f'{parsed.get_backend_name()}+{driver}').render_as_string(
+        hide_password=False)
+
+
+def get_async_engine(url: Optional[str] = None) -> AsyncEngine:
+    """
+    Returns the process-wide asyncio engine for the connection string,
+    creating it on first use only. The pool is configured like get_engine().
+
+    Args:
+        url (str, optional): The database connection string, converted
+            with async_url(). Defaults to the PostgreSQL database from
+            the environment variables (psycopg 3 supports asyncio).
+
+    Returns:
+        AsyncEngine: The shared asyncio engine.
+    """
+    url = async_url(url or settings.DATABASE_URL_psycopg)
+    engine = _async_engines.get(url)
+    if engine is None:
+        with _lock:
+            engine = _async_engines.get(url)
+            if engine is None:
+                engine = create_async_engine(url, **engine_options(url))
+                if engine.dialect.name == 'sqlite':
+                    register_sqlite_functions(engine.sync_engine)
+                _async_engines[url] = engine
+    return engine
+
+
+def get_async_session_factory(url: Optional[str] = None) -> async_sessionmaker:
+    """
+    Returns the process-wide asyncio session factory bound to the shared
+    asyncio engine.
+
+    Args:
+        url (str, optional): The database connection string. Defaults to
+            the PostgreSQL database from the environment variables.
+
+    Returns:
+        async_sessionmaker: The asyncio session factory.
+    """
+    url = async_url(url or settings.DATABASE_URL_psycopg)
+    factory = _async_session_factories.get(url)
+    if factory is None:
+        engine = get_async_engine(url)
+        with _lock:
+            factory = _async_session_factories.setdefault(
+                url, async_sessionmaker(bind=engine, expire_on_commit=False))
+    return factory
+
+
+def get_async_session(url: Optional[str] = None) -> AsyncSession:
+    """
+    Opens a new asyncio session from the shared session factory.
+
+    Args:
+        url (str, optional): The database connection string. Defaults to
+            the PostgreSQL database from the environment variables.
+
+    Returns:
+        AsyncSession: A new session, to be used as an async context manager.
+    """
+    return get_async_session_factory(url)()
+
+
+async def dispose_async_engines() -> None:
+    """Closes the connection pools of all shared asyncio engines."""
+    engines = list(_async_engines.values())
+    with _lock:
+        _async_engines.clear()
+        _async_session_factories.clear()
+    for engine in engines:
+        await engine.dispose()
@@ -0,0 +1,310 @@
+from database_model import Advertisement, AdvertisementDetails, Vehicle, User
+from database_session import get_engine
+from insert_new_ad import advertisement_rows, insert_details
+from insert_new_user import UPSERT_INSERTS
+from aux_annotations.custom_annotations import UTC_NOW
+from create_fields.create_vehicle_ad import (AbstractVehicle as AbstractVehicleAd, TruckAd,
+                                             ElectroCarAd, MotorcycleAd, MotorCarAd)
+from API.Validators.errors import collect_field_errors
+import json
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+import pandas as pd
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import select, update, delete, text, Engine, Connection
+from config import settings
+
+# vehicle_type column of a feed -> advertisement DTO
+FEED_VEHICLE_TYPES: Dict[str, Type[AbstractVehicleAd]] = {
+    'truck': TruckAd,
+    'motor_car': MotorCarAd,
+    'electro_car': ElectroCarAd,
+    'motorcycle': MotorcycleAd,
+}
+DEFAULT_VEHICLE_TYPE = 'motor_car'
+
+# Column names of the feeds -> DTO fields
+FEED_ALIASES = {'condition_type': 'condition', 'vin': 'vin_number'}
+
+BUSINESS_USER = 'b'
+REJECT_REASON_COLUMN = 'reject_reason'
+ROW_COLUMN = 'row'
+
+# One list validator per DTO, so a whole feed is validated in one call
+_ADAPTERS = {dto: TypeAdapter(List[dto]) for dto in FEED_VEHICLE_TYPES.values()}
+
+
+def read_feed(feed: str) -> List[Dict]:
+    """
+    Reads a dealer feed. JSON feeds (.json) hold a list of vehicles or an
+    object with a "vehicles" list, any other file is read as CSV.
+    CSV values are read as strings and empty cells are left out,
+    so the optional fields get their defaults.
+
+    Args:
+        feed (str): Path to the feed file.
+
+    Returns:
+        List[Dict]: The vehicles of the feed, renamed to the DTO fields.
+
+    Raises:
+        ValueError: If the feed has no vehicles.
+    """
+    if Path(feed).suffix.lower() == '.json':
+        with open(feed, encoding='utf-8') as file:
+            data = json.load(file)
+        records = data.get('vehicles', []) if isinstance(data, dict) else data
+    else:
+        frame = pd.read_csv(feed, dtype=str, keep_default_na=False)
+        records = [{column: value for column, value in record.items() if value != ''}
+                   for record in frame.to_dict(orient='records')]
+
+    if not records:
+        raise ValueError(f"Feed {feed} has no vehicles")
+    return [{FEED_ALIASES.get(field, field): value for field, value in record.items()}
+            for record in records]
+
+
+def validate_feed(records: List[Dict], user_id: int,
+                  vehicle_type: str = DEFAULT_VEHICLE_TYPE
+                  ) -> Tuple[Dict[int, AbstractVehicleAd], Dict[int, str]]:
+    """
+    Validates the vehicles of a feed with the advertisement DTOs.
+
+    The rows are grouped by their vehicle_type and every group is validated
+    by a single list validator. Rows with errors are left out of a second
+    pass which builds the DTOs of the valid rows.
+
+    Args:
+        records (List[Dict]): The vehicles of the feed.
+        user_id (int): The dealer, owner of every advertisement.
+        vehicle_type (str): Type of the rows without a vehicle_type value.
+
+    Returns:
+        Tuple[Dict[int, AbstractVehicleAd], Dict[int, str]]: The DTOs of the
+        valid rows and the reject reasons of the others, by row index.
+    """
+    groups: Dict[Type[AbstractVehicleAd], List[int]] = defaultdict(list)
+    reasons: Dict[int, str] = {}
+    for index, record in enumerate(records):
+        dto = FEED_VEHICLE_TYPES.get(str(record.get('vehicle_type', vehicle_type)).strip().lower())
+        if dto is None:
+            reasons[index] = 'invalid vehicle_type'
+        else:
+            groups[dto].append(index)
+
+    ads: Dict[int, AbstractVehicleAd] = {}
+    for dto, indexes in groups.items():
+        rows = [{**records[index], 'user_id': user_id} for index in indexes]
+        try:
+            models = _ADAPTERS[dto].validate_python(rows)
+        except ValidationError as error:
+            for field_error in collect_field_errors(error):
+                position, _, field = field_error['field'].partition('.')
+                reasons.setdefault(indexes[int(position)], f'invalid {field or "vehicle"}')
+            indexes = [index for index in indexes if index not in reasons]
+            models = _ADAPTERS[dto].validate_python(
+                [{**records[index], 'user_id': user_id} for index in indexes])
+        ads.update(zip(indexes, models))
+    return ads, reasons
+
+
+def read_catalog(connection: Connection) -> Dict[Tuple[str, str], int]:
+    """
+    Reads the whole vehicles table, to resolve the vehicles of a feed in memory.
+
+    Args:
+        connection (Connection): The database connection.
+
+    Returns:
+        Dict[Tuple[str, str], int]: (maker, model) -> vehicle_id, case-insensitive keys.
+    """
+    vehicles = connection.execute(select(Vehicle.maker, Vehicle.model, Vehicle.vehicle_id))
+    return {(maker.strip().casefold(), model.strip().casefold()): vehicle_id
+            for maker, model, vehicle_id in vehicles}
+
+
+def check_dealer(connection: Connection, user_id: int) -> None:
+    """
+    Checks the feed belongs to a business user.
+
+    Args:
+        connection (Connection): The database connection.
+        user_id (int): The dealer.
+
+    Raises:
+        ValueError: If the user does not exist or is not a business user.
+    """
+    user_property = connection.scalar(select(User.user_property).where(User.user_id == user_id))
+    if user_property is None:
+        raise ValueError(f"User {user_id} does not exist")
+    if user_property != BUSINESS_USER:
+        raise ValueError(f"User {user_id} is not a business user")
+
+
+def upsert_advertisements(connection: Connection, rows: List[Dict]) -> None:
+    """
+    Inserts or updates the advertisements of a feed by VIN in one batched
+    statement. Updated advertisements are listed again (not discontinued).
+    VINs advertised by another user are left untouched.
+
+    Without RETURNING the rows are sent with the executemany of the driver
+    (a pipeline of one prepared statement with psycopg) instead of
+    multi-row VALUES statements with thousands of parameters, which
+    psycopg spends most of the import time to parse.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        rows (List[Dict]): Advertisement column values with unique VINs.
+    """
+    insert_function = UPSERT_INSERTS[connection.dialect.name]
+    statement = insert_function(Advertisement)
+    changed = {column: statement.excluded[column] for column in rows[0]
+               if column not in ('vin_number', 'user_id')}
+    changed['updated_at'] = text(UTC_NOW)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Advertisement.vin_number],
+        set_=changed,
+        where=Advertisement.user_id == statement.excluded.user_id,
+    )
+    connection.execute(statement, rows)
+
+
+def load_dealer_feed(connection: Connection, user_id: int, records: List[Dict],
+                     vehicle_type: str = DEFAULT_VEHICLE_TYPE) -> Tuple[Counter, Dict[int, str]]:
+    """
+    Saves the inventory feed of a dealer.
+
+    The advertisements of the feed are upserted by VIN, with their details,
+    and the dealer's advertisements whose VIN is no longer in the feed are discontinued.
+    VINs of rejected rows still count as in the feed, so a row with a typo
+    does not take a listed vehicle down.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        user_id (int): The dealer, a business user.
+        records (List[Dict]): The vehicles of the feed.
+        vehicle_type (str): Type of the rows without a vehicle_type value.
+
+    Returns:
+        Tuple[Counter, Dict[int, str]]: The numbers of 'created', 'updated',
+        'discontinued' and 'rejected' advertisements, and the reject
+        reasons by row index.
+
+    Raises:
+        ValueError: If the user does not exist or is not a business user.
+    """
+    check_dealer(connection, user_id)
+    ads, reasons = validate_feed(records, user_id, vehicle_type)
+    catalog = read_catalog(connection)
+
+    accepted: Dict[str, Tuple[AbstractVehicleAd, int]] = {}
+    indexes: Dict[str, int] = {}
+    for index, ad in ads.items():
+        vehicle_id = catalog.get((ad.maker.strip().casefold(), ad.model.strip().casefold()))
+        if vehicle_id is None:
+            reasons[index] = 'unknown vehicle'
+        elif ad.vin_number in accepted:
+            reasons[index] = 'duplicate vin_number'
+        else:
+            accepted[ad.vin_number] = (ad, vehicle_id)
+            indexes[ad.vin_number] = index
+
+    dealer_ads = connection.execute(
+        select(Advertisement.vin_number, Advertisement.ad_id, Advertisement.discontinued)
+        .where(Advertisement.user_id == user_id)).all()
+    owned = {vin_number for vin_number, _, _ in dealer_ads}
+    new_vins = [vin_number for vin_number in accepted if vin_number not in owned]
+    if new_vins:
+        taken = connection.execute(select(Advertisement.vin_number)
+                                   .where(Advertisement.vin_number.in_(new_vins))).scalars()
+        for vin_number in taken:
+            reasons[indexes[vin_number]] = 'vin_number advertised by another user'
+            del accepted[vin_number]
+
+    if accepted:
+        rows = advertisement_rows(*zip(*accepted.values()))
+        for row in rows:
+            row['discontinued'] = False
+        upsert_advertisements(connection, rows)
+        # The feed replaces the details of the updated advertisements
+        updated_ids = [ad_id for vin_number, ad_id, _ in dealer_ads if vin_number in accepted]
+        if updated_ids:
+            connection.execute(delete(AdvertisementDetails)
+                               .where(AdvertisementDetails.ad_id.in_(updated_ids)))
+        insert_details(connection, [ad for ad, _ in accepted.values()])
+
+    feed_vins = {str(record['vin_number']) for record in records if 'vin_number' in record}
+    missing = [ad_id for vin_number, ad_id, discontinued in dealer_ads
+               if not discontinued and vin_number not in feed_vins]
+    if missing:
+        connection.execute(update(Advertisement).where(Advertisement.ad_id.in_(missing))
+                           .values(discontinued=True))
+
+    updated = len(accepted.keys() & owned)
+    counts = Counter(created=len(accepted) - updated, updated=updated,
+                     discontinued=len(missing), rejected=len(reasons))
+    return counts, reasons
+
+
+def write_rejects(records: List[Dict], reasons: Dict[int, str], path: Path) -> None:
+    """Writes the rejected rows, numbered from 1, and their reasons to the rejects file."""
+    rejected = pd.DataFrame([{ROW_COLUMN: index + 1, **records[index]} for index in sorted(reasons)])
+    rejected[REJECT_REASON_COLUMN] = [reasons[index] for index in sorted(reasons)]
+    rejected.to_csv(path, index=False)
+
+
+def ingest_dealer_feed(feed: str,
+                       user_id: int,
+                       engine: Optional[Engine] = None,
+                       vehicle_type: str = DEFAULT_VEHICLE_TYPE,
+                       rejects: Optional[str] = None) -> Counter:
+    """
+    Imports the CSV or JSON inventory feed of a dealer (a business user)
+    within a single transaction.
+
+    Every row is a vehicle with the fields of the advertisement DTOs
+    (TruckAd, MotorCarAd, ElectroCarAd, MotorcycleAd) chosen by its
+    vehicle_type. The maker and model are resolved against the vehicles
+    table, advertisements are upserted by VIN and the dealer's
+    advertisements missing from the feed are discontinued. Invalid rows
+    are written to the rejects file with a reject_reason column.
+
+    Args:
+        feed (str): Path to the feed file, .json or CSV.
+        user_id (int): The dealer.
+        engine (Engine, optional): Engine to use, PostgreSQL or SQLite.
+            Defaults to the shared engine of the database from the environment variables.
+        vehicle_type (str): Type of the rows without a vehicle_type value:
+            'truck', 'motor_car', 'electro_car' or 'motorcycle'.
+        rejects (str, optional): Path of the rejects file.
+            Defaults to <feed name>_rejects.csv next to the feed file.
+
+    Returns:
+        Counter: The numbers of 'created', 'updated', 'discontinued'
+        and 'rejected' advertisements.
+
+    Raises:
+        ValueError: If the feed is empty, or the user does not exist
+            or is not a business user.
+    """
+    if engine is None:
+        engine = get_engine(settings.DATABASE_URL_psycopg)
+    rejects_path = Path(rejects) if rejects else Path(feed).with_name(f'{Path(feed).stem}_rejects.csv')
+
+    started = time.perf_counter()
+    records = read_feed(feed)
+    with engine.begin() as connection:
+        counts, reasons = load_dealer_feed(connection, user_id, records, vehicle_type)
+    if reasons:
+        write_rejects(records, reasons, rejects_path)
+
+    elapsed = time.perf_counter() - started
+    rate = len(records) / elapsed if elapsed else float(len(records))
+    print(f'\n\033[1;32;40m{counts["created"]} advertisements created, {counts["updated"]} updated, '
+          f'{counts["discontinued"]} discontinued in {elapsed:.2f}s ({rate:,.0f} rows/sec)\033[0m')
+    if counts['rejected']:
+        print(f'\033[1;31;40m{counts["rejected"]} rows rejected, see {rejects_path}\033[0m')
+    return counts
@@ -0,0 +1,63 @@
+from typing import Dict
+from create_fields.addressDTO import UserAddressAddDTO
+from insert_new_user import upsert_address_statement, insert_user_statement
+from create_fields.create_vehicle_ad import AbstractVehicle as AbstractVehicleAd
+from insert_new_ad import find_vehicle_statement, new_advertisement
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def create_user_async(session: AsyncSession,
+                            address: UserAddressAddDTO,
+                            user: Dict) -> int:
+    """
+    Saves a new user and their address within one transaction.
+    Asyncio counterpart of insert_new_user.save_new_user.
+
+    Args:
+        session (AsyncSession): The asyncio database session.
+        address (UserAddressAddDTO): The validated address of the user.
+        user (Dict): The UserAddDTO fields of the user except address_id.
+
+    Returns:
+        int: The id of the new user.
+
+    Raises:
+        IntegrityError: If the username, email address
+            or phone number is already taken.
+    """
+    dialect_name = session.bind.dialect.name
+    try:
+        address_id = (await session.execute(
+            upsert_address_statement(dialect_name, address))).scalar_one()
+        user_id = (await session.execute(
+            insert_user_statement(user, address_id))).scalar_one()
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    return user_id
+
+
+async def create_advertisement_async(session: AsyncSession, ad: AbstractVehicleAd) -> int:
+    """
+    Saves a validated advertisement to the database.
+    Asyncio counterpart of insert_new_ad.create_advertisement.
+
+    Args:
+        session (AsyncSession): The asyncio database session.
+        ad (AbstractVehicleAd): A TruckAd, ElectroCarAd, MotorcycleAd or MotorCarAd.
+
+    Returns:
+        int: The id of the new advertisement.
+
+    Raises:
+        ValueError: If the maker and model are not in the vehicles table.
+    """
+    vehicle_id = (await session.execute(find_vehicle_statement(ad.maker, ad.model))).scalar()
+    if vehicle_id is None:
+        raise ValueError(f"Vehicle {ad.maker} {ad.model} is not in the catalog")
+
+    advertisement = new_advertisement(ad, vehicle_id)
+    session.add(advertisement)
+    await session.commit()
+    return advertisement.ad_id
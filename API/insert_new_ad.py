@@ -0,0 +1,199 @@
+from typing import Dict, List, Optional, Sequence
+from database_model import Advertisement, AdvertisementDetails, Vehicle, ADVERTISEMENT_DETAIL_COLUMNS
+from create_fields.create_vehicle_ad import AbstractVehicle as AbstractVehicleAd, NOT_PROVIDED
+from bulk_mapping import dto_rows
+from sqlalchemy import select, insert, bindparam, Select, Insert, Connection, String
+from sqlalchemy.orm import Session
+
+# DTO fields saved to the advertisement_details table
+AD_DETAIL_FIELDS = tuple(field for field in AbstractVehicleAd.model_fields
+                         if field in ADVERTISEMENT_DETAIL_COLUMNS)
+
+# DTO fields which are not columns of the advertisements table
+AD_EXCLUDED_FIELDS = ('maker', 'model', 'hybrid', 'battery_capacity') + AD_DETAIL_FIELDS
+
+# Bound parameter of the VIN in INSERT_DETAILS_BY_VIN, apart from the column names
+DETAIL_VIN_PARAMETER = 'details_vin_number'
+
+# DTO field -> advertisements column
+AD_RENAMED_FIELDS = {'condition': 'condition_type'}
+
+
+def find_vehicle_statement(maker: str, model: str) -> Select:
+    """
+    Builds the query of the catalog vehicle an advertisement belongs to.
+
+    Args:
+        maker (str): The manufacturer of the vehicle.
+        model (str): The model of the vehicle.
+
+    Returns:
+        Select: SELECT vehicle_id FROM vehicles WHERE maker = ... AND model = ...
+    """
+    return select(Vehicle.vehicle_id).where(Vehicle.maker == maker, Vehicle.model == model)
+
+
+def advertisement_args(ad: AbstractVehicleAd, vehicle_id: int) -> Dict:
+    """
+    Converts an advertisement DTO to the keyword arguments of
+    the Advertisement model.
+
+    Args:
+        ad (AbstractVehicleAd): A TruckAd, ElectroCarAd, MotorcycleAd or MotorCarAd.
+        vehicle_id (int): The catalog vehicle of the advertisement.
+
+    Returns:
+        Dict: Column values of the advertisement.
+    """
+    args = ad.key_args()
+    for field in AD_EXCLUDED_FIELDS:
+        args.pop(field, None)
+    for field, column in AD_RENAMED_FIELDS.items():
+        args[column] = args.pop(field)
+    args['vehicle_id'] = vehicle_id
+    return args
+
+
+def detail_values(ad: AbstractVehicleAd) -> Optional[Dict]:
+    """
+    Returns the values of the advertisement_details columns of an
+    advertisement. Fields left to NOT_PROVIDED, or blank, are saved as NULL.
+
+    Args:
+        ad (AbstractVehicleAd): A TruckAd, ElectroCarAd, MotorcycleAd or MotorCarAd.
+
+    Returns:
+        Optional[Dict]: Column values, None when no field is provided
+        (the advertisement gets no advertisement_details row).
+    """
+    values = {}
+    for field in AD_DETAIL_FIELDS:
+        value = ad.__dict__[field]
+        if value is not None and value.strip() and value != NOT_PROVIDED:
+            values[field] = value
+    if not values:
+        return None
+    return {field: values.get(field) for field in AD_DETAIL_FIELDS}
+
+
+def new_advertisement(ad: AbstractVehicleAd, vehicle_id: int) -> Advertisement:
+    """
+    Builds the Advertisement of a validated DTO, with its details if any.
+
+    Args:
+        ad (AbstractVehicleAd): A TruckAd, ElectroCarAd, MotorcycleAd or MotorCarAd.
+        vehicle_id (int): The catalog vehicle of the advertisement.
+
+    Returns:
+        Advertisement: The new advertisement, to be added to a session.
+    """
+    advertisement = Advertisement(**advertisement_args(ad, vehicle_id))
+    details = detail_values(ad)
+    if details is not None:
+        advertisement.details = AdvertisementDetails(**details)
+    return advertisement
+
+
+def advertisement_rows(ads: Sequence[AbstractVehicleAd], vehicle_ids: Sequence[int]) -> List[Dict]:
+    """
+    Converts advertisement DTOs to rows of the advertisements table
+    without a model_dump() per advertisement, see bulk_mapping.dto_rows.
+
+    Args:
+        ads (Sequence[AbstractVehicleAd]): TruckAd, ElectroCarAd, MotorcycleAd
+            or MotorCarAd advertisements.
+        vehicle_ids (Sequence[int]): The catalog vehicle of every advertisement.
+
+    Returns:
+        List[Dict]: Column values of the advertisements, as advertisement_args.
+    """
+    rows = dto_rows(ads, Advertisement, AD_RENAMED_FIELDS, AD_EXCLUDED_FIELDS)
+    for row, vehicle_id in zip(rows, vehicle_ids):
+        row['vehicle_id'] = vehicle_id
+    return rows
+
+
+def insert_advertisements(connection: Connection, ads: Sequence[AbstractVehicleAd],
+                          vehicle_ids: Sequence[int]) -> int:
+    """
+    Saves many validated advertisements with one executemany of a Core
+    INSERT, without ORM objects, identity map or unit of work.
+    Use create_advertisement for a single advertisement.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        ads (Sequence[AbstractVehicleAd]): TruckAd, ElectroCarAd, MotorcycleAd
+            or MotorCarAd advertisements.
+        vehicle_ids (Sequence[int]): The catalog vehicle of every advertisement.
+
+    Returns:
+        int: The number of inserted advertisements.
+    """
+    if not ads:
+        return 0
+    connection.execute(insert(Advertisement), advertisement_rows(ads, vehicle_ids))
+    insert_details(connection, ads)
+    return len(ads)
+
+
+def insert_details_statement() -> Insert:
+    """
+    Builds the INSERT of the details of one advertisement found by its VIN:
+    INSERT INTO advertisement_details (ad_id, ...) SELECT ad_id, ... FROM
+    advertisements WHERE vin_number = ...
+
+    Executed with many parameter sets, it saves the details of advertisements
+    just inserted without RETURNING their ids.
+    """
+    values = [bindparam(field, type_=String) for field in AD_DETAIL_FIELDS]
+    return insert(AdvertisementDetails).from_select(
+        ['ad_id', *AD_DETAIL_FIELDS],
+        select(Advertisement.ad_id, *values)
+        .where(Advertisement.vin_number == bindparam(DETAIL_VIN_PARAMETER)))
+
+
+def insert_details(connection: Connection, ads: Sequence[AbstractVehicleAd]) -> int:
+    """
+    Saves the details of saved advertisements, matched by VIN, with one
+    executemany. Advertisements without details are skipped.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        ads (Sequence[AbstractVehicleAd]): Advertisements already in the advertisements table.
+
+    Returns:
+        int: The number of inserted advertisement_details rows.
+    """
+    rows = []
+    for ad in ads:
+        details = detail_values(ad)
+        if details is not None:
+            details[DETAIL_VIN_PARAMETER] = ad.vin_number
+            rows.append(details)
+    if rows:
+        connection.execute(insert_details_statement(), rows)
+    return len(rows)
+
+
+def create_advertisement(session: Session, ad: AbstractVehicleAd) -> int:
+    """
+    Saves a validated advertisement to the database.
+
+    Args:
+        session (Session): The database session.
+        ad (AbstractVehicleAd): A TruckAd, ElectroCarAd, MotorcycleAd or MotorCarAd.
+
+    Returns:
+        int: The id of the new advertisement.
+
+    Raises:
+        ValueError: If the maker and model are not in the vehicles table.
+    """
+    vehicle_id = session.execute(find_vehicle_statement(ad.maker, ad.model)).scalar()
+    if vehicle_id is None:
+        raise ValueError(f"Vehicle {ad.maker} {ad.model} is not in the catalog")
+
+    advertisement = new_advertisement(ad, vehicle_id)
+    session.add(advertisement)
+    session.commit()
+    return advertisement.ad_id
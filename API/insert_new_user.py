@@ -1,7 +1,9 @@
-from database_model import User, create_engine, Address
+from database_model import User, Address
+from database_session import get_engine
 from create_fields.userDTO import UserAddDTO
 from create_fields.addressDTO import UserAddressAddDTO
-from sqlalchemy import text, select
+from sqlalchemy import text, insert, Insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from config import settings
@@ -15,7 +17,98 @@ from API.Validators.address_input.address_valid import address_validator_func
 from API.Validators.address_input.state_valid import state_validator_func
 from API.Validators.address_input.zip_code_valid import zip_code_validator_func
 import hashlib
+from typing import Dict
 
+# Dialects supporting INSERT ... ON CONFLICT
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def hash_address(country: str, city: str, street_address: str) -> str:
+    """
+    Computes the address hash identifying an address in the addresses table.
+
+    Args:
+        country (str): The country.
+        city (str): The city.
+        street_address (str): The street address.
+
+    Returns:
+        str: The SHA-256 hex digest of the address.
+    """
+    return hashlib.sha256((country + city + street_address).encode('utf-8')).hexdigest()
+
+
+def upsert_address_statement(dialect_name: str, address: UserAddressAddDTO) -> Insert:
+    """
+    Builds the INSERT of an address which reuses the existing row when
+    the same address (address_hash) was saved before.
+
+    Args:
+        dialect_name (str): The database dialect, 'postgresql' or 'sqlite'
+            support the upsert. Other databases get a plain INSERT.
+        address (UserAddressAddDTO): The validated address.
+
+    Returns:
+        Insert: INSERT ... ON CONFLICT (address_hash) DO UPDATE ... RETURNING address_id
+    """
+    insert_function = UPSERT_INSERTS.get(dialect_name, insert)
+    statement = insert_function(Address).values(**address.key_args())
+    if insert_function is not insert:
+        # DO NOTHING would not return the id of the existing row
+        statement = statement.on_conflict_do_update(
+            index_elements=[Address.address_hash],
+            set_={'address_hash': statement.excluded.address_hash})
+    return statement.returning(Address.address_id)
+
+
+def insert_user_statement(user: Dict, address_id: int) -> Insert:
+    """
+    Validates the user and builds its INSERT.
+
+    Args:
+        user (Dict): The UserAddDTO fields of the user except address_id.
+        address_id (int): The id of the user's address.
+
+    Returns:
+        Insert: INSERT INTO users ... RETURNING user_id
+    """
+    create_user = UserAddDTO.model_validate({**user, 'address_id': address_id})
+    return insert(User).values(**create_user.key_args()).returning(User.user_id)
+
+
+def save_new_user(session: Session, address: UserAddressAddDTO, user: Dict) -> int:
+    """
+    Saves a new user and their address within one transaction,
+    without any user interaction.
+
+    The address is upserted on address_hash and its id comes back with
+    RETURNING, so a known address is reused and no extra SELECT is needed.
+    Nothing is saved if the user cannot be inserted.
+
+    Args:
+        session (Session): The database session.
+        address (UserAddressAddDTO): The validated address of the user.
+        user (Dict): The UserAddDTO fields of the user except address_id.
+
+    Returns:
+        int: The id of the new user.
+
+    Raises:
+        IntegrityError: If the username, email address
+            or phone number is already taken.
+    """
+    dialect_name = session.get_bind().dialect.name
+    try:
+        address_id = session.execute(upsert_address_statement(dialect_name, address)).scalar_one()
+        user_id = session.execute(insert_user_statement(user, address_id)).scalar_one()
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return user_id
 
 
 def create_new_user() -> None:
@@ -30,10 +123,10 @@ def create_new_user() -> None:
                         " \n2. [Connecting using user input] "
                         "\n3. [Exit]\n: ")
         if connect == '1' or connect.lower() == 'connecting using environment variables':
-            engine = create_engine(settings.DATABASE_URL_psycopg, echo=True)
+            engine = get_engine(settings.DATABASE_URL_psycopg)
             break
         if connect == '2' or connect.lower() == 'connecting using user input':
-            engine = create_engine(connect_to_postgresql(), echo=True)
+            engine = get_engine(connect_to_postgresql())
             break
         if connect == '3' or connect.lower() == 'exit':
             return
@@ -62,8 +155,7 @@ def create_new_user() -> None:
         zip_code = zip_code_validator_func(input('(Compulsory field) Zip code: '), echo=True)
         street_address = address_validator_func(input('Street address: '), echo=True)
 
-        address_hashable = hashlib.sha256(
-            (country + city + street_address).encode('utf-8')).hexdigest()
+        address_hashable = hash_address(country, city, street_address)
 
         create_address = UserAddressAddDTO.model_validate({
             'country': country,
@@ -74,34 +166,19 @@ def create_new_user() -> None:
             'address_hash': address_hashable
         })
 
-        transaction_address = Address(**create_address.key_args())
         try:
-            session.add(transaction_address)
-            session.commit()
-            stmt = select(Address.address_id).where(Address.address_hash == address_hashable)
-            address_id = session.execute(stmt).scalar()
-
-            create_user = UserAddDTO.model_validate({
+            print('Saving new user...Please wait...')
+            save_new_user(session, create_address, {
                 'username': username,
                 'first_name': fist_name,
                 'last_name': last_name,
                 'email_address': email_address,
                 'main_phone_number': phone_number,
                 'additional_phone_number': None,
-                'gender': gender,
-                'address_id': address_id})
-
-            transaction_user = User(**create_user.key_args())
-            session.add(transaction_user)
-
-            print('Saving new user...Please wait...')
-            session.commit()
-            print('\n\033[1;32;40mAddress saved.\033[0m')
+                'gender': gender})
             print('\n\033[1;32;40mSuccess. Your account has been created\033[0m')
 
         except IntegrityError as e:
-            session.rollback()
             print('\n\033[1;31;40mFailed. Your account has not been created\033[0m')
             print(e)
             print('Rolled back')
-
@@ -0,0 +1,101 @@
+from typing import Dict, Tuple
+from database_model import Advertisement, Vehicle, User, Address, SalesRecords
+from sqlalchemy import Select
+from sqlalchemy.orm import joinedload, selectinload, load_only, raiseload
+from sqlalchemy.orm.interfaces import ORMOption
+
+# Columns shown on a listing card, and needed by every search sort order (advertisement_search)
+LISTING_CARD_COLUMNS = (
+    Advertisement.ad_id, Advertisement.price, Advertisement.mileage, Advertisement.fuel,
+    Advertisement.gearbox, Advertisement.used, Advertisement.condition_type,
+    Advertisement.manufactured_date, Advertisement.discontinued, Advertisement.created_at,
+    Advertisement.user_id, Advertisement.vehicle_id,
+)
+# Seller details shown on an advertisement, the e-mail address is never shown
+SELLER_COLUMNS = (
+    User.user_id, User.username, User.user_property, User.first_name,
+    User.main_phone_number, User.additional_phone_number, User.address_id,
+)
+
+# Loading profile -> (root entity, loader options, statements to load the profile).
+# Every profile ends with raiseload('*', sql_only=True): a relationship the
+# profile does not load raises instead of emitting a lazy load per row, while
+# many-to-one relationships already in the identity map still resolve.
+# Columns left out by load_only() raise too.
+LOADING_PROFILES: Dict[str, Tuple[type, Tuple[ORMOption, ...], int]] = {
+    # Search results: the advertisement and its maker/model, in one SELECT
+    'listing_card': (Advertisement, (
+        load_only(*LISTING_CARD_COLUMNS, raiseload=True),
+        joinedload(Advertisement.vehicle, innerjoin=True)
+        .load_only(Vehicle.maker, Vehicle.model, raiseload=True),
+        raiseload('*', sql_only=True),
+    ), 1),
+    # One advertisement: every column and the details, the vehicle and its category,
+    # the seller and their address, the sale if any, in one SELECT
+    'ad_detail': (Advertisement, (
+        joinedload(Advertisement.details),
+        joinedload(Advertisement.vehicle, innerjoin=True)
+        .joinedload(Vehicle.category, innerjoin=True),
+        joinedload(Advertisement.user, innerjoin=True)
+        .load_only(*SELLER_COLUMNS, raiseload=True)
+        .joinedload(User.addresses)
+        .load_only(Address.city, Address.state, Address.country, raiseload=True),
+        joinedload(Advertisement.sales_record),
+        raiseload('*', sql_only=True),
+    ), 1),
+    # A seller with their address, advertisements with vehicles, and sales with
+    # their advertisements and buyers: the user, then one SELECT ... IN per collection,
+    # sold advertisements come from the identity map
+    'seller_dashboard': (User, (
+        joinedload(User.addresses),
+        selectinload(User.advertisements)
+        .joinedload(Advertisement.vehicle, innerjoin=True),
+        selectinload(User.sales_as_seller)
+        .options(selectinload(SalesRecords.advertisement),
+                 joinedload(SalesRecords.buyer).load_only(User.username, raiseload=True)),
+        raiseload('*', sql_only=True),
+    ), 4),
+}
+
+
+def profile_options(profile: str) -> Tuple[ORMOption, ...]:
+    """
+    Returns the loader options of a loading profile.
+
+    Args:
+        profile (str): One of LOADING_PROFILES.
+
+    Returns:
+        Tuple[ORMOption, ...]: Options for Select.options().
+
+    Raises:
+        ValueError: If the profile is unknown.
+    """
+    if profile not in LOADING_PROFILES:
+        raise ValueError(f"Loading profile must be one of {', '.join(LOADING_PROFILES)}")
+    return LOADING_PROFILES[profile][1]
+
+
+def apply_profile(statement: Select, profile: str) -> Select:
+    """
+    Applies a loading profile to a SELECT of its root entity.
+
+    Example:
+        >>> session.scalars(apply_profile(select(User).where(User.user_id == 7), 'seller_dashboard')).one()
+
+    Args:
+        statement (Select): SELECT of the profile's root entity, e.g. select(Advertisement).
+        profile (str): One of LOADING_PROFILES.
+
+    Returns:
+        Select: The statement with the loader options of the profile.
+
+    Raises:
+        ValueError: If the profile is unknown or the statement does not select its root entity.
+    """
+    options = profile_options(profile)
+    entity = LOADING_PROFILES[profile][0]
+    selected = statement.column_descriptions[0].get('entity') if statement.column_descriptions else None
+    if selected is not entity:
+        raise ValueError(f"Loading profile {profile} applies to select({entity.__name__})")
+    return statement.options(*options)
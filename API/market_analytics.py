@@ -0,0 +1,357 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from database_model import (Advertisement, Vehicle, User, Address, SalesRecords,
+                            SalesDailyRollup, ActiveAdsLocationRollup,
+                            ModelYearPriceRollup, RollupWatermark)
+from database_session import get_engine
+from insert_new_user import UPSERT_INSERTS
+from sqlalchemy import (select, insert, delete, func, extract, tuple_, or_,
+                        Connection, Engine, Row, Select)
+from sqlalchemy.orm import Session
+from config import settings
+
+SALES_ROLLUP = SalesDailyRollup.__tablename__
+LOCATION_ROLLUP = ActiveAdsLocationRollup.__tablename__
+PRICE_ROLLUP = ModelYearPriceRollup.__tablename__
+
+# Changed advertisements are re-read this far behind the watermark on every
+# refresh, so rows committed late with an older updated_at are not missed.
+# Recomputing a group twice is harmless.
+UPDATE_OVERLAP = timedelta(minutes=5)
+# Same for sales records by id: ids are taken at insert, so a sale can commit
+# after one with a higher id. The days of the sales this many ids behind the
+# watermark are recomputed on every refresh.
+SALES_RECORD_OVERLAP = 1_000
+
+
+def _read_watermark(connection: Connection, rollup_name: str) -> Optional[Row]:
+    return connection.execute(
+        select(RollupWatermark.last_id, RollupWatermark.last_updated_at)
+        .where(RollupWatermark.rollup_name == rollup_name)).first()
+
+
+def _save_watermark(connection: Connection, rollup_name: str,
+                    last_id: Optional[int] = None,
+                    last_updated_at: Optional[datetime] = None) -> None:
+    values = {'last_id': last_id, 'last_updated_at': last_updated_at,
+              'refreshed_at': datetime.now(timezone.utc).replace(tzinfo=None)}
+    statement = UPSERT_INSERTS[connection.dialect.name](RollupWatermark).values(
+        rollup_name=rollup_name, **values)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[RollupWatermark.rollup_name], set_=values))
+
+
+def _advertisement_window(connection: Connection, rollup_name: str,
+                          full: bool) -> Optional[Tuple[Optional[datetime], datetime]]:
+    """
+    Returns (changed since, last update) of the advertisements a rollup has to process,
+    changed since is None for a full rebuild. The UPDATE_OVERLAP behind the
+    watermark is processed even when no newer change exists. None without
+    advertisements.
+    """
+    last_update = connection.scalar(select(func.max(Advertisement.updated_at)))
+    if last_update is None:
+        return None
+    watermark = None if full else _read_watermark(connection, rollup_name)
+    if watermark is None or watermark.last_updated_at is None:
+        return None, last_update
+    return (watermark.last_updated_at - UPDATE_OVERLAP,
+            max(last_update, watermark.last_updated_at))
+
+
+def refresh_sales_rollup(connection: Connection, full: bool = False) -> int:
+    """
+    Recomputes the daily sales of the days having new sales records.
+
+    Sales records are append only, they are found by record_id, from
+    SALES_RECORD_OVERLAP ids behind the watermark so that sales committed
+    after a higher id are not missed, also when no newer sale exists.
+    Every day between the first and the last of these sales is recomputed
+    from sales_records (ix_sales_records_sale_date). Revenue is the
+    advertisement price at the time the day is recomputed.
+
+    Args:
+        connection (Connection): The connection, inside a transaction.
+        full (bool): Ignore the watermark and rebuild the whole rollup.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    watermark = None if full else _read_watermark(connection, SALES_ROLLUP)
+    last_seen = watermark.last_id if watermark is not None and watermark.last_id else 0
+    last_id = connection.scalar(select(func.max(SalesRecords.record_id)))
+    if last_id is None:
+        return 0
+
+    first_sale, last_sale = connection.execute(
+        select(func.min(SalesRecords.sale_date), func.max(SalesRecords.sale_date))
+        .where(SalesRecords.record_id > last_seen - SALES_RECORD_OVERLAP,
+               SalesRecords.record_id <= last_id)).one()
+    if first_sale is None:
+        return 0
+    first_day, last_day = first_sale.date(), last_sale.date()
+
+    sale_day = func.date(SalesRecords.sale_date)
+    aggregated = (
+        select(sale_day, Vehicle.maker, Vehicle.model, func.count(), func.sum(Advertisement.price))
+        .join(Advertisement, SalesRecords.advertisement_id == Advertisement.ad_id)
+        .join(Vehicle, Advertisement.vehicle_id == Vehicle.vehicle_id)
+        .where(SalesRecords.sale_date >= datetime.combine(first_day, time.min),
+               SalesRecords.sale_date < datetime.combine(last_day + timedelta(days=1), time.min))
+        .group_by(sale_day, Vehicle.maker, Vehicle.model)
+    )
+
+    connection.execute(delete(SalesDailyRollup)
+                       .where(SalesDailyRollup.sale_day.between(first_day, last_day)))
+    written = connection.execute(insert(SalesDailyRollup).from_select(
+        ['sale_day', 'maker', 'model', 'sales_count', 'revenue'], aggregated),
+        execution_options={'preserve_rowcount': True}).rowcount
+    _save_watermark(connection, SALES_ROLLUP, last_id=max(last_id, last_seen))
+    return written
+
+
+def refresh_location_rollup(connection: Connection, full: bool = False) -> int:
+    """
+    Recomputes the active advertisements of the seller locations having
+    advertisements changed since the watermark (ix_advertisements_updated_at).
+
+    Args:
+        connection (Connection): The connection, inside a transaction.
+        full (bool): Ignore the watermark and rebuild the whole rollup.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    window = _advertisement_window(connection, LOCATION_ROLLUP, full)
+    if window is None:
+        return 0
+    changed_since, last_update = window
+
+    location = (Address.country, Address.city)
+    aggregated = (
+        select(*location, func.count())
+        .select_from(Advertisement)
+        .join(User, Advertisement.user_id == User.user_id)
+        .join(Address, User.address_id == Address.address_id)
+        .where(Advertisement.discontinued == False)
+        .group_by(*location)
+    )
+
+    if changed_since is None:
+        connection.execute(delete(ActiveAdsLocationRollup))
+    else:
+        changed = (select(*location).distinct()
+                   .select_from(Advertisement)
+                   .join(User, Advertisement.user_id == User.user_id)
+                   .join(Address, User.address_id == Address.address_id)
+                   .where(Advertisement.updated_at > changed_since))
+        connection.execute(delete(ActiveAdsLocationRollup).where(
+            tuple_(ActiveAdsLocationRollup.country, ActiveAdsLocationRollup.city).in_(changed)))
+        aggregated = aggregated.where(tuple_(*location).in_(changed))
+
+    written = connection.execute(insert(ActiveAdsLocationRollup).from_select(
+        ['country', 'city', 'active_ads'], aggregated),
+        execution_options={'preserve_rowcount': True}).rowcount
+    _save_watermark(connection, LOCATION_ROLLUP, last_updated_at=last_update)
+    return written
+
+
+def refresh_price_rollup(connection: Connection, full: bool = False) -> int:
+    """
+    Recomputes the median prices of the models having advertisements
+    changed since the watermark, all years of such a model at once.
+
+    The median is the middle row (average of the two middle rows) by
+    ROW_NUMBER() within (maker, model, year), portable to SQLite.
+
+    Args:
+        connection (Connection): The connection, inside a transaction.
+        full (bool): Ignore the watermark and rebuild the whole rollup.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    window = _advertisement_window(connection, PRICE_ROLLUP, full)
+    if window is None:
+        return 0
+    changed_since, last_update = window
+
+    year = extract('year', Advertisement.manufactured_date)
+    group = (Vehicle.maker, Vehicle.model, year)
+    ranked = (
+        select(Vehicle.maker, Vehicle.model, year.label('year'), Advertisement.price,
+               func.row_number().over(partition_by=group, order_by=Advertisement.price)
+               .label('position'),
+               func.count().over(partition_by=group).label('ad_count'))
+        .join(Vehicle, Advertisement.vehicle_id == Vehicle.vehicle_id)
+        .where(Advertisement.discontinued == False)
+    )
+
+    if changed_since is None:
+        connection.execute(delete(ModelYearPriceRollup))
+    else:
+        changed = (select(Vehicle.maker, Vehicle.model).distinct()
+                   .join(Advertisement, Advertisement.vehicle_id == Vehicle.vehicle_id)
+                   .where(Advertisement.updated_at > changed_since))
+        connection.execute(delete(ModelYearPriceRollup).where(
+            tuple_(ModelYearPriceRollup.maker, ModelYearPriceRollup.model).in_(changed)))
+        ranked = ranked.where(Advertisement.vehicle_id.in_(
+            select(Vehicle.vehicle_id).where(tuple_(Vehicle.maker, Vehicle.model).in_(changed))))
+
+    ranked = ranked.subquery()
+    aggregated = (
+        select(ranked.c.maker, ranked.c.model, ranked.c.year,
+               func.max(ranked.c.ad_count), func.avg(ranked.c.price))
+        .where(or_(ranked.c.position == (ranked.c.ad_count + 1) // 2,
+                   ranked.c.position == (ranked.c.ad_count + 2) // 2))
+        .group_by(ranked.c.maker, ranked.c.model, ranked.c.year)
+    )
+
+    written = connection.execute(insert(ModelYearPriceRollup).from_select(
+        ['maker', 'model', 'year', 'ad_count', 'median_price'], aggregated),
+        execution_options={'preserve_rowcount': True}).rowcount
+    _save_watermark(connection, PRICE_ROLLUP, last_updated_at=last_update)
+    return written
+
+
+def refresh_rollups(engine: Engine, full: bool = False) -> Dict[str, int]:
+    """
+    Brings every rollup up to date, each one in its own transaction
+    together with its watermark. Run it on a schedule, from one process.
+
+    Advertisements must be discontinued rather than deleted, deleted rows
+    are only dropped from the rollups by a full rebuild.
+
+    Args:
+        engine (Engine): The engine of the database.
+        full (bool): Ignore the watermarks and rebuild the rollups.
+
+    Returns:
+        Dict[str, int]: The number of rows written per rollup table.
+    """
+    refreshes = {SALES_ROLLUP: refresh_sales_rollup,
+                 LOCATION_ROLLUP: refresh_location_rollup,
+                 PRICE_ROLLUP: refresh_price_rollup}
+    written = {}
+    for rollup_name, refresh in refreshes.items():
+        with engine.begin() as connection:
+            written[rollup_name] = refresh(connection, full)
+    return written
+
+
+def top_selling_models(session: Session, date_from: date, date_to: date,
+                       maker: Optional[str] = None, limit: int = 10) -> List[Row]:
+    """
+    Returns the most sold models of the period, read from the sales rollup.
+
+    Args:
+        session (Session): The database session.
+        date_from (date): The first day of the period.
+        date_to (date): The last day of the period.
+        maker (str, optional): Only models of this maker.
+        limit (int): The number of models.
+
+    Returns:
+        List[Row]: Rows of (maker, model, sales, revenue), most sold first.
+    """
+    sales = func.sum(SalesDailyRollup.sales_count).label('sales')
+    statement = (
+        select(SalesDailyRollup.maker, SalesDailyRollup.model, sales,
+               func.sum(SalesDailyRollup.revenue).label('revenue'))
+        .where(SalesDailyRollup.sale_day.between(date_from, date_to))
+        .group_by(SalesDailyRollup.maker, SalesDailyRollup.model)
+        .order_by(sales.desc(), SalesDailyRollup.maker, SalesDailyRollup.model)
+        .limit(limit)
+    )
+    if maker is not None:
+        statement = statement.where(SalesDailyRollup.maker == maker)
+    return list(session.execute(statement))
+
+
+def daily_sales(session: Session, date_from: date, date_to: date,
+                maker: Optional[str] = None, model: Optional[str] = None) -> List[Row]:
+    """
+    Returns the sales per day of the period, read from the sales rollup.
+
+    Args:
+        session (Session): The database session.
+        date_from (date): The first day of the period.
+        date_to (date): The last day of the period.
+        maker (str, optional): Only sales of this maker.
+        model (str, optional): Only sales of this model.
+
+    Returns:
+        List[Row]: Rows of (sale_day, sales, revenue), days without sales are missing.
+    """
+    statement = (
+        select(SalesDailyRollup.sale_day,
+               func.sum(SalesDailyRollup.sales_count).label('sales'),
+               func.sum(SalesDailyRollup.revenue).label('revenue'))
+        .where(SalesDailyRollup.sale_day.between(date_from, date_to))
+        .group_by(SalesDailyRollup.sale_day)
+        .order_by(SalesDailyRollup.sale_day)
+    )
+    if maker is not None:
+        statement = statement.where(SalesDailyRollup.maker == maker)
+    if model is not None:
+        statement = statement.where(SalesDailyRollup.model == model)
+    return list(session.execute(statement))
+
+
+def active_ads_by_location(session: Session, country: Optional[str] = None,
+                           limit: Optional[int] = None) -> List[ActiveAdsLocationRollup]:
+    """
+    Returns the number of active advertisements per seller city,
+    read from the location rollup.
+
+    Args:
+        session (Session): The database session.
+        country (str, optional): Only cities of this country.
+        limit (int, optional): The number of cities, all by default.
+
+    Returns:
+        List[ActiveAdsLocationRollup]: The cities, most advertisements first.
+    """
+    statement = (select(ActiveAdsLocationRollup)
+                 .order_by(ActiveAdsLocationRollup.active_ads.desc(),
+                           ActiveAdsLocationRollup.country, ActiveAdsLocationRollup.city)
+                 .limit(limit))
+    if country is not None:
+        statement = statement.where(ActiveAdsLocationRollup.country == country)
+    return list(session.scalars(statement))
+
+
+def median_prices(session: Session, maker: str, model: Optional[str] = None,
+                  year_from: Optional[int] = None,
+                  year_to: Optional[int] = None) -> List[ModelYearPriceRollup]:
+    """
+    Returns the median prices of active advertisements by model and year,
+    read from the price rollup.
+
+    Args:
+        session (Session): The database session.
+        maker (str): The maker of the vehicles.
+        model (str, optional): Only this model.
+        year_from (int, optional): The earliest year of manufacture.
+        year_to (int, optional): The latest year of manufacture.
+
+    Returns:
+        List[ModelYearPriceRollup]: The prices ordered by model and year.
+    """
+    statement: Select = (select(ModelYearPriceRollup)
+                         .where(ModelYearPriceRollup.maker == maker)
+                         .order_by(ModelYearPriceRollup.model, ModelYearPriceRollup.year))
+    if model is not None:
+        statement = statement.where(ModelYearPriceRollup.model == model)
+    if year_from is not None:
+        statement = statement.where(ModelYearPriceRollup.year >= year_from)
+    if year_to is not None:
+        statement = statement.where(ModelYearPriceRollup.year <= year_to)
+    return list(session.scalars(statement))
+
+
+if __name__ == '__main__':
+    # Incremental refresh of the rollups, e.g. from cron:
+    # python market_analytics.py
+    for name, rows in refresh_rollups(get_engine(settings.DATABASE_URL_psycopg)).items():
+        print(f'\033[1;32;40m{name}: {rows} rows refreshed\033[0m')
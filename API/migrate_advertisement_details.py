@@ -0,0 +1,126 @@
+from database_model import AdvertisementDetails, ADVERTISEMENT_DETAIL_COLUMNS
+from database_session import get_engine
+from advertisement_text_search import text_search_ddl, SEARCH_VECTOR_COLUMN, FTS_TABLE
+from create_fields.create_vehicle_ad import NOT_PROVIDED
+
+import argparse
+import time
+from typing import List
+from sqlalchemy import inspect, text, Engine, Connection
+from config import settings
+
+ADVERTISEMENTS_TABLE = 'advertisements'
+
+
+def legacy_columns(connection: Connection) -> List[str]:
+    """The optional text columns still in the advertisements table."""
+    columns = {column['name'] for column in inspect(connection).get_columns(ADVERTISEMENTS_TABLE)}
+    return [name for name in ADVERTISEMENT_DETAIL_COLUMNS if name in columns]
+
+
+def _drop_text_search(connection: Connection) -> bool:
+    """
+    Drops the full text search built over the advertisements columns, it
+    depends on the moved columns. Returns whether there was one.
+    """
+    if connection.dialect.name == 'postgresql':
+        columns = {column['name'] for column in inspect(connection).get_columns(ADVERTISEMENTS_TABLE)}
+        if SEARCH_VECTOR_COLUMN not in columns:
+            return False
+        # The GIN index is dropped with its column
+        connection.execute(text(f'ALTER TABLE {ADVERTISEMENTS_TABLE} DROP COLUMN {SEARCH_VECTOR_COLUMN}'))
+        return True
+    if not inspect(connection).has_table(FTS_TABLE):
+        return False
+    for trigger in ('insert', 'update', 'delete'):
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}'))
+    connection.execute(text(f'DROP TABLE {FTS_TABLE}'))
+    return True
+
+
+def copy_details_sql(columns: List[str]) -> str:
+    """
+    INSERT ... SELECT of the details of every advertisement with any value,
+    'Not provided' and blank values become NULL.
+    """
+    values = ', '.join(f"CASE WHEN {name} = '{NOT_PROVIDED}' OR trim({name}) = '' "
+                       f"THEN NULL ELSE {name} END AS {name}" for name in columns)
+    names = ', '.join(columns)
+    return (f'INSERT INTO {AdvertisementDetails.__tablename__} (ad_id, {names}) '
+            f'SELECT ad_id, {names} FROM (SELECT ad_id, {values} FROM {ADVERTISEMENTS_TABLE}) AS legacy '
+            f"WHERE {' OR '.join(f'{name} IS NOT NULL' for name in columns)}")
+
+
+def migrate_advertisement_details(engine: Engine, rewrite: bool = False) -> int:
+    """
+    Moves the optional text columns of the advertisements table to the
+    advertisement_details table, within one transaction:
+
+    1. creates advertisement_details,
+    2. drops the full text search over advertisements,
+    3. copies the details of advertisements with any value provided,
+       'Not provided' and blank values as NULL,
+    4. drops the columns from advertisements,
+    5. builds the full text search over advertisement_details again, if there was one.
+
+    A failure at any step rolls every step back. Does nothing when the
+    columns were already moved, so it can run again. PostgreSQL keeps the
+    space of dropped columns in every row until the table is rewritten:
+    rewrite runs VACUUM FULL (an exclusive lock for the duration of the
+    copy) then VACUUM ANALYZE, or VACUUM on SQLite, after the commit.
+
+    Args:
+        engine (Engine): The database, PostgreSQL or SQLite 3.35+.
+        rewrite (bool): Rewrites the advertisements table to reclaim the space.
+
+    Returns:
+        int: The number of advertisement_details rows created.
+    """
+    with engine.begin() as connection:
+        if connection.dialect.name == 'sqlite':
+            # pysqlite opens the transaction before the first DML statement
+            # only, the DDL before it has to be part of the transaction too
+            connection.exec_driver_sql('BEGIN')
+        AdvertisementDetails.__table__.create(connection, checkfirst=True)
+        columns = legacy_columns(connection)
+        if not columns:
+            return 0
+        had_text_search = _drop_text_search(connection)
+        moved = connection.execute(text(copy_details_sql(columns))).rowcount
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text(f'ALTER TABLE {ADVERTISEMENTS_TABLE} '
+                                    + ', '.join(f'DROP COLUMN {name}' for name in columns)))
+        else:
+            # SQLite drops one column per statement
+            for name in columns:
+                connection.execute(text(f'ALTER TABLE {ADVERTISEMENTS_TABLE} DROP COLUMN {name}'))
+        if had_text_search:
+            for statement in text_search_ddl(connection.dialect.name):
+                connection.execute(text(statement))
+
+    if rewrite:
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            if connection.dialect.name == 'postgresql':
+                connection.execute(text(f'VACUUM FULL {ADVERTISEMENTS_TABLE}'))
+                # VACUUM FULL leaves the visibility map empty, index-only scans need it
+                connection.execute(text(f'VACUUM ANALYZE {ADVERTISEMENTS_TABLE}, '
+                                        f'{AdvertisementDetails.__tablename__}'))
+            else:
+                connection.execute(text('VACUUM'))
+    return moved
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Moves the optional text columns of advertisements to advertisement_details.')
+    parser.add_argument('--url', default=None,
+                        help='Connection string, defaults to the .env database.')
+    parser.add_argument('--rewrite', action='store_true',
+                        help='Rewrites the advertisements table afterwards (VACUUM FULL, locks the table)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    moved = migrate_advertisement_details(get_engine(args.url or settings.DATABASE_URL_psycopg),
+                                          args.rewrite)
+    print(f'\n\033[1;32;40m{moved} advertisement details moved '
+          f'in {time.perf_counter() - started:.1f} s\033[0m')
@@ -0,0 +1,402 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from database_model import Advertisement, Vehicle, SalesRecords
+from create_fields.create_vehicle_ad import AbstractVehicle as AbstractVehicleAd
+from create_fields.priceDTO import ComparableListingDTO, PriceEstimateDTO
+from market_analytics import UPDATE_OVERLAP, SALES_RECORD_OVERLAP
+from sqlalchemy import select, Select, Engine, Connection, Integer, func, extract, cast, or_
+
+DEFAULT_COMPARABLES = 10
+MAX_COMPARABLES = 100
+
+# Differences counted as one unit of distance: one year of manufacture,
+# 20 000 km of mileage, 20 kW of power output.
+FEATURE_SCALES = np.array([1.0, 20_000.0, 20.0], dtype=np.float32)
+FEATURE_COLUMNS = ('year', 'mileage', 'power_output')
+# Squared distance added when the fuel type differs (as much as two years)
+FUEL_PENALTY = 4.0
+# Years around the vehicle searched first, widened until the k nearest are certain
+YEAR_WINDOW = 2
+
+# Seconds after which get_price_index refreshes the index
+REFRESH_INTERVAL = 60
+LOAD_BATCH_SIZE = 100_000
+
+# Listing columns, as NumPy arrays, accepted by ComparablesIndex.load/update
+LISTING_COLUMNS = ('ad_id', 'vehicle_id', 'year', 'mileage', 'power_output',
+                   'fuel', 'price', 'sold')
+
+# Sold advertisements, outer joined (a hash join) instead of a per row IN subquery
+_sales = select(SalesRecords.advertisement_id).distinct().subquery()
+_sold = _sales.c.advertisement_id.is_not(None)
+_listed = or_(Advertisement.discontinued == False, _sold)
+
+
+def listings_statement() -> Select:
+    """
+    Builds the SELECT of the listings used as comparables: active
+    advertisements and sold ones (at their advertised price).
+
+    Returns:
+        Select: SELECT ad_id, vehicle_id, year, mileage, power_output, fuel, price, sold, listed ...
+    """
+    return (select(Advertisement.ad_id, Advertisement.vehicle_id,
+                   cast(extract('year', Advertisement.manufactured_date), Integer).label('year'),
+                   Advertisement.mileage, Advertisement.power_output, Advertisement.fuel,
+                   Advertisement.price, _sold.label('sold'), _listed.label('listed'))
+            .outerjoin(_sales, _sales.c.advertisement_id == Advertisement.ad_id))
+
+
+def _read_listings(connection: Connection, statement: Select) -> Dict[str, np.ndarray]:
+    """Reads the listing rows into one NumPy array per column."""
+    dtypes = {'fuel': object, 'sold': bool, 'listed': bool}
+    result = connection.execution_options(yield_per=LOAD_BATCH_SIZE).execute(statement)
+    names = list(result.keys())
+    chunks: Dict[str, List[np.ndarray]] = {name: [] for name in names}
+    for rows in result.partitions():
+        for name, values in zip(names, zip(*rows)):
+            chunks[name].append(np.array(values, dtype=dtypes.get(name, np.int64)))
+    return {name: np.concatenate(arrays) if arrays
+            else np.array([], dtype=dtypes.get(name, np.int64))
+            for name, arrays in chunks.items()}
+
+
+class ComparablesIndex:
+    """In-memory index of comparable listings for price suggestions.
+
+    Listings are kept per (maker, model) as NumPy arrays. A lookup computes
+    the scaled distance in year, mileage and power output (plus a penalty for
+    another fuel type) to every listing of the model and picks the k nearest
+    with argpartition, so it costs microseconds per thousand listings of a model.
+
+    Groups are replaced as a whole on updates, lookups never see a half
+    updated group and need no lock.
+
+    Methods:
+        load(listings, vehicles): Replaces the content of the index.
+        update(listings, vehicles): Replaces or removes changed listings.
+        build(engine): Loads the index from the database.
+        refresh(engine): Applies the changes since the last build or refresh.
+        comparables(...): The nearest listings of a vehicle.
+        estimate(...): The suggested price of a vehicle.
+    """
+
+    def __init__(self) -> None:
+        self._groups: Dict[Tuple[str, str], Dict[str, np.ndarray]] = {}
+        self._fuel_codes: Dict[str, int] = {}
+        self._fuel_names: List[str] = []
+        self._last_update: Optional[datetime] = None
+        self._last_record_id = 0
+        self._lock = threading.Lock()
+        self.refreshed_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return sum(len(group['ad_id']) for group in self._groups.values())
+
+    def _fuel_code(self, fuel: str) -> int:
+        code = self._fuel_codes.get(fuel)
+        if code is None:
+            code = self._fuel_codes[fuel] = len(self._fuel_names)
+            self._fuel_names.append(fuel)
+        return code
+
+    def _grouped(self, listings: Dict[str, np.ndarray],
+                 vehicles: Dict[int, Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, np.ndarray]]:
+        """Splits listing columns into the arrays of their (maker, model) groups."""
+        order = np.argsort(listings['vehicle_id'], kind='stable')
+        vehicle_ids, starts = np.unique(listings['vehicle_id'][order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+
+        positions: Dict[Tuple[str, str], List[np.ndarray]] = {}
+        for vehicle_id, start, end in zip(vehicle_ids.tolist(), starts, ends):
+            key = vehicles.get(vehicle_id)
+            if key is not None:
+                positions.setdefault(key, []).append(order[start:end])
+
+        fuels, fuel_positions = np.unique(listings['fuel'], return_inverse=True)
+        fuel_codes = np.array([self._fuel_code(fuel) for fuel in fuels.tolist()], dtype=np.int16)
+        raw = np.column_stack([listings[name] for name in FEATURE_COLUMNS]).astype(np.int64)
+
+        groups = {}
+        for key, parts in positions.items():
+            rows = np.concatenate(parts)
+            # Sorted by year, lookups search a window of years
+            rows = rows[np.argsort(raw[rows, 0], kind='stable')]
+            groups[key] = {
+                'ad_id': listings['ad_id'][rows].astype(np.int64),
+                'raw': raw[rows],
+                'features': (raw[rows] / FEATURE_SCALES).astype(np.float32),
+                'fuel': fuel_codes[fuel_positions[rows]],
+                'price': listings['price'][rows].astype(np.int64),
+                'sold': listings['sold'][rows].astype(bool),
+            }
+        return groups
+
+    def load(self, listings: Dict[str, np.ndarray], vehicles: Dict[int, Tuple[str, str]]) -> None:
+        """
+        Replaces the content of the index.
+
+        Args:
+            listings (Dict[str, np.ndarray]): Arrays of LISTING_COLUMNS.
+            vehicles (Dict[int, Tuple[str, str]]): vehicle_id -> (maker, model).
+        """
+        with self._lock:
+            self._groups = self._grouped(listings, vehicles)
+
+    def update(self, listings: Dict[str, np.ndarray], vehicles: Dict[int, Tuple[str, str]]) -> None:
+        """
+        Replaces the changed listings, also when they moved to another
+        (maker, model). Listings having listed=False (the optional 'listed'
+        column) are removed from the index.
+
+        Args:
+            listings (Dict[str, np.ndarray]): Arrays of LISTING_COLUMNS
+                of every changed listing, optionally with 'listed'.
+            vehicles (Dict[int, Tuple[str, str]]): vehicle_id -> (maker, model).
+        """
+        listed = listings.get('listed')
+        if listed is None:
+            listed = np.ones(len(listings['ad_id']), dtype=bool)
+        with self._lock:
+            added = self._grouped({name: listings[name][listed] for name in LISTING_COLUMNS},
+                                  vehicles)
+            # A changed listing may have moved to another model (a new vehicle_id),
+            # it is removed from whichever group holds it
+            for key in set(self._groups) | set(added):
+                current = self._groups.get(key)
+                parts = []
+                if current is not None:
+                    kept = ~np.isin(current['ad_id'], listings['ad_id'])
+                    if kept.all() and key not in added:
+                        continue
+                    parts.append({name: array[kept] for name, array in current.items()})
+                if key in added:
+                    parts.append(added[key])
+                merged = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+                if not len(merged['ad_id']):
+                    self._groups.pop(key, None)
+                else:
+                    order = np.argsort(merged['raw'][:, 0], kind='stable')
+                    self._groups[key] = {name: array[order] for name, array in merged.items()}
+
+    def build(self, engine: Engine) -> int:
+        """
+        Loads every active and sold listing from the database.
+
+        Args:
+            engine (Engine): The engine of the database.
+
+        Returns:
+            int: The number of indexed listings.
+        """
+        with engine.connect() as connection:
+            last_update = connection.scalar(select(func.max(Advertisement.updated_at)))
+            last_record_id = connection.scalar(select(func.max(SalesRecords.record_id))) or 0
+            vehicles = _read_vehicles(connection)
+            statement = listings_statement().where(_listed)
+            listings = _read_listings(connection, statement)
+        self.load(listings, vehicles)
+        self._last_update, self._last_record_id = last_update, last_record_id
+        self.refreshed_at = time.monotonic()
+        return len(listings['ad_id'])
+
+    def refresh(self, engine: Engine) -> int:
+        """
+        Applies the advertisements changed (updated_at) and sold (new
+        sales records) since the last build or refresh. Builds the index
+        if it was never built.
+
+        Args:
+            engine (Engine): The engine of the database.
+
+        Returns:
+            int: The number of changed listings.
+        """
+        if self.refreshed_at is None:
+            return self.build(engine)
+
+        with engine.connect() as connection:
+            last_update = connection.scalar(select(func.max(Advertisement.updated_at)))
+            last_record_id = connection.scalar(select(func.max(SalesRecords.record_id))) or 0
+            # Rows committed late with an older id or timestamp are read again
+            changed = [select(SalesRecords.advertisement_id)
+                       .where(SalesRecords.record_id > self._last_record_id - SALES_RECORD_OVERLAP)]
+            if self._last_update is not None:
+                changed.append(select(Advertisement.ad_id).where(
+                    Advertisement.updated_at > self._last_update - UPDATE_OVERLAP))
+            statement = listings_statement().where(
+                or_(*(Advertisement.ad_id.in_(ids) for ids in changed)))
+            listings = _read_listings(connection, statement)
+            if len(listings['ad_id']):
+                self.update(listings, _read_vehicles(connection))
+
+        self._last_update, self._last_record_id = last_update, last_record_id
+        self.refreshed_at = time.monotonic()
+        return len(listings['ad_id'])
+
+    def _nearest(self, maker: str, model: str, year: int, mileage: int,
+                 power_output: int, fuel: str, k: int) -> Tuple[Dict[str, np.ndarray],
+                                                                np.ndarray, np.ndarray]:
+        """Returns the group, the positions of the k nearest listings and their distances."""
+        if not 0 < k <= MAX_COMPARABLES:
+            raise ValueError(f"Number of comparables must be between 1 and {MAX_COMPARABLES}")
+        group = self._groups.get((maker, model))
+        if group is None:
+            return {}, np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+
+        query = np.array([year, mileage, power_output], dtype=np.float32) / FEATURE_SCALES
+        fuel_code = self._fuel_codes.get(fuel, -1)
+        years = group['raw'][:, 0]
+        radius = YEAR_WINDOW
+        while True:
+            # The distance is at least the difference of years, listings outside
+            # the window cannot be nearer than the k-th one found inside it.
+            start = np.searchsorted(years, year - radius, side='left')
+            stop = np.searchsorted(years, year + radius, side='right')
+            difference = group['features'][start:stop] - query
+            distances = np.einsum('ij,ij->i', difference, difference)
+            distances += FUEL_PENALTY * (group['fuel'][start:stop] != fuel_code)
+
+            if len(distances) > k:
+                nearest = np.argpartition(distances, k - 1)[:k]
+            else:
+                nearest = np.arange(len(distances))
+            if start == 0 and stop == len(years):
+                break
+            if len(nearest) < k:
+                radius *= 2
+                continue
+            farthest = float(np.sqrt(distances[nearest].max()))
+            if farthest <= radius:
+                break
+            # One more pass covering every year nearer than the k-th listing found
+            radius = farthest
+
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return group, nearest + start, np.sqrt(distances[nearest])
+
+    def comparables(self, maker: str, model: str, year: int, mileage: int,
+                    power_output: int, fuel: str,
+                    k: int = DEFAULT_COMPARABLES) -> List[ComparableListingDTO]:
+        """
+        Returns the k listings of the same maker and model nearest to the vehicle.
+
+        Args:
+            maker (str): The maker of the vehicle.
+            model (str): The model of the vehicle.
+            year (int): The year of manufacture.
+            mileage (int): The mileage.
+            power_output (int): The power output.
+            fuel (str): The fuel type.
+            k (int): The number of comparables, at most MAX_COMPARABLES.
+
+        Returns:
+            List[ComparableListingDTO]: The comparables, nearest first.
+
+        Raises:
+            ValueError: If k is out of range.
+        """
+        return self._comparables(*self._nearest(maker, model, year, mileage,
+                                                power_output, fuel, k))
+
+    def _comparables(self, group: Dict[str, np.ndarray], nearest: np.ndarray,
+                     distances: np.ndarray) -> List[ComparableListingDTO]:
+        if not len(nearest):
+            return []
+        raw = group['raw'][nearest].tolist()
+        return [ComparableListingDTO(ad_id=ad_id, price=price, year=features[0],
+                                     mileage=features[1], power_output=features[2],
+                                     fuel=self._fuel_names[fuel_code], sold=sold,
+                                     distance=distance)
+                for ad_id, price, features, fuel_code, sold, distance in zip(
+                    group['ad_id'][nearest].tolist(), group['price'][nearest].tolist(), raw,
+                    group['fuel'][nearest].tolist(), group['sold'][nearest].tolist(),
+                    distances.tolist())]
+
+    def estimate(self, maker: str, model: str, year: int, mileage: int,
+                 power_output: int, fuel: str,
+                 k: int = DEFAULT_COMPARABLES) -> PriceEstimateDTO:
+        """
+        Suggests a price: the mean price of the k nearest listings,
+        weighted by 1 / (1 + distance).
+
+        Args:
+            maker (str): The maker of the vehicle.
+            model (str): The model of the vehicle.
+            year (int): The year of manufacture.
+            mileage (int): The mileage.
+            power_output (int): The power output.
+            fuel (str): The fuel type.
+            k (int): The number of comparables, at most MAX_COMPARABLES.
+
+        Returns:
+            PriceEstimateDTO: The estimate, empty if the model has no listings.
+
+        Raises:
+            ValueError: If k is out of range.
+        """
+        group, nearest, distances = self._nearest(maker, model, year, mileage,
+                                                  power_output, fuel, k)
+        if not len(nearest):
+            return PriceEstimateDTO()
+        prices = group['price'][nearest]
+        weights = 1.0 / (1.0 + distances)
+        low, high = np.percentile(prices, [25, 75])
+        return PriceEstimateDTO(
+            estimated_price=round(float(np.dot(weights, prices) / weights.sum())),
+            price_low=round(float(low)), price_high=round(float(high)),
+            comparables=self._comparables(group, nearest, distances))
+
+
+def _read_vehicles(connection: Connection) -> Dict[int, Tuple[str, str]]:
+    """Reads vehicle_id -> (maker, model) of the vehicle catalog."""
+    rows = connection.execute(select(Vehicle.vehicle_id, Vehicle.maker, Vehicle.model))
+    return {vehicle_id: (maker, model) for vehicle_id, maker, model in rows}
+
+
+_indexes: Dict[str, ComparablesIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_price_index(engine: Engine, max_age: float = REFRESH_INTERVAL) -> ComparablesIndex:
+    """
+    Returns the process-wide index of the database, built on first use
+    and refreshed when it is older than max_age seconds.
+
+    Args:
+        engine (Engine): The engine of the database.
+        max_age (float): The accepted age of the index in seconds.
+
+    Returns:
+        ComparablesIndex: The index.
+    """
+    url = str(engine.url)
+    index = _indexes.get(url)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(url, ComparablesIndex())
+    if index.refreshed_at is None or time.monotonic() - index.refreshed_at > max_age:
+        with _indexes_lock:
+            if index.refreshed_at is None or time.monotonic() - index.refreshed_at > max_age:
+                index.refresh(engine)
+    return index
+
+
+def suggest_price(engine: Engine, ad: AbstractVehicleAd,
+                  k: int = DEFAULT_COMPARABLES) -> PriceEstimateDTO:
+    """
+    Suggests the price of a new advertisement from its comparable listings.
+
+    Args:
+        engine (Engine): The engine of the database.
+        ad (AbstractVehicleAd): A TruckAd, ElectroCarAd, MotorcycleAd or MotorCarAd.
+        k (int): The number of comparables.
+
+    Returns:
+        PriceEstimateDTO: The estimate, empty if the model has no listings.
+    """
+    return get_price_index(engine).estimate(ad.maker, ad.model, ad.manufactured_date.year,
+                                            ad.mileage, ad.power_output, ad.fuel, k)
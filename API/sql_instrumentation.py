@@ -0,0 +1,330 @@
+import logging
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import Counter, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import event, Engine
+from sqlalchemy.orm import Session, sessionmaker, ORMExecuteState
+
+from config import settings
+
+logger = logging.getLogger('sql')
+
+# Upper bounds in milliseconds of the latency histogram buckets, the last bucket has no bound
+BUCKETS_MS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SLOW_QUERY_HISTORY = 100
+BIND_SUMMARY_ITEMS = 8
+
+_WHITESPACE = re.compile(r'\s+')
+# Bound parameters of every DBAPI paramstyle, then string and number literals
+_PARAMETERS = re.compile(r"%\([^)]+\)s|%s|\$\d+|(?<![:\w]):\w+|\?|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r'\bIN \((?:\?(?:, \?)*|__\[POSTCOMPILE_\w+\])\)', re.IGNORECASE)
+_VALUES_ROWS = re.compile(r'(VALUES \([^()]*\))(?:, \([^()]*\))+', re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """
+    Reduces a statement to its shape, so executions differing only by their
+    parameters, IN lists or rows of a multi-row VALUES are counted together.
+
+    Args:
+        statement (str): The SQL sent to the database.
+
+    Returns:
+        str: The statement on one line, every parameter and literal replaced by ?.
+
+    Example:
+        >>> normalize_sql("SELECT * FROM users\\n WHERE user_id IN (%(a_1)s, %(a_2)s) AND age > 30")
+        'SELECT * FROM users WHERE user_id IN (?) AND age > ?'
+    """
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _PARAMETERS.sub('?', statement)
+    statement = _IN_LIST.sub('IN (?)', statement)
+    return _VALUES_ROWS.sub(r'\1', statement)
+
+
+def summarize_binds(parameters: Any, executemany: bool = False) -> str:
+    """
+    Describes bound parameters by type and length only, their values
+    (e-mail addresses, phone numbers...) are never logged.
+
+    Args:
+        parameters: The DBAPI parameters, a dict, a sequence, or a
+            sequence of them for an executemany.
+        executemany (bool): Whether parameters holds several parameter sets.
+
+    Returns:
+        str: e.g. "{user_id_1: int, email_address_1: str[23]}"
+        or "1000 rows of {maker: str[6], ...}".
+    """
+    if executemany:
+        parameters = list(parameters or ())
+        first = summarize_binds(parameters[0]) if parameters else '{}'
+        return f'{len(parameters)} rows of {first}'
+
+    def describe(value: Any) -> str:
+        if isinstance(value, (str, bytes)):
+            return f'{type(value).__name__}[{len(value)}]'
+        if isinstance(value, (list, tuple)):
+            return f'{type(value).__name__}[{len(value)}]'
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        items = [f'{name}: {describe(value)}' for name, value in parameters.items()]
+    else:
+        items = [describe(value) for value in parameters or ()]
+    if len(items) > BIND_SUMMARY_ITEMS:
+        items = items[:BIND_SUMMARY_ITEMS] + [f'... {len(items) - BIND_SUMMARY_ITEMS} more']
+    return '{' + ', '.join(items) + '}'
+
+
+class QueryStats:
+    """Executions and latency histogram of one normalized statement."""
+    __slots__ = ('count', 'rows', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float, rows: int = 1) -> None:
+        self.count += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def quantile(self, fraction: float) -> float:
+        """
+        Estimates a latency quantile as the upper bound of its histogram
+        bucket, at most the slowest execution.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for index, executions in enumerate(self.buckets):
+            seen += executions
+            if executions and seen >= rank:
+                return min(BUCKETS_MS[index], self.max_ms) if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'parameter_sets': self.rows,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.50), 3),
+            'p95_ms': round(self.quantile(0.95), 3),
+            'p99_ms': round(self.quantile(0.99), 3),
+            'max_ms': round(self.max_ms, 3),
+            'histogram': {f'le_{bound:g}ms': executions
+                          for bound, executions in zip(BUCKETS_MS + (float('inf'),), self.buckets)},
+        }
+
+
+class SQLInstrumentation:
+    """
+    Times the statements of engines and watches the lazy loads of sessions.
+
+    The engine events (before/after_cursor_execute) feed a latency histogram
+    per normalized statement and log the statements slower than the threshold,
+    with a summary of their bound parameters, to the 'sql' logger. The session
+    event (do_orm_execute) counts the lazy loads of every relationship per
+    session: a relationship lazily loaded n_plus_one_threshold times in one
+    session, e.g. User.advertisements read in a loop over users, is reported
+    as an N+1 query, to be loaded with selectinload() or joinedload() instead.
+
+    Example:
+        >>> instrumentation = SQLInstrumentation(slow_query_ms=50).attach(get_engine(url))
+        >>> ...
+        >>> print(instrumentation.report())
+        >>> instrumentation.detach()
+
+    Attributes:
+        slow_query_ms (float): Statements slower than this are logged.
+        n_plus_one_threshold (int): Lazy loads of one relationship in one
+            session reported as an N+1 query.
+    """
+
+    def __init__(self,
+                 slow_query_ms: Optional[float] = None,
+                 n_plus_one_threshold: Optional[int] = None):
+        self.slow_query_ms = settings.DB_SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms
+        self.n_plus_one_threshold = (settings.DB_N_PLUS_ONE_THRESHOLD if n_plus_one_threshold is None
+                                     else n_plus_one_threshold)
+        self._lock = threading.Lock()
+        self._listeners: List[Tuple[Any, str, Any]] = []
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears the collected statistics."""
+        with self._lock:
+            self.started_at = datetime.now(timezone.utc)
+            self.queries: Dict[str, QueryStats] = {}
+            self.slow_queries: Deque[Dict] = deque(maxlen=SLOW_QUERY_HISTORY)
+            self.slow_query_count = 0
+            self.lazy_loads: Counter = Counter()
+            self.n_plus_one: Dict[str, Dict] = {}
+            self._session_loads: 'weakref.WeakKeyDictionary[Session, Counter]' = weakref.WeakKeyDictionary()
+
+    def attach(self, engine: Engine,
+               sessions: Union[type, sessionmaker, Session] = Session) -> 'SQLInstrumentation':
+        """
+        Starts listening to an engine and to sessions.
+
+        Args:
+            engine (Engine): The engine to time (AsyncEngine.sync_engine for async engines).
+            sessions: The sessions watched for lazy loads: a Session subclass,
+                a sessionmaker or a single session. Defaults to every Session.
+
+        Returns:
+            SQLInstrumentation: self, attached.
+        """
+        listeners = [(engine, 'before_cursor_execute', self._before_cursor_execute),
+                     (engine, 'after_cursor_execute', self._after_cursor_execute)]
+        if not any(target is sessions for target, _, _ in self._listeners):
+            listeners.append((sessions, 'do_orm_execute', self._on_orm_execute))
+        for target, name, listener in listeners:
+            if not event.contains(target, name, listener):
+                event.listen(target, name, listener)
+                self._listeners.append((target, name, listener))
+        return self
+
+    def detach(self) -> None:
+        """Stops listening to every engine and session, the statistics are kept."""
+        for target, name, listener in self._listeners:
+            if event.contains(target, name, listener):
+                event.remove(target, name, listener)
+        self._listeners.clear()
+
+    def _before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        context._instrumentation_started = time.perf_counter()
+
+    def _after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_instrumentation_started', None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        key = normalize_sql(statement)
+        rows = len(parameters) if executemany and parameters else 1
+        with self._lock:
+            stats = self.queries.get(key)
+            if stats is None:
+                stats = self.queries[key] = QueryStats()
+            stats.add(elapsed_ms, rows)
+            if elapsed_ms < self.slow_query_ms:
+                return
+            self.slow_query_count += 1
+            slow_query = {
+                'at': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                'elapsed_ms': round(elapsed_ms, 3),
+                'statement': key,
+                'binds': summarize_binds(parameters, executemany),
+            }
+            self.slow_queries.append(slow_query)
+        logger.warning('Slow query %.1f ms: %s binds %s', elapsed_ms, key, slow_query['binds'])
+
+    def _on_orm_execute(self, state: ORMExecuteState) -> None:
+        # Selectin and subquery loads are relationship loads too, but without a parent object
+        if not state.is_relationship_load or state.lazy_loaded_from is None:
+            return
+        relationship = str(state.loader_strategy_path.prop)
+        with self._lock:
+            self.lazy_loads[relationship] += 1
+            loads = self._session_loads.setdefault(state.session, Counter())
+            loads[relationship] += 1
+            count = loads[relationship]
+            if count < self.n_plus_one_threshold:
+                return
+            incident = self.n_plus_one.setdefault(
+                relationship, {'sessions': 0, 'max_lazy_loads': 0,
+                               'parent': type(state.lazy_loaded_from.obj()).__name__})
+            incident['max_lazy_loads'] = max(incident['max_lazy_loads'], count)
+            if count != self.n_plus_one_threshold:
+                return
+            incident['sessions'] += 1
+        logger.warning('N+1 query: %s lazily loaded %d times in one session, '
+                       'use selectinload() or joinedload()', relationship, count)
+
+    def snapshot(self) -> Dict:
+        """
+        Returns the collected metrics, JSON serializable.
+
+        Returns:
+            Dict: 'started_at', 'statements' (executions and total time),
+            'queries' (normalized statement -> count, total/mean/max and
+            estimated p50/p95/p99 in ms, histogram), 'slow_queries' (count
+            and the latest ones), 'lazy_loads' (relationship -> count) and
+            'n_plus_one' (relationship -> sessions, max lazy loads, parent class).
+        """
+        with self._lock:
+            queries = {key: stats.as_dict() for key, stats in self.queries.items()}
+            return {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'statements': sum(stats['count'] for stats in queries.values()),
+                'total_ms': round(sum(stats['total_ms'] for stats in queries.values()), 3),
+                'queries': queries,
+                'slow_queries': {'threshold_ms': self.slow_query_ms,
+                                 'count': self.slow_query_count,
+                                 'latest': list(self.slow_queries)},
+                'lazy_loads': dict(self.lazy_loads),
+                'n_plus_one': {name: dict(incident) for name, incident in self.n_plus_one.items()},
+            }
+
+    def report(self, top: int = 10, width: int = 100) -> str:
+        """
+        Formats the snapshot as text: the statements taking the most time,
+        the slow queries and the N+1 relationships.
+
+        Args:
+            top (int): The number of statements listed.
+            width (int): Statements are cut to this length.
+
+        Returns:
+            str: The report.
+        """
+        snapshot = self.snapshot()
+        lines = [f"{snapshot['statements']} statements, {snapshot['total_ms']:.1f} ms "
+                 f"since {snapshot['started_at']}", '',
+                 f"{'count':>8}{'total ms':>11}{'mean ms':>10}{'p95 ms':>9}{'max ms':>10}  statement"]
+        ranked = sorted(snapshot['queries'].items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        for statement, stats in ranked[:top]:
+            lines.append(f"{stats['count']:>8}{stats['total_ms']:>11.1f}{stats['mean_ms']:>10.2f}"
+                         f"{stats['p95_ms']:>9g}{stats['max_ms']:>10.1f}  {statement[:width]}")
+
+        slow = snapshot['slow_queries']
+        lines += ['', f"Slow queries (>= {slow['threshold_ms']:g} ms): {slow['count']}"]
+        for query in slow['latest'][-top:]:
+            lines.append(f"  {query['elapsed_ms']:>10.1f} ms  {query['statement'][:width]}  binds {query['binds']}")
+
+        lines += ['', f"N+1 queries (>= {self.n_plus_one_threshold} lazy loads per session): "
+                      f"{len(snapshot['n_plus_one'])}"]
+        for relationship, incident in snapshot['n_plus_one'].items():
+            lines.append(f"  {relationship}: {incident['sessions']} sessions, up to "
+                         f"{incident['max_lazy_loads']} lazy loads, use selectinload() or joinedload()")
+        return '\n'.join(lines)
+
+
+instrumentation = SQLInstrumentation()
+
+
+def instrument(engine: Engine) -> SQLInstrumentation:
+    """
+    Attaches the process-wide instrumentation to an engine and to every session.
+
+    Args:
+        engine (Engine): The engine to time.
+
+    Returns:
+        SQLInstrumentation: The process-wide instrumentation, see snapshot() and report().
+    """
+    return instrumentation.attach(engine)
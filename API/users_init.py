@@ -0,0 +1,352 @@
+from database_model import User, Address
+from database_session import get_engine
+from insert_new_user import hash_address, UPSERT_INSERTS
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterator, List, Dict, Optional, Set
+import pandas as pd
+from sqlalchemy import text, select, delete, exists, Engine, Connection
+from sqlalchemy.exc import IntegrityError, InvalidRequestError, DBAPIError
+from API.config import settings
+from API.Validators.user_input.batch_valid import validate_user_frame, validate_phone_number_column
+from API.Validators.address_input.batch_valid import validate_address_frame
+
+# Column names of the user exports (Generators/users.csv) -> users table columns
+CSV_ALIASES = {'user_type': 'user_property', 'optional_phone_number': 'additional_phone_number'}
+
+USER_COLUMNS = ('username', 'first_name', 'last_name', 'email_address',
+                'main_phone_number', 'gender')
+OPTIONAL_USER_COLUMNS = ('user_property', 'additional_phone_number')
+ADDRESS_COLUMNS = ('address', 'city', 'state', 'zip_code', 'country')
+# Users-only exports (Generators/users.csv) refer to addresses already saved
+ADDRESS_ID_COLUMN = 'address_id'
+
+# Values which must be unique per user, in the order they are checked
+UNIQUE_COLUMNS = ('username', 'email_address', 'main_phone_number')
+
+USER_PROPERTIES = ('r', 'b')
+# Limit of the phone number columns of the users table
+PHONE_NUMBER_MAX_LENGTH = 20
+
+DEFAULT_CHUNK_SIZE = 10_000
+REJECT_REASON_COLUMN = 'reject_reason'
+
+
+def read_user_chunks(csv: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Streams a user CSV file in chunks. Every value is read as a string,
+    empty cells become empty strings and unknown columns are skipped.
+
+    The file has either the address columns, or only the users with the
+    address_id of an address already saved, like Generators/users.csv.
+
+    Args:
+        csv (str): Path to the CSV file with the user and address columns.
+        chunk_size (int): Number of rows per chunk.
+
+    Returns:
+        Iterator[pd.DataFrame]: Chunks renamed to the table columns.
+
+    Raises:
+        ValueError: If a compulsory column is missing.
+    """
+    header = [CSV_ALIASES.get(column, column) for column in pd.read_csv(csv, nrows=0).columns]
+    if any(column in header for column in ADDRESS_COLUMNS):
+        address_columns = ADDRESS_COLUMNS
+    else:
+        address_columns = (ADDRESS_ID_COLUMN,)
+    missing = [column for column in USER_COLUMNS + address_columns if column not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    known = set(USER_COLUMNS + OPTIONAL_USER_COLUMNS + address_columns)
+    chunks = pd.read_csv(csv, usecols=lambda column: CSV_ALIASES.get(column, column) in known,
+                         dtype=str, keep_default_na=False, chunksize=chunk_size)
+    for chunk in chunks:
+        chunk = chunk.rename(columns=CSV_ALIASES)
+        if 'user_property' not in chunk.columns:
+            chunk['user_property'] = 'r'
+        if 'additional_phone_number' not in chunk.columns:
+            chunk['additional_phone_number'] = ''
+        yield chunk
+
+
+def validate_user_chunk(chunk: pd.DataFrame, workers: int = 1) -> pd.Series:
+    """
+    Validates a chunk of users and addresses column by column,
+    with the rules of UserAddDTO and UserAddressAddDTO.
+
+    Args:
+        chunk (pd.DataFrame): Users with the user and address columns,
+            or with the address_id column.
+        workers (int): Number of processes used for phone number parsing.
+
+    Returns:
+        pd.Series: The reject reason of every row, empty for valid rows.
+    """
+    user_masks, _ = validate_user_frame(chunk, workers=workers)
+    if ADDRESS_ID_COLUMN in chunk.columns:
+        address_masks = chunk[ADDRESS_ID_COLUMN].str.fullmatch(r'[1-9]\d{0,17}').rename(ADDRESS_ID_COLUMN)
+    else:
+        address_masks = validate_address_frame(chunk)
+    masks = pd.concat([user_masks, address_masks], axis=1)
+
+    additional = chunk['additional_phone_number']
+    masks['additional_phone_number'] = additional.eq('') | validate_phone_number_column(
+        additional, workers=workers)
+    for column in ('main_phone_number', 'additional_phone_number'):
+        masks[column] &= chunk[column].str.len().le(PHONE_NUMBER_MAX_LENGTH)
+    masks['user_property'] = chunk['user_property'].isin(USER_PROPERTIES)
+
+    reasons = pd.Series('', index=chunk.index)
+    for column in masks.columns:
+        reasons = reasons.mask(reasons.eq('') & ~masks[column], f'invalid {column}')
+    return reasons
+
+
+def mark_duplicates(chunk: pd.DataFrame, reasons: pd.Series,
+                    seen: Dict[str, Set[str]]) -> pd.Series:
+    """
+    Rejects the valid rows sharing a unique value with an earlier valid
+    row of the file. Rows already rejected do not count. Users may share
+    an address.
+
+    Args:
+        chunk (pd.DataFrame): Users with the UNIQUE_COLUMNS.
+        reasons (pd.Series): Reject reasons of the chunk, empty for valid rows.
+        seen (Dict[str, Set[str]]): Values of the previous chunks per column,
+            updated with the accepted values of this chunk.
+
+    Returns:
+        pd.Series: The updated reject reasons.
+    """
+    for column in UNIQUE_COLUMNS:
+        values = chunk.loc[reasons.eq(''), column]
+        duplicate = values.duplicated() | values.isin(seen[column])
+        reasons = reasons.mask(duplicate.reindex(chunk.index, fill_value=False),
+                               f'duplicate {column}')
+
+    accepted = reasons.eq('')
+    for column in UNIQUE_COLUMNS:
+        seen[column].update(chunk.loc[accepted, column])
+    return reasons
+
+
+def upsert_addresses(connection: Connection, rows: List[Dict]) -> Dict[str, int]:
+    """
+    Inserts the addresses in one batched statement. Addresses saved
+    before are reused.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        rows (List[Dict]): Address column values with unique address hashes,
+            an upsert cannot update the same row twice.
+
+    Returns:
+        Dict[str, int]: address_hash -> address_id
+    """
+    insert_function = UPSERT_INSERTS[connection.dialect.name]
+    statement = insert_function(Address)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Address.address_hash],
+        set_={'address_hash': statement.excluded.address_hash},
+    ).returning(Address.address_hash, Address.address_id)
+    return dict(connection.execute(statement, rows).tuples().all())
+
+
+def saved_address_hashes(connection: Connection, address_hashes: pd.Series) -> Set[str]:
+    """
+    Returns the address hashes of a chunk which are already in the addresses table.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        address_hashes (pd.Series): Address hashes of the chunk.
+
+    Returns:
+        Set[str]: The address hashes found.
+    """
+    statement = select(Address.address_hash).where(
+        Address.address_hash.in_(address_hashes.unique().tolist()))
+    return set(connection.execute(statement).scalars())
+
+
+def known_address_ids(connection: Connection, address_ids: pd.Series) -> Set[str]:
+    """
+    Returns the address ids of a users-only chunk which are in the addresses table.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        address_ids (pd.Series): Validated address ids, as strings.
+
+    Returns:
+        Set[str]: The address ids found.
+    """
+    ids = [int(address_id) for address_id in address_ids.unique()]
+    statement = select(Address.address_id).where(Address.address_id.in_(ids))
+    return {str(address_id) for address_id in connection.execute(statement).scalars()}
+
+
+def delete_unused_addresses(connection: Connection, address_ids: List[int]) -> int:
+    """
+    Deletes the addresses among address_ids no user refers to: the ones
+    inserted for users skipped as already existing.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        address_ids (List[int]): Ids of the addresses inserted for a chunk,
+            addresses saved before the chunk must not be given.
+
+    Returns:
+        int: The number of deleted addresses.
+    """
+    statement = delete(Address).where(
+        Address.address_id.in_(address_ids),
+        ~exists().where(User.address_id == Address.address_id))
+    return connection.execute(statement).rowcount
+
+
+def insert_users(connection: Connection, rows: List[Dict]) -> Set[str]:
+    """
+    Inserts the users in one batched statement. Users conflicting with
+    an existing username, email address or phone number are skipped.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        rows (List[Dict]): User column values.
+
+    Returns:
+        Set[str]: The usernames of the inserted users.
+    """
+    insert_function = UPSERT_INSERTS[connection.dialect.name]
+    statement = insert_function(User).on_conflict_do_nothing().returning(User.username)
+    return set(connection.execute(statement, rows).scalars().all())
+
+
+def load_user_chunk(connection: Connection, chunk: pd.DataFrame) -> Set[str]:
+    """
+    Saves the addresses and users of a validated chunk. The addresses
+    inserted for users skipped as already existing are deleted again,
+    within the same transaction. Addresses saved before are kept.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        chunk (pd.DataFrame): Valid users with unique values, and address
+            hashes or the ids of saved addresses.
+
+    Returns:
+        Set[str]: The usernames of the inserted users.
+    """
+    users = chunk[list(USER_COLUMNS + OPTIONAL_USER_COLUMNS)].copy()
+    users['additional_phone_number'] = users['additional_phone_number'].replace('', None)
+    if ADDRESS_ID_COLUMN in chunk.columns:
+        users['address_id'] = chunk[ADDRESS_ID_COLUMN].astype(int)
+        return insert_users(connection, users.to_dict(orient='records'))
+
+    addresses = chunk[['address_hash', *ADDRESS_COLUMNS]].drop_duplicates('address_hash')
+    saved = saved_address_hashes(connection, addresses['address_hash'])
+    address_ids = upsert_addresses(connection, addresses.to_dict(orient='records'))
+    users['address_id'] = chunk['address_hash'].map(address_ids)
+    inserted = insert_users(connection, users.to_dict(orient='records'))
+    if len(inserted) < len(users):
+        delete_unused_addresses(connection, [address_id for address_hash, address_id
+                                             in address_ids.items() if address_hash not in saved])
+    return inserted
+
+
+def write_rejects(rejects: pd.DataFrame, path: Path, header: bool) -> None:
+    """Appends the rejected rows and their reasons to the rejects file."""
+    rejects.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+
+
+def insert_users_from_csv(csv: str,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          engine: Optional[Engine] = None,
+                          rejects: Optional[str] = None,
+                          workers: int = 1) -> Counter:
+    """
+    Bulk imports a user CSV file (users with their addresses)
+    into the users and addresses tables.
+
+    The file is streamed in chunks. Every chunk is validated column by
+    column, deduplicated against the rest of the file and saved within
+    its own transaction with two batched statements: the addresses are
+    upserted on address_hash, users at the same address share it, and
+    the users are inserted skipping the ones already in the database, so
+    an interrupted import can be run again. Invalid, duplicate and already
+    existing rows are written to the rejects file with a reject_reason column.
+
+    A users-only file (no address columns, an address_id column instead,
+    like Generators/users.csv) refers to addresses already saved, rows
+    with an unknown address_id are rejected.
+
+    Args:
+        csv (str): Path to the CSV file. user_type and optional_phone_number
+            are accepted for user_property and additional_phone_number.
+        chunk_size (int): Number of rows validated and sent to the database at once.
+        engine (Engine, optional): Engine to use, PostgreSQL or SQLite.
+            Defaults to the shared engine of the database from the environment variables.
+        rejects (str, optional): Path of the rejects file.
+            Defaults to <csv name>_rejects.csv next to the CSV file.
+        workers (int): Number of processes used for phone number parsing,
+            worth it for chunks with more than 50k distinct numbers.
+
+    Returns:
+        Counter: The numbers of 'inserted' and 'rejected' rows.
+    """
+    if engine is None:
+        engine = get_engine(settings.DATABASE_URL_psycopg)
+    rejects_path = Path(rejects) if rejects else Path(csv).with_name(f'{Path(csv).stem}_rejects.csv')
+
+    counts = Counter(inserted=0, rejected=0)
+    seen: Dict[str, Set[str]] = {column: set() for column in UNIQUE_COLUMNS}
+    started = time.perf_counter()
+
+    with engine.connect() as connection:
+        # Raises exception if no connection established
+        connection.execute(text('SELECT 1'))
+        print('\n\033[1;32;40mDatabase is connected\033[0m')
+
+    for chunk in read_user_chunks(csv, chunk_size):
+        reasons = validate_user_chunk(chunk, workers)
+        users_only = ADDRESS_ID_COLUMN in chunk.columns
+        if not users_only:
+            chunk['address_hash'] = [hash_address(country, city, address) for country, city, address
+                                     in zip(chunk['country'], chunk['city'], chunk['address'])]
+        reasons = mark_duplicates(chunk, reasons, seen)
+
+        valid = chunk[reasons.eq('')]
+        inserted: Set[str] = set()
+        if len(valid):
+            try:
+                with engine.begin() as connection:
+                    if users_only:
+                        known = known_address_ids(connection, valid[ADDRESS_ID_COLUMN])
+                        reasons = reasons.mask(reasons.eq('') & ~chunk[ADDRESS_ID_COLUMN].isin(known),
+                                               f'unknown {ADDRESS_ID_COLUMN}')
+                        valid = chunk[reasons.eq('')]
+                    if len(valid):
+                        inserted = load_user_chunk(connection, valid)
+            except (IntegrityError, InvalidRequestError, DBAPIError) as error:
+                print('Something went wrong. Check your database or data.')
+                print('Transaction rolled back')
+                raise Exception(error)
+            reasons = reasons.mask(reasons.eq('') & ~chunk['username'].isin(inserted),
+                                   'already exists')
+
+        rejected = chunk.loc[reasons.ne('')].drop(columns='address_hash', errors='ignore')
+        if len(rejected):
+            rejected[REJECT_REASON_COLUMN] = reasons[reasons.ne('')]
+            write_rejects(rejected, rejects_path, header=counts['rejected'] == 0)
+
+        counts['inserted'] += len(inserted)
+        counts['rejected'] += len(rejected)
+
+    elapsed = time.perf_counter() - started
+    total = counts['inserted'] + counts['rejected']
+    rate = total / elapsed if elapsed else float(total)
+    print(f'\n\033[1;32;40m{counts["inserted"]} users imported in {elapsed:.2f}s '
+          f'({rate:,.0f} rows/sec)\033[0m')
+    if counts['rejected']:
+        print(f'\033[1;31;40m{counts["rejected"]} rows rejected, see {rejects_path}\033[0m')
+    return counts
@@ -1,35 +1,127 @@
-from database_model import Vehicle, create_engine
-from sqlalchemy.orm import Session
+from database_model import Vehicle
+from database_session import get_engine
+import csv as csv_module
+import io
+import time
+from typing import Iterator, List, Dict, Optional
 import pandas as pd
-from sqlalchemy import text
-from sqlalchemy.exc import IntegrityError, InvalidRequestError
+from sqlalchemy import text, insert, Engine, Connection
+from sqlalchemy.exc import IntegrityError, InvalidRequestError, DBAPIError
 from API.config import settings
 
+# Maps the column names of the catalog dumps (Generators/vehicles.csv)
+# to the columns of the vehicles table.
+CSV_TO_TABLE_COLUMNS = {'brand': 'maker', 'model': 'model', 'category_id': 'category_id'}
 
-def insert_vehicle_from_csv(csv: str):
-    # TODO: Doc string
-    frame = pd.read_csv(csv, usecols=['brand', 'model', 'category_id'])
-
-    engine = create_engine(settings.DATABASE_URL_psycopg, echo=True)
-
-    with Session(bind=engine) as session:
-        # Raises exception if no connection established
-        session.execute(text('SELECT 1'))
-        print('\n\033[1;32;40mDatabase is connected\033[0m')
-
-        # All or nothing transaction
-        session.begin(nested=True)
-        try:
-            for _, row in frame.iterrows():
-                brand = row['brand']
-                model = row['model']
-                category = row['category_id']
-
-                vehicle = Vehicle(make=brand, model=model, category=category)
-                session.add(vehicle)
-                session.commit()
-        except (IntegrityError, InvalidRequestError) as error:
-            print('Something went. Check your database or data.')
-            session.rollback()
-            print('Session rolled back')
-            raise Exception(error)
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def read_vehicle_chunks(csv: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Streams a vehicle catalog CSV file in chunks, so arbitrarily
+    large catalog dumps are never loaded into memory at once.
+
+    Args:
+        csv (str): Path to the CSV file with brand, model and category_id columns.
+        chunk_size (int): Number of rows per chunk.
+
+    Returns:
+        Iterator[pd.DataFrame]: Chunks renamed to the vehicles table columns.
+    """
+    chunks = pd.read_csv(csv, usecols=list(CSV_TO_TABLE_COLUMNS),
+                         dtype={'brand': str, 'model': str, 'category_id': 'int64'},
+                         keep_default_na=False, chunksize=chunk_size)
+    for chunk in chunks:
+        yield chunk.rename(columns=CSV_TO_TABLE_COLUMNS)[list(CSV_TO_TABLE_COLUMNS.values())]
+
+
+def copy_vehicle_chunk(connection: Connection, chunk: pd.DataFrame) -> None:
+    """
+    Loads one chunk into the vehicles table with PostgreSQL COPY.
+    Supports both psycopg 3 (cursor.copy) and psycopg2 (cursor.copy_expert).
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        chunk (pd.DataFrame): Rows with maker, model and category_id columns.
+    """
+    table = Vehicle.__table__
+    columns = ', '.join(CSV_TO_TABLE_COLUMNS.values())
+    statement = f'COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)'
+
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, header=False, index=False, quoting=csv_module.QUOTE_MINIMAL)
+
+    cursor = connection.connection.cursor()
+    try:
+        if hasattr(cursor, 'copy'):
+            # psycopg 3
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+        else:
+            # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+
+
+def insert_vehicle_chunk(connection: Connection, chunk: pd.DataFrame) -> None:
+    """
+    Loads one chunk into the vehicles table with a single batched
+    executemany. Used for SQLite and other non-PostgreSQL databases.
+
+    Args:
+        connection (Connection): Connection with an open transaction.
+        chunk (pd.DataFrame): Rows with maker, model and category_id columns.
+    """
+    records: List[Dict] = chunk.to_dict(orient='records')
+    connection.execute(insert(Vehicle.__table__), records)
+
+
+def insert_vehicle_from_csv(csv: str,
+                            chunk_size: int = DEFAULT_CHUNK_SIZE,
+                            engine: Optional[Engine] = None) -> int:
+    """
+    Bulk loads a vehicle catalog CSV file into the vehicles table.
+
+    The file is streamed in chunks and every chunk is written within
+    one single transaction (all or nothing). PostgreSQL is loaded with
+    COPY, other databases fall back to a batched executemany insert.
+
+    Args:
+        csv (str): Path to the CSV file (e.g. Generators/vehicles.csv).
+        chunk_size (int): Number of rows sent to the database at once.
+        engine (Engine, optional): Engine to use. Defaults to the shared
+            engine of the database from the environment variables.
+
+    Returns:
+        int: The number of inserted rows.
+    """
+    if engine is None:
+        engine = get_engine(settings.DATABASE_URL_psycopg)
+
+    use_copy = engine.dialect.name == 'postgresql'
+    load_chunk = copy_vehicle_chunk if use_copy else insert_vehicle_chunk
+
+    total = 0
+    started = time.perf_counter()
+
+    try:
+        with engine.begin() as connection:
+            # Raises exception if no connection established
+            connection.execute(text('SELECT 1'))
+            print('\n\033[1;32;40mDatabase is connected\033[0m')
+
+            for chunk in read_vehicle_chunks(csv, chunk_size):
+                load_chunk(connection, chunk)
+                total += len(chunk)
+    except (IntegrityError, InvalidRequestError, DBAPIError) as error:
+        print('Something went wrong. Check your database or data.')
+        print('Transaction rolled back')
+        raise Exception(error)
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed else float(total)
+    print(f'\n\033[1;32;40m{total} vehicles loaded in {elapsed:.2f}s '
+          f'({rate:,.0f} rows/sec, {"COPY" if use_copy else "executemany"})\033[0m')
+    return total